@@ -8,24 +8,103 @@ import pandas as pd
 import numpy as np
 
 # APIs
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-import requests
 # import lyricsgenius
-
-# Audio / NLP
-import librosa
-from textblob import TextBlob
-
-# Viz
-import plotly.express as px
-import plotly.graph_objects as go
+from spotipy.exceptions import SpotifyException
+import requests
 
 # Utils
 import os
-import re
-from bs4 import BeautifulSoup
-from urllib.parse import quote
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Briques métier (hors UI)
+from radar.config import use_secrets, get_secret
+from radar.interpret import (
+    classify_tempo,
+    classify_energy,
+    classify_brightness,
+    classify_dynamic,
+    interpret_lyrics_profile,
+    interpret_dissonance,
+    interpret_tiktok_score,
+    interpret_spotify_popularity,
+    interpret_genre_clarity,
+)
+from radar.audit import build_release_timeline, release_cadence
+from radar.text import analyze_lyrics
+from radar.sources import (
+    get_spotify,
+    search_best_artist,
+    similar_rows_with_spotify,
+    get_lastfm_artist_tags,
+    get_lastfm_similar_artists,
+)
+from radar.audio import analyze_preview_url
+from radar.corpus import fetch_lyrics, get_lyrics_corpus
+from radar.catalogue import (
+    album_trend,
+    build_catalogue,
+    catalogue_frame,
+    dissonance_matrix,
+    heatmap_grid,
+    load_catalogue,
+)
+from radar.itunes_map import resolve_itunes_preview, resolve_itunes_previews
+from radar.labo import LaboJobs
+from radar.markets import (
+    MARKET_LABELS,
+    default_markets,
+    format_markets,
+    get_albums_multi,
+    get_top_tracks_multi,
+)
+from radar.similarity_graph import (
+    crawl as crawl_similarity_graph,
+    get_similarity_store,
+    graph_metrics,
+    render_subgraph,
+    shortest_paths,
+)
+from radar.tag_index import get_tag_index, record_artist_tags
+from radar.tiktok import (
+    tiktok_signals_from_analysis,
+    score_tiktok_potential,
+    batch_tiktok_scores,
+    TIKTOK_WEIGHTS,
+)
+from radar.market_weather import (
+    TOP50_FRANCE_ID,
+    parse_playlist_id,
+    refresh_market_weather,
+    load_cached_weather,
+)
+from radar.timeseries import get_timeseries_store, record_artist_snapshot
+from radar.snapshots import load_artist_snapshot
+from radar.refresher import WatchlistRefresher, load_watchlist
+from radar.tracing import (
+    start_trace,
+    finish_trace,
+    span,
+    propagate,
+    export_jsonl,
+    export_prometheus,
+)
+from radar.profiler import ProfileCapture, list_profiles
+from radar.replay import install_from_env as install_http_replay_from_env
+from radar.bundle import (
+    BUNDLE_EXT,
+    bundles_dir,
+    export_bundle,
+    install_from_env as install_offline_bundle_from_env,
+)
+from radar.singleflight import singleflight_stats
+from radar.ratelimit import ProviderUnavailable, provider_metrics, degraded_providers
+from radar.memo import memo_metrics, memo_prometheus, memoize
+from radar.startup import lazy_import, start_warmup
+
+# Viz : plotly chargé au premier graphique (radar.startup), pas à l'import de l'app
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 
 # =========================================================
@@ -49,559 +128,311 @@ for k, v in DEFAULT_STATE.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
-
-# =========================================================
-# CONFIGURATION APIS (Spotify / Genius / Last.fm, etc.)
-# =========================================================
-try:
-    sp = spotipy.Spotify(
-        auth_manager=SpotifyClientCredentials(
-            client_id=st.secrets["SPOTIPY_CLIENT_ID"],
-            client_secret=st.secrets["SPOTIPY_CLIENT_SECRET"]
-        )
-    )
-    """ genius = lyricsgenius.Genius(
-        st.secrets["GENIUS_ACCESS_TOKEN"],
-        verbose=False
-    ) """
-    LASTFM_KEY = st.secrets["LASTFM_API_KEY"]
-except Exception:
-    st.error("Erreur de configuration API (Spotify / Genius / Last.fm). Vérifie les secrets.")
-    st.stop()
+# Une trace par rerun : chaque étape (API, audio, texte, graphiques) y ajoute un span
+rerun_trace = start_trace("rerun")
 
 
 # =========================================================
-# FONCTIONS UTILITAIRES GLOBALES
+# CONFIGURATION APIS (Spotify / Genius / Last.fm, etc.)
 # =========================================================
+# Les modules radar.* lisent leurs clés via st.secrets en priorité
+use_secrets(st.secrets)
 
-# Option : traduction auto vers l'anglais pour l'analyse de texte
-DEEPL_API_KEY = st.secrets.get("DEEPL_API_KEY", None)
-
-def translate_to_english(text: str):
-    """
-    Traduit le texte vers l'anglais avec l'API DeepL si possible.
-    Retourne (texte_analyse, langue_source_estimee).
-    Si pas de clé ou erreur : renvoie le texte d'origine + 'unknown'.
-    """
-    if not text:
-        return text, "unknown"
+# RADAR_HTTP_MODE=record|replay : capture / rejoue les réponses des APIs (radar.replay)
+install_http_replay_from_env()
 
-    if DEEPL_API_KEY is None:
-        # Pas de clé → on ne traduit pas
-        return text, "unknown"
+# RADAR_OFFLINE_BUNDLE=chemin.radar : dashboard servi par un bundle, sans aucun appel API
+try:
+    offline_bundle = install_offline_bundle_from_env()
+except (OSError, ValueError) as exc:
+    st.error(f"Bundle hors-ligne illisible : {exc}")
+    st.stop()
 
+if offline_bundle is None:
     try:
-        url = "https://api-free.deepl.com/v2/translate"
-        data = {
-            "auth_key": DEEPL_API_KEY,
-            "text": text,
-            "target_lang": "EN",
-        }
-        resp = requests.post(url, data=data, timeout=10)
-        resp.raise_for_status()
-        data_json = resp.json()
-
-        translations = data_json.get("translations", [])
-        if not translations:
-            return text, "unknown"
-
-        t0 = translations[0]
-        translated = t0.get("text", text)
-        source_lang = t0.get("detected_source_language", "unknown")
-
-        return translated, source_lang.lower()
+        sp = get_spotify()
+        """ genius = lyricsgenius.Genius(
+            st.secrets["GENIUS_ACCESS_TOKEN"],
+            verbose=False
+        ) """
+        LASTFM_KEY = st.secrets["LASTFM_API_KEY"]
     except Exception:
-        # En cas d'erreur API, on continue avec le texte original
-        return text, "unknown"
-
-def classify_tempo(bpm: float):
-    if bpm is None:
-        return "Inconnu", "Tempo non estimé."
-    if bpm < 80:
-        return "Lent", "Plutôt adapté à des ambiances posées / introspectives."
-    elif bpm < 110:
-        return "Modéré", "Zone mid-tempo polyvalente (rap, pop, r&b)."
-    elif bpm < 140:
-        return "Rapide", "Énergie naturelle pour bangers, club, formats dynamiques."
-    else:
-        return "Très rapide", "Très intense, à manier avec soin pour ne pas fatiguer l’auditeur."
-
-
-def classify_energy(avg_energy: float):
-    if avg_energy is None:
-        return "Inconnue", "Énergie non mesurée."
-    if avg_energy < 0.15:
-        return "Faible", "Titre plutôt doux / retenu, peu de punch perçu."
-    elif avg_energy < 0.30:
-        return "Moyenne", "Énergie modérée, laisse de la place à la voix / au texte."
-    else:
-        return "Élevée", "Titre assez puissant / agressif, bonne base pour formats dynamiques."
-
+        st.error("Erreur de configuration API (Spotify / Genius / Last.fm). Vérifie les secrets.")
+        st.stop()
 
-def classify_brightness(avg_centroid: float):
-    if avg_centroid is None:
-        return "Inconnue", "Brillance non mesurée."
-    if avg_centroid < 1500:
-        return "Sombre / chaud", "Spectre plutôt grave, ambiance feutrée ou lourde."
-    elif avg_centroid < 3500:
-        return "Équilibrée", "Équilibre entre graves et aigus, écoute confortable."
-    else:
-        return "Brillante", "Spectre très aigu, peut donner un côté agressif ou moderne."
 
+# =========================================================
+# REFRESHER DE FOND (snapshots précalculés des artistes du roster)
+# =========================================================
+# Au-delà, un snapshot est jugé périmé et la page repasse en appels live
+SNAPSHOT_MAX_AGE_S = 24 * 3600
 
-def classify_dynamic(dynamic_range: float):
-    if dynamic_range is None:
-        return "Inconnue", "Dynamique non mesurée."
-    if dynamic_range < 0.1:
-        return "Très compressée", "Peu de variation, son 'collé', ressenti fort mais fatigant."
-    elif dynamic_range < 0.25:
-        return "Modérée", "Bonne présence avec quelques respirations."
-    else:
-        return "Respirante", "Beaucoup de variations, plus organique mais moins 'radio ready'."
-
-
-def interpret_lyrics_profile(text_polarity: float, subjectivity: float, vocab_size: int):
-    # Mood
-    if text_polarity is None:
-        mood_label = "Inconnu"
-        mood_comment = "Impossible d'estimer le ton émotionnel du texte."
-    elif text_polarity < -0.25:
-        mood_label = "Sombre / négatif"
-        mood_comment = "Thèmes plutôt tristes, en colère ou mélancoliques."
-    elif text_polarity > 0.25:
-        mood_label = "Lumineux / positif"
-        mood_comment = "Thèmes plutôt optimistes, chaleureux ou confiants."
-    else:
-        mood_label = "Ambivalent / neutre"
-        mood_comment = "Mélange de positif et de négatif ou ton plus descriptif."
-
-    # Subjectivité
-    if subjectivity is None:
-        subj_label = "Inconnue"
-        subj_comment = "Subjectivité non mesurée."
-    elif subjectivity < 0.3:
-        subj_label = "Plutôt factuel"
-        subj_comment = "Texte plus descriptif / narratif que très introspectif."
-    elif subjectivity < 0.6:
-        subj_label = "Mixte"
-        subj_comment = "Équilibre entre description et subjectivité personnelle."
-    else:
-        subj_label = "Très subjectif"
-        subj_comment = "Texte très centré sur le ressenti et le vécu personnel."
-
-    # Richesse lexicale (seuils heuristiques)
-    if vocab_size is None:
-        rich_label = "Inconnue"
-        rich_comment = "Richesse lexicale non calculée."
-    elif vocab_size < 150:
-        rich_label = "Simple"
-        rich_comment = "Vocabulaire resserré, bon pour la mémorisation / formats viraux."
-    elif vocab_size < 400:
-        rich_label = "Moyenne"
-        rich_comment = "Assez de variété pour raconter quelque chose sans perdre l’auditeur."
-    else:
-        rich_label = "Élevée"
-        rich_comment = "Vocabulaire dense, intéressant pour un public qui écoute les paroles."
 
-    return (mood_label, mood_comment,
-            subj_label, subj_comment,
-            rich_label, rich_comment)
+@st.cache_resource
+def start_watchlist_refresher():
+    """Un seul refresher par process serveur (partagé par toutes les sessions), à l'arrêt hors-ligne."""
+    refresher = WatchlistRefresher.from_watchlist()
+    return refresher if offline_bundle is not None else refresher.start()
 
 
-def interpret_dissonance(audio_mood: float, text_polarity: float):
-    """
-    Retourne (score, label, commentaire) pour la dissonance audio/texte.
-    """
-    if (audio_mood is None) or (text_polarity is None):
-        return None, "Non calculable", "Il manque soit l'analyse audio, soit l'analyse du texte."
-
-    text_valence = (text_polarity + 1) / 2  # [-1,1] -> [0,1]
-    dissonance = abs(audio_mood - text_valence)
-
-    if dissonance < 0.2:
-        label = "Très cohérent"
-        comment = "Ambiance sonore et texte vont dans la même direction émotionnelle."
-    elif dissonance < 0.4:
-        label = "Cohérent avec nuances"
-        comment = "Globalement aligné, avec quelques décalages intéressants."
-    else:
-        label = "Forte tension créative"
-        comment = "Décalage marqué entre son et texte : peut devenir une vraie signature si c'est assumé."
+refresher = start_watchlist_refresher()
 
-    return dissonance, label, comment
 
-def interpret_spotify_popularity(score: int):
-    """
-    Donne une étiquette lisible pour un score de popularité artiste Spotify.
-    Heuristique simple sur 0-100.
-    """
-    if score is None:
-        return "Inconnu", "Pas assez de données pour estimer la popularité."
-    if score < 15:
-        return "Sous les radars", "Profil très early, quasi invisible pour l’algorithme."
-    elif score < 25:
-        return "Émergent", "Commence à apparaître, mais encore peu de traction régulière."
-    elif score < 50:
-        return "En construction", "Base d’audience réelle, croissance possible si bien accompagnée."
-    elif score < 75:
-        return "En plein buzz", "Artiste bien installé·e, bon potentiel playlists & algorithme."
-    else:
-        return "Star / très établi", "Très forte traction, forte visibilité dans l’écosystème Spotify."
+# =========================================================
+# FONCTIONS UTILITAIRES GLOBALES
+# =========================================================
 
+SPOTIFY_DATASET_PATH = "data/spotify_tracks.csv"
 
-def interpret_genre_clarity(genres: list[str]):
-    """
-    Prend la liste de genres Spotify et renvoie (label, commentaire).
-    On veut qualifier la clarté du positionnement.
-    """
-    n = len(genres or [])
-    if n == 0:
-        return "Aucun", "Spotify n’a pas encore assez de données pour catégoriser l’artiste."
-    if n <= 2:
-        return "Très ciblé", "Positionnement clair : une scène principale bien identifiée."
-    elif n <= 5:
-        return "Segmenté", "Quelques sous-genres, l’artiste navigue dans un même univers global."
-    else:
-        return "Éclaté", (
-            "Beaucoup de micro-genres : soit l’artiste est très hybride, "
-            "soit le positionnement perçu est flou."
-        )
 
-@st.cache_data
-def enrich_similar_with_spotify(similar_list):
+# Cache mémoire borné (radar.memo) : clé = ID de l'artiste, pas la liste Last.fm
+@memoize("similar_enriched", ttl=6 * 3600, max_bytes=32_000_000,
+         key=lambda artist_id, similar_list: artist_id)
+def enrich_similar_with_spotify(artist_id: str, similar_list):
     """
-    Prend la liste Last.fm d'artistes similaires
+    Prend la liste Last.fm d'artistes similaires de l'artiste `artist_id`
     et renvoie un DataFrame avec :
     - Artiste
     - Similarité_Lastfm
     - Popularité_Spotify
     - Followers_Spotify
     """
-    rows = []
-    for a in similar_list:
-        name = a.get("name", "")
-        match = float(a.get("match", 0) or 0.0)
-        if not name:
-            continue
-
-        sp_artist = search_best_artist(name)
-        if sp_artist is None:
-            rows.append({
-                "Artiste": name,
-                "Similarité_Lastfm": match,
-                "Popularité_Spotify": None,
-                "Followers_Spotify": None,
-            })
-        else:
-            rows.append({
-                "Artiste": name,
-                "Similarité_Lastfm": match,
-                "Popularité_Spotify": sp_artist.get("popularity"),
-                "Followers_Spotify": sp_artist.get("followers", {}).get("total"),
-            })
+    rows = similar_rows_with_spotify(similar_list)
 
     if not rows:
         return pd.DataFrame()
     return pd.DataFrame(rows)
 
-@st.cache_data
-def load_spotify_dataset():
+# Clé = (chemin, mtime) : le dataset est rechargé si le fichier change
+@memoize("spotify_dataset", max_entries=1, max_bytes=300_000_000,
+         key=lambda path=SPOTIFY_DATASET_PATH: (path, os.path.getmtime(path)))
+def load_spotify_dataset(path: str = SPOTIFY_DATASET_PATH):
     """
     Charge le dataset local de tracks avec audio features.
-    Adapter le chemin si ton fichier a un autre nom.
+    Adapter SPOTIFY_DATASET_PATH si ton fichier a un autre nom.
     """
-    df = pd.read_csv("data/spotify_tracks.csv")
+    df = pd.read_csv(path)
     return df
 
-def _norm_text(s: str) -> str:
-    """Normalise un texte pour comparer les noms (minuscules, sans accents, sans caractères spéciaux)."""
-    if not s:
-        return ""
-    s = s.lower()
-    # Option simple : enlever tout sauf lettres/chiffres
-    s = re.sub(r"[^a-z0-9]", "", s)
-    return s
-
 
-def _parse_spotify_artist_id_from_query(query: str):
+@st.cache_resource
+def start_server_warmup():
     """
-    Si l'utilisateur colle un lien Spotify d'artiste,
-    on extrait l'ID directement.
+    Préchauffage unique par process serveur, en tâche de fond (RADAR_WARMUP=0 pour
+    le désactiver) : index, snapshots watchlist, lexiques, librosa/numba, dataset.
     """
-    if not query:
-        return None
-    # Exemple : https://open.spotify.com/artist/4W63Zz1gVQpFDuBt06yQhg?si=...
-    m = re.search(r"open\.spotify\.com/artist/([a-zA-Z0-9]+)", query)
-    if m:
-        return m.group(1)
-    return None
+    return start_warmup(extra={"dataset": load_spotify_dataset})
 
 
-def search_best_artist(query: str):
-    """
-    Retourne le meilleur artiste Spotify pour une requête donnée,
-    en évitant le piège du 'premier résultat au hasard'.
-
-    Stratégie :
-    1. Si lien Spotify -> on récupère directement l'artiste par ID.
-    2. Sinon :
-       - on cherche jusqu'à 10 artistes,
-       - on privilégie :
-         a) nom EXACT (normalisé),
-         b) nom qui commence par la requête,
-         c) nom qui contient la requête,
-         d) sinon : artiste le plus populaire.
-    """
-    if not query:
-        return None
+warmup_status = start_server_warmup()
 
-    # 1) Cas lien Spotify copie-collé
-    artist_id = _parse_spotify_artist_id_from_query(query)
-    if artist_id:
-        try:
-            return sp.artist(artist_id)
-        except Exception:
-            return None
+def make_track_label(track: dict) -> str:
+    """Label raccourci 'Titre – Album' pour les dropdowns (+ rangs par marché si plusieurs)."""
+    name = track.get("name", "Sans titre")
+    album = track.get("album", {}).get("name", "")
 
-    # 2) Cas recherche par nom
-    try:
-        res = sp.search(q=query, type="artist", limit=10)
-        items = res.get("artists", {}).get("items", [])
-    except Exception:
-        return None
+    max_len_album = 25
+    if album and len(album) > max_len_album:
+        album = album[:max_len_album - 3] + "..."
 
-    if not items:
-        return None
+    label = f"{name} – {album}" if album else name
+    if len(selected_markets) > 1 and track.get("market_ranks"):
+        label += f"  ({format_markets(track)})"
+    return label
 
-    q_norm = _norm_text(query)
-
-    # a) Nom exact
-    exact_matches = [
-        a for a in items
-        if _norm_text(a.get("name", "")) == q_norm
-    ]
-    if exact_matches:
-        # s'il y en a plusieurs, on prend le plus populaire
-        return sorted(exact_matches, key=lambda a: a.get("popularity", 0), reverse=True)[0]
-
-    # b) Nom qui commence par la requête normalisée
-    startswith_matches = [
-        a for a in items
-        if _norm_text(a.get("name", "")).startswith(q_norm)
-    ]
-    if startswith_matches:
-        return sorted(startswith_matches, key=lambda a: a.get("popularity", 0), reverse=True)[0]
-
-    # c) Nom qui contient la requête normalisée
-    contains_matches = [
-        a for a in items
-        if q_norm in _norm_text(a.get("name", ""))
-    ]
-    if contains_matches:
-        return sorted(contains_matches, key=lambda a: a.get("popularity", 0), reverse=True)[0]
-
-    # d) Fallback : prendre le plus populaire parmi les résultats
-    return sorted(items, key=lambda a: a.get("popularity", 0), reverse=True)[0]
-
-
-def _clean_track_title_for_lyrics(title: str) -> str:
-    """
-    Nettoie un titre pour les requêtes paroles :
-    - enlève les parenthèses (Radio Edit, Remix…)
-    - coupe après un '-'
-    """
-    if not title:
-        return ""
-    t = re.sub(r"\(.*?\)", "", title)   # supprime (...) 
-    t = t.split(" - ")[0]               # coupe après " - "
-    return t.strip()
 
+def _snapshot_matches_markets(snapshot) -> bool:
+    """Le snapshot du refresher a-t-il été calculé pour les marchés sélectionnés ? (toujours hors-ligne)"""
+    if offline_bundle is not None:
+        return bool(snapshot)
+    return bool(snapshot) and tuple(snapshot.get("markets") or ("FR",)) == selected_markets
 
-def _clean_lyrics_text(txt: str) -> str:
-    """
-    Nettoie un texte de paroles brut (Genius) :
-    - enlève les blocs type 'Embed' à la fin
-    """
-    if not txt:
-        return ""
-    # beaucoup de paroles Genius finissent par '123Embed'
-    txt = re.split(r"\n?\d*\s*Embed$", txt)[0]
-    return txt.strip()
 
+def load_artist_history(artist_id: str) -> pd.DataFrame:
+    """Historique popularité / followers : store local, ou celui du bundle hors-ligne."""
+    if offline_bundle is not None:
+        return offline_bundle.history([artist_id])
+    return get_timeseries_store().query([artist_id])
 
-def get_any_lyrics(artist_name: str, track_title: str):
-    """
-    Essaie de récupérer des paroles pour (artiste, titre) via lyrics.ovh uniquement.
-    Retourne un string (paroles) ou None.
-    """
-    clean_title = _clean_track_title_for_lyrics(track_title)
-    st.write("DEBUG LYRICS — artiste:", artist_name, "| titre clean:", clean_title)
-
-    def fetch(a, t, label=""):
-        url = f"https://api.lyrics.ovh/v1/{quote(a)}/{quote(t)}"
-        st.write(f"DEBUG LYRICS — appel lyrics.ovh {label} :", url)
-        resp = requests.get(url, timeout=10)
-        st.write("DEBUG LYRICS — status code lyrics.ovh :", resp.status_code)
-        if resp.status_code == 200:
-            data = resp.json()
-            txt = data.get("lyrics")
-            if txt and "No lyrics found" not in txt:
-                txt = txt.strip()
-                st.write("DEBUG LYRICS — longueur paroles lyrics.ovh :", len(txt))
-                return txt
-            else:
-                st.write("DEBUG LYRICS — lyrics.ovh a répondu mais sans paroles utiles.")
-        else:
-            st.write("DEBUG LYRICS — lyrics.ovh non OK, body:", resp.text[:200])
-        return None
 
-    # 1) artiste complet
-    txt = fetch(artist_name, clean_title, label="[artist, title]")
-    if txt:
-        return txt
+def load_top_tracks(artist_id: str, snapshot=None) -> list:
+    """Top titres fusionnés sur les marchés sélectionnés (snapshot s'il correspond)."""
+    if _snapshot_matches_markets(snapshot):
+        return snapshot["top_tracks"]
+    return get_top_tracks_multi(artist_id, selected_markets)
 
-    # 2) dernier mot du nom d’artiste (ex : "Stromae", "Laylow")
-    short_artist = artist_name.split()[-1]
-    txt = fetch(short_artist, clean_title, label="[short artist, title]")
-    if txt:
-        return txt
 
-    st.write("DEBUG LYRICS — aucune source n’a retourné de paroles.")
-    return None
+def load_albums(artist_id: str, snapshot=None) -> list:
+    """Sorties fusionnées sur les marchés sélectionnés (snapshot s'il correspond)."""
+    if _snapshot_matches_markets(snapshot):
+        return snapshot["albums"]
+    return get_albums_multi(artist_id, selected_markets)
 
-def get_itunes_preview_for_track(artist_name: str, track_title: str):
-    """
-    Récupère un preview iTunes (30s) pour un titre donné.
-    Retourne dict {title, artist, preview_url, cover} ou None.
-    """
-    try:
-        term = f"{artist_name} {track_title}"
-        params = {
-            "term": term,
-            "media": "music",
-            "entity": "song",
-            "limit": 5
-        }
-        resp = requests.get("https://itunes.apple.com/search", params=params)
-        data_it = resp.json()
-        if data_it.get("resultCount", 0) == 0:
-            return None
-
-        def norm(s):
-            return re.sub(r"[^a-z0-9]", "", s.lower())
-
-        n_artist = norm(artist_name)
-        n_title = norm(track_title)
-
-        best = None
-        for item in data_it["results"]:
-            a_ok = n_artist in norm(item.get("artistName", ""))
-            t_ok = n_title in norm(item.get("trackName", ""))
-            if a_ok and t_ok:
-                best = item
-                break
-        if best is None:
-            best = data_it["results"][0]
-
-        return {
-            "title": best.get("trackName"),
-            "artist": best.get("artistName"),
-            "preview_url": best.get("previewUrl"),
-            "cover": best.get("artworkUrl100")
-        }
-    except Exception:
-        return None
 
-LASTFM_ROOT = "https://ws.audioscrobbler.com/2.0/"
+# =========================================================
+# UI GLOBALE : TITRE + BARRE LATERALE
+# =========================================================
 
+st.title("📊 Artist Performance & Strategy Dashboard")
+st.caption("Prototype data x musique – audit, analyse produit, benchmark et tendances marché.")
 
-def get_lastfm_artist_tags(artist_name: str, limit: int = 20):
-    """
-    Récupère les top tags Last.fm pour un artiste donné.
-    Retourne une liste de dicts [{'name': ..., 'count': ...}, ...]
-    ou une liste vide si rien.
-    """
-    try:
-        params = {
-            "method": "artist.getTopTags",
-            "artist": artist_name,
-            "api_key": LASTFM_KEY,
-            "format": "json",
-            "autocorrect": 1,
-        }
-        resp = requests.get(LASTFM_ROOT, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        tags = data.get("toptags", {}).get("tag", [])
-
-        if not tags:
-            return []
-
-        # Last.fm renvoie parfois un dict quand il n'y a qu'un tag
-        if isinstance(tags, dict):
-            tags = [tags]
-
-        # Trier par count décroissant et limiter
-        tags_sorted = sorted(
-            tags,
-            key=lambda t: int(t.get("count", 0)),
-            reverse=True
-        )
-        return tags_sorted[:limit]
+PAGES = [
+    "1. Audit artiste",
+    "2. Labo d'analyse (son + texte)",
+    "3. Comparateur & contexte",
+    "4. Prédicteur de tendance",
+]
 
-    except Exception:
-        return []
+st.sidebar.header("Navigation")
+page = st.sidebar.radio("Aller à :", PAGES)
+rerun_trace.label = page
+
+# Marchés Spotify : top titres + sorties récupérés en parallèle puis fusionnés (radar.markets)
+selected_markets = tuple(st.sidebar.multiselect(
+    "🌍 Marchés",
+    options=list(dict.fromkeys([*default_markets(), *MARKET_LABELS])),
+    default=list(default_markets()),
+    format_func=lambda m: f"{m} – {MARKET_LABELS.get(m, m)}",
+    key="markets",
+)) or default_markets()
+
+show_perf_panel = st.sidebar.toggle("⏱️ Performance", value=False, key="show_perf_panel")
+
+if refresher.entries:
+    refresher_status = refresher.status()
+    st.sidebar.caption(
+        f"🔄 Watchlist : {refresher_status['watchlist']} artistes – "
+        f"{refresher_status['queued']} en file, {len(refresher_status['in_progress'])} en cours, "
+        f"{len(refresher_status['errors'])} en erreur."
+    )
+
+if offline_bundle is not None:
+    st.sidebar.info(
+        f"📦 Mode hors-ligne : {os.path.basename(offline_bundle.path)} – "
+        f"{len(offline_bundle)} artiste(s), aucun appel API."
+    )
+    st.sidebar.caption(" · ".join(a["name"] for a in offline_bundle.artists()))
+
+if not warmup_status.done.is_set():
+    st.sidebar.caption(
+        f"🔥 Préchauffage du serveur : {warmup_status.current or '…'} "
+        f"({len(warmup_status.timings)}/{len(warmup_status.steps)} étapes)"
+    )
+
+degraded = degraded_providers()
+if degraded:
+    st.sidebar.warning(
+        f"⚠️ Service(s) indisponible(s) : {', '.join(degraded)}. "
+        "Les dernières données connues sont affichées quand elles existent."
+    )
+
+# =========================================================
+# PROFILING À LA DEMANDE (admin)
+# =========================================================
+def tag_profile_capture(**tags):
+    """Ajoute des tags (artiste, titre...) à la capture de profiling en cours."""
+    capture = st.session_state.get("profile_capture")
+    if capture is not None:
+        capture.tags.update({k: v for k, v in tags.items() if v is not None})
 
 
-def get_lastfm_similar_artists(artist_name: str, limit: int = 10):
+def render_admin_profiler():
     """
-    Récupère des artistes similaires depuis Last.fm.
-    Retourne une liste de dicts [{'name': ..., 'match': ..., 'url': ...}, ...]
-    ou une liste vide si rien.
+    Admin : profiling par échantillonnage des N prochains reruns d'une page.
+    Visible seulement si RADAR_ADMIN_PASSWORD est configuré.
     """
-    try:
-        params = {
-            "method": "artist.getSimilar",
-            "artist": artist_name,
-            "api_key": LASTFM_KEY,
-            "format": "json",
-            "autocorrect": 1,
-            "limit": limit,
-        }
-        resp = requests.get(LASTFM_ROOT, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        similar = data.get("similarartists", {}).get("artist", [])
-
-        if not similar:
-            return []
+    admin_password = get_secret("RADAR_ADMIN_PASSWORD")
+    if not admin_password:
+        return
+    with st.sidebar.expander("🛠️ Admin"):
+        if st.text_input("Mot de passe admin", type="password", key="admin_password") != admin_password:
+            return
+
+        capture = st.session_state.get("profile_capture")
+        if capture is not None:
+            st.caption(f"Profiling en cours : {capture.page} – {capture.remaining} rerun(s) restant(s).")
+            if st.button("Annuler la capture", key="profile_cancel_btn"):
+                st.session_state.profile_capture = None
+        else:
+            target_page = st.selectbox("Page à profiler", PAGES, index=PAGES.index(page), key="profile_page")
+            n_reruns = st.number_input("Reruns", min_value=1, max_value=20, value=3, key="profile_reruns")
+            interval_ms = st.select_slider("Échantillonnage (ms)", options=[1, 2, 5, 10, 20], value=5,
+                                           key="profile_interval")
+            if st.button("Profiler les prochains reruns", key="profile_start_btn"):
+                st.session_state.profile_capture = ProfileCapture(
+                    target_page, reruns=int(n_reruns), interval=interval_ms / 1000
+                )
 
-        if isinstance(similar, dict):
-            similar = [similar]
+        for meta in list_profiles()[:5]:
+            tags = ", ".join(f"{k}={v}" for k, v in meta["tags"].items())
+            st.caption(f"{meta['page']} – {meta['reruns']} rerun(s), {meta['samples']} éch. {tags}")
+            for ext, mime in ((".collapsed", "text/plain"), (".pstats", "application/octet-stream")):
+                with open(meta["base"] + ext, "rb") as f:
+                    st.download_button(
+                        ext.lstrip("."),
+                        data=f.read(),
+                        file_name=os.path.basename(meta["base"]) + ext,
+                        mime=mime,
+                        key=f"dl_{meta['base']}{ext}",
+                    )
 
-        return similar[:limit]
 
-    except Exception:
-        return []
+render_admin_profiler()
 
 
 # =========================================================
-# UI GLOBALE : TITRE + BARRE LATERALE
+# EXPORT HORS-LIGNE (bundle partageable)
 # =========================================================
+def render_bundle_export():
+    """
+    Exporte un bundle radar.bundle (snapshots, waveforms, paroles analysées,
+    catalogue, historique) pour les artistes choisis, puis le propose en téléchargement.
+    Ouvrir le fichier : RADAR_OFFLINE_BUNDLE=chemin.radar au lancement.
+    """
+    if offline_bundle is not None:
+        return
+    choices = {e.artist_id: e.name or e.artist_id for e in refresher.entries.values()}
+    if st.session_state.artist_data:
+        choices.setdefault(st.session_state.artist_data["id"], st.session_state.artist_data["name"])
+    if not choices:
+        return
+    with st.sidebar.expander("📦 Export hors-ligne"):
+        artist_ids = st.multiselect(
+            "Artistes", options=list(choices), default=list(choices),
+            format_func=choices.get, key="bundle_artists",
+        )
+        name = st.text_input("Nom du fichier", value="roster", key="bundle_name").strip() or "roster"
+        if st.button("Exporter", key="bundle_export_btn", disabled=not artist_ids):
+            path = os.path.join(bundles_dir(), name + BUNDLE_EXT)
+            bar = st.progress(0.0)
+            report = export_bundle(
+                artist_ids, path, progress=lambda done, total: bar.progress(done / total),
+            )
+            st.session_state.bundle_report = report
+        report = st.session_state.get("bundle_report")
+        if report and os.path.exists(report["path"]):
+            st.caption(
+                f"{report['artists']} artiste(s), {report['bytes'] / 1e6:.1f} Mo, "
+                f"{report['seconds']:.0f} s."
+                + (f" Sans snapshot : {len(report['skipped'])}." if report["skipped"] else "")
+            )
+            with open(report["path"], "rb") as f:
+                st.download_button(
+                    "Télécharger", data=f.read(), file_name=os.path.basename(report["path"]),
+                    mime="application/octet-stream", key="bundle_download",
+                )
 
-st.title("📊 Artist Performance & Strategy Dashboard")
-st.caption("Prototype data x musique – audit, analyse produit, benchmark et tendances marché.")
 
-st.sidebar.header("Navigation")
-page = st.sidebar.radio(
-    "Aller à :",
-    [
-        "1. Audit artiste",
-        "2. Labo d'analyse (son + texte)",
-        "3. Comparateur & contexte",
-        "4. Prédicteur de tendance"
-    ]
-)
+render_bundle_export()
+
+# Capture active sur cette page : l'échantillonnage couvre le rendu de la page
+profile_capture = st.session_state.get("profile_capture")
+if profile_capture is not None and profile_capture.page == page:
+    if st.session_state.artist_data:
+        tag_profile_capture(artist=st.session_state.artist_data["name"])
+    profile_capture.begin()
+else:
+    profile_capture = None
 
 # =========================================================
 # BARRE DE RECHERCHE ARTISTE (partagée entre pages)
@@ -620,7 +451,10 @@ with col_btn:
     load_artist = st.button("Charger l'artiste")
 
 if load_artist and query:
-    artist = search_best_artist(query)
+    if offline_bundle is not None:
+        artist = offline_bundle.search(query)
+    else:
+        artist = search_best_artist(query)
     if artist is None:
         st.warning("Aucun artiste pertinent trouvé pour cette requête.")
         st.session_state.artist_loaded = False
@@ -636,6 +470,17 @@ if load_artist and query:
             "url": artist["external_urls"]["spotify"]
         }
         st.session_state.artist_loaded = True
+        # Historique popularité / followers (store local append-only)
+        if offline_bundle is None:
+            try:
+                record_artist_snapshot(artist)
+            except OSError:
+                pass
+        # Artiste du roster avec snapshot périmé : rafraîchissement prioritaire
+        if offline_bundle is None and artist["id"] in refresher.entries and load_artist_snapshot(
+            artist["id"], max_age_s=SNAPSHOT_MAX_AGE_S
+        ) is None:
+            refresher.request_refresh(artist["id"], priority=0)
 
 # =========================================================
 # FONCTIONS DE RENDU PAR PAGE
@@ -657,6 +502,9 @@ def render_page_audit():
 
     data = st.session_state.artist_data
 
+    # Snapshot précalculé par le refresher de fond (artistes de la watchlist)
+    snapshot = load_artist_snapshot(data["id"], max_age_s=SNAPSHOT_MAX_AGE_S)
+
     st.markdown("### 📄 PAGE 1 – L'AUDIT ARTISTE")
     st.caption("Radiographie de la santé de carrière à l'instant T.")
 
@@ -693,39 +541,36 @@ def render_page_audit():
         "le volume de streams et l’engagement dans Spotify."
     )
 
+    # Courbe de croissance si on a déjà plusieurs snapshots de l'artiste
+    df_hist = load_artist_history(data["id"])
+    if len(df_hist) >= 2:
+        with st.expander("Évolution popularité / followers (historique local)"), span("chart.history"):
+            fig_hist = go.Figure()
+            fig_hist.add_trace(go.Scatter(
+                x=df_hist["date"], y=df_hist["followers"], name="Followers", mode="lines+markers"
+            ))
+            fig_hist.add_trace(go.Scatter(
+                x=df_hist["date"], y=df_hist["popularity"], name="Popularité",
+                mode="lines+markers", yaxis="y2"
+            ))
+            fig_hist.update_layout(
+                height=260,
+                margin=dict(l=0, r=0, t=30, b=0),
+                yaxis=dict(title="Followers"),
+                yaxis2=dict(title="Popularité", overlaying="y", side="right", range=[0, 100]),
+            )
+            st.plotly_chart(fig_hist, use_container_width=True)
+
     # --- 1.2 TIMELINE DE CONSISTANCE (LE GRIND) ------------------------------
     st.markdown("#### 1.2 Timeline de consistance (le grind)")
 
     # Récupération des sorties (albums + singles)
-    try:
-        albums = sp.artist_albums(
-            data["id"],
-            album_type="single,album",
-            limit=50,
-            country="FR"
-        )
-    except Exception:
-        albums = {"items": []}
-
-    dates, titles, types, total_tracks_list = [], [], [], []
-
-    for item in albums.get("items", []):
-        release_date = item.get("release_date")
-        if release_date:
-            dates.append(release_date)
-            titles.append(item.get("name", "Sans titre"))
-            album_type = item.get("album_type", "other")  # "album" / "single"
-            types.append(album_type)
-            total_tracks_list.append(item.get("total_tracks", 1) or 1)
-
-    if dates:
-        df_timeline = pd.DataFrame({
-            "Date": pd.to_datetime(dates),
-            "Titre": titles,
-            "Type": types,
-            "Nb_pistes": total_tracks_list,
-        }).sort_values("Date")
+    album_items = load_albums(data["id"], snapshot)
+
+    with span("audit.timeline", items=len(album_items)):
+        df_timeline = build_release_timeline(album_items)
 
+    if not df_timeline.empty:
         # Scatter 1D : y=1, coloré par type (album / single)
         fig = px.scatter(
             df_timeline,
@@ -733,6 +578,7 @@ def render_page_audit():
             y=[1] * len(df_timeline),
             color="Type",
             hover_name="Titre",
+            hover_data={"Marchés": len(selected_markets) > 1},
             labels={"y": ""}
         )
         fig.update_yaxes(visible=False)
@@ -755,64 +601,47 @@ def render_page_audit():
 
         st.plotly_chart(fig, use_container_width=True)
 
+        if len(selected_markets) > 1:
+            n_markets = df_timeline["Marchés"].str.count("·") + 1
+            partial = df_timeline[n_markets < len(selected_markets)]
+            st.caption(
+                f"🌍 Sorties fusionnées sur {', '.join(selected_markets)} : "
+                f"{len(df_timeline) - len(partial)} disponibles partout, "
+                f"{len(partial)} sur une partie des marchés seulement"
+                + (f" (ex : {partial.iloc[-1]['Titre']} – {partial.iloc[-1]['Marchés']})." if len(partial) else ".")
+            )
+
         # Stats sur les objets de sortie
-        nb_singles = (df_timeline["Type"] == "single").sum()
-        nb_albums = (df_timeline["Type"] == "album").sum()
-        total_tracks = int(df_timeline["Nb_pistes"].sum())
+        cadence = release_cadence(df_timeline)
 
         c_obj1, c_obj2, c_obj3 = st.columns(3)
-        c_obj1.metric("Singles recensés", nb_singles)
-        c_obj2.metric("Albums recensés", nb_albums)
-        c_obj3.metric("Titres estimés (pistes d'albums + singles)", total_tracks)
+        c_obj1.metric("Singles recensés", cadence["nb_singles"])
+        c_obj2.metric("Albums recensés", cadence["nb_albums"])
+        c_obj3.metric("Titres estimés (pistes d'albums + singles)", cadence["total_tracks"])
 
         # --- RYTHME MOYEN DE SORTIE ------------------------------------------
-        df_sorted = df_timeline.sort_values("Date").copy()
-        df_sorted["delta_days"] = df_sorted["Date"].diff().dt.days
-        deltas = df_sorted["delta_days"].dropna()
-
-        if not deltas.empty and (deltas > 0).any():
-            # On enlève les éventuels 0 jours (sorties le même jour)
-            deltas_pos = deltas[deltas > 0]
-
-            if deltas_pos.empty:
-                st.caption(
-                    "Rythme moyen de sortie : toutes les sorties sont le même jour "
-                    "(compilations, rééditions ou dataset limité)."
+        if cadence["median_gap"] is not None:
+            c_gap1, c_gap2, c_gap3 = st.columns(3)
+            c_gap1.metric(
+                "Rythme moyen de sortie",
+                f"1 sortie tous les ~{cadence['days_per_release']} jours"
+            )
+            if cadence["releases_per_year"]:
+                c_gap2.metric(
+                    "Sorties estimées / an",
+                    f"{cadence['releases_per_year']:.1f}"
                 )
-            else:
-                median_gap = float(deltas_pos.median())
-                mean_gap = float(deltas_pos.mean())
-
-                jours_par_sortie = int(round(median_gap))
-                sorties_par_an = 365.0 / median_gap if median_gap > 0 else None
-
-                # Période couverte
-                date_min = df_sorted["Date"].min()
-                date_max = df_sorted["Date"].max()
-                nb_days_range = (date_max - date_min).days or 1
-                nb_years_range = nb_days_range / 365.0
-                tracks_per_year = total_tracks / nb_years_range if nb_years_range > 0 else None
-
-                c_gap1, c_gap2, c_gap3 = st.columns(3)
-                c_gap1.metric(
-                    "Rythme moyen de sortie",
-                    f"1 sortie tous les ~{jours_par_sortie} jours"
+            if cadence["tracks_per_year"]:
+                c_gap3.metric(
+                    "Titres estimés / an",
+                    f"{cadence['tracks_per_year']:.1f}"
                 )
-                if sorties_par_an:
-                    c_gap2.metric(
-                        "Sorties estimées / an",
-                        f"{sorties_par_an:.1f}"
-                    )
-                if tracks_per_year:
-                    c_gap3.metric(
-                        "Titres estimés / an",
-                        f"{tracks_per_year:.1f}"
-                    )
 
-                st.caption(
-                    f"(Médiane des intervalles entre sorties : {median_gap:.1f} jours ; "
-                    f"moyenne : {mean_gap:.1f} jours ; période analysée ~{nb_years_range:.1f} ans.)"
-                )
+            st.caption(
+                f"(Médiane des intervalles entre sorties : {cadence['median_gap']:.1f} jours ; "
+                f"moyenne : {cadence['mean_gap']:.1f} jours ; "
+                f"période analysée ~{cadence['years_range']:.1f} ans.)"
+            )
         else:
             st.caption(
                 "Rythme moyen de sortie non calculable (trop peu de sorties ou dates identiques)."
@@ -827,8 +656,14 @@ def render_page_audit():
     artist_name = data["name"]
 
     # Récupération Last.fm
-    tags = get_lastfm_artist_tags(artist_name, limit=15)
-    similar = get_lastfm_similar_artists(artist_name, limit=8)
+    if snapshot:
+        tags = snapshot["tags"]
+        similar = snapshot["similar"]
+    else:
+        tags = get_lastfm_artist_tags(artist_name, limit=15)
+        similar = get_lastfm_similar_artists(artist_name, limit=8)
+        # Snapshot : tags déjà indexés par le refresher
+        record_artist_tags(artist_name, tags)
 
     if not tags and not similar:
         st.info(
@@ -867,6 +702,7 @@ def render_page_audit():
                 df_tags.sort_values("Poids", ascending=False)["Tag"].head(5)
             )
             st.caption(f"🧠 Comment le public le catégorise : {top_labels}")
+            render_tag_neighbours(artist_name)
         else:
             st.info("Aucun tag significatif trouvé pour cet artiste sur Last.fm.")
 
@@ -875,7 +711,10 @@ def render_page_audit():
         st.markdown("**Artistes similaires (voisinage Last.fm x Spotify)**")
 
         if similar:
-            df_sim = enrich_similar_with_spotify(similar)
+            if snapshot:
+                df_sim = pd.DataFrame(snapshot["similar_enriched"])
+            else:
+                df_sim = enrich_similar_with_spotify(data["id"], similar)
 
             if df_sim.empty:
                 st.info("Pas assez de données pour enrichir les artistes similaires.")
@@ -928,91 +767,163 @@ def render_page_audit():
         "et aux genres Spotify affichés plus haut ?"
     )
 
-# -----------------------------------
-# PAGE 2 : LE LABO D'ANALYSE (PRODUIT)
-# -----------------------------------
-def render_page_labo():
+    with st.expander("🕸️ Écosystème élargi (voisins à 2-3 sauts)"):
+        render_similarity_ecosystem(artist_name)
+
+
+def render_tag_neighbours(artist_name: str):
     """
-    PAGE 2 – Analyse du produit (son + texte)
-    2.1 Physique du signal (ADN sonore)
-    2.2 Analyse sémantique (paroles)
-    2.3 Score de dissonance (audio vs texte)
-    2.4 Synthèse & pistes d'action
+    Artistes déjà vus (app, refresher) au profil de tags Last.fm le plus proche :
+    similarité de perception, calculée hors-ligne sur radar.tag_index.
     """
-    if not st.session_state.artist_loaded:
-        st.info("Charge d’abord un·e artiste pour accéder au labo.")
+    index = get_tag_index()
+    roster = [e.name for e in load_watchlist()[0] if e.name]
+    with span("tags.neighbours", artists=len(index)):
+        df_roster = index.similar_to(artist_name, k=5, among=roster) if roster else pd.DataFrame()
+        df_all = index.similar_to(artist_name, k=10)
+    if df_all.empty:
         return
+    labels = {"artist": "Artiste", "similarity": "Cosinus tags", "shared_tags": "Tags communs"}
+    with st.expander(f"🏷️ Profils de tags les plus proches ({len(index)} artistes indexés)"):
+        if not df_roster.empty:
+            st.markdown("**Roster**")
+            st.dataframe(df_roster.rename(columns=labels), use_container_width=True, hide_index=True)
+        st.markdown("**Tous les artistes vus**")
+        st.dataframe(df_all.rename(columns=labels), use_container_width=True, hide_index=True)
 
-    data = st.session_state.artist_data
-    artist_name = data["name"]
-
-    st.markdown("### 📄 PAGE 2 – LE LABO D'ANALYSE")
-    st.caption("Analyse audio & sémantique – pas pour juger, pour comprendre le produit.")
 
-    # -------------------------------------------------
-    # 2.0 – Sélection d'un titre (toujours via Spotify)
-    # -------------------------------------------------
-    try:
-        top_resp = sp.artist_top_tracks(data["id"], country="FR")
-        tracks_raw = top_resp.get("tracks", [])
-    except Exception:
-        tracks_raw = []
-
-    # On garde les titres où l'artiste principal est bien celui sélectionné
-    tracks = [
-        t for t in tracks_raw
-        if any(a.get("id") == data["id"] for a in t.get("artists", []))
-    ] or tracks_raw
-
-    if not tracks:
-        st.warning("Aucun titre exploitable trouvé pour cet artiste.")
+def render_similarity_ecosystem(artist_name: str):
+    """
+    1.3 bis – Graphe de similarité Last.fm à plusieurs sauts (radar.similarity_graph) :
+    artistes centraux, communautés, chemins vers des artistes cibles.
+    """
+    c1, c2, c3 = st.columns(3)
+    hops = c1.slider("Sauts", 1, 3, 2, key="eco_hops")
+    max_nodes = c2.slider("Budget d'artistes", 50, 1000, 500, step=50, key="eco_max_nodes")
+    show_nodes = c3.slider("Artistes affichés", 20, 150, 80, step=10, key="eco_show_nodes")
+
+    watchlist_names = [e.name for e in load_watchlist()[0] if e.name]
+    targets_raw = st.text_input(
+        "Artistes cibles (séparés par des virgules)",
+        value=", ".join(watchlist_names[:10]),
+        key="eco_targets",
+        help="Featurings visés, artistes du roster… : plus court chemin depuis l'artiste analysé.",
+    )
+    targets = [t.strip() for t in targets_raw.split(",") if t.strip()]
+
+    graph_key = (artist_name, hops, max_nodes)
+    cached = st.session_state.get("eco_graph")
+    if cached is None or cached["key"] != graph_key:
+        if not st.button("🕸️ Explorer l'écosystème", key="eco_crawl"):
+            stats = get_similarity_store().stats()
+            st.caption(f"Store local : {stats['crawled']} artistes explorés, {stats['edges']} liens "
+                       "(réutilisés d'un artiste à l'autre).")
+            return
+        progress_bar = st.progress(0.0, text="Exploration du voisinage Last.fm…")
+
+        def report(level, total):
+            progress_bar.progress(level / total, text=f"Niveau {level}/{total} exploré")
+
+        with st.spinner("Construction du graphe…"):
+            graph = crawl_similarity_graph(artist_name, hops=hops, max_nodes=max_nodes, progress=report)
+            cached = {"key": graph_key, "graph": graph, "metrics": graph_metrics(graph)}
+        progress_bar.empty()
+        st.session_state.eco_graph = cached
+
+    graph, metrics = cached["graph"], cached["metrics"]
+    if len(graph) < 2:
+        st.info("Last.fm ne renvoie aucun voisin pour cet artiste.")
         return
 
-    # Labels raccourcis pour le dropdown
-    def make_track_label(i: int) -> str:
-        t = tracks[i]
-        name = t.get("name", "Sans titre")
-        album = t.get("album", {}).get("name", "")
-
-        max_len_album = 25
-        if album and len(album) > max_len_album:
-            album = album[:max_len_album - 3] + "..."
-
-        return f"{name} – {album}" if album else name
-
-    options = list(range(len(tracks)))
-
-    selected_index = st.selectbox(
-        "Choisis un titre à analyser",
-        options=options,
-        format_func=make_track_label,
-        key="labo_track_select"
-    )
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Artistes", len(graph))
+    m2.metric("Liens", graph.stats["edges"])
+    m3.metric("Communautés", int(metrics["community"].nunique()))
+    m4.metric("Appels Last.fm", graph.stats["fetched"], help="Artistes absents ou périmés dans le store local.")
+
+    paths = shortest_paths(graph, targets) if targets else pd.DataFrame()
+    on_path = []
+    for path in paths.get("path", pd.Series(dtype=object)).dropna():
+        on_path.extend(path.split(" → "))
+
+    with span("chart.similarity_graph", nodes=len(graph), shown=show_nodes):
+        nodes, edges = render_subgraph(graph, metrics, keep=on_path, max_nodes=show_nodes)
+        edge_x, edge_y = [], []
+        for a, b, _ in edges:
+            edge_x += [nodes.at[a, "x"], nodes.at[b, "x"], None]
+            edge_y += [nodes.at[a, "y"], nodes.at[b, "y"], None]
+        fig_graph = go.Figure()
+        fig_graph.add_trace(go.Scatter(
+            x=edge_x, y=edge_y, mode="lines", hoverinfo="skip",
+            line=dict(width=0.5, color="rgba(150,150,150,0.5)"), showlegend=False,
+        ))
+        fig_graph.add_trace(go.Scatter(
+            x=nodes["x"], y=nodes["y"], mode="markers+text",
+            text=nodes["artist"], textposition="top center", textfont=dict(size=9),
+            marker=dict(
+                size=8 + 40 * np.sqrt(nodes["pagerank"] / nodes["pagerank"].max()),
+                color=nodes["community"], colorscale="Turbo", line=dict(width=0.5, color="white"),
+            ),
+            customdata=nodes[["depth", "cited_by", "community"]],
+            hovertemplate="%{text}<br>%{customdata[0]} saut(s) · cité par %{customdata[1]}"
+                          "<br>Communauté %{customdata[2]}<extra></extra>",
+            showlegend=False,
+        ))
+        fig_graph.update_layout(
+            title=f"Écosystème de {artist_name} ({len(nodes)} artistes les plus centraux sur {len(graph)})",
+            height=600,
+            margin=dict(l=0, r=0, t=40, b=0),
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+        )
+        st.plotly_chart(fig_graph, use_container_width=True)
+
+    col_central, col_paths = st.columns(2)
+    with col_central:
+        st.markdown("**Artistes centraux (hors voisins directs)**")
+        central = metrics[metrics["depth"] >= 2].nlargest(15, "pagerank")
+        st.dataframe(
+            central[["artist", "depth", "cited_by", "community"]].rename(columns={
+                "artist": "Artiste", "depth": "Sauts", "cited_by": "Cité par", "community": "Communauté",
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption("Cibles de featuring / lookalike : artistes au cœur du voisinage sans être des voisins directs.")
+    with col_paths:
+        st.markdown("**Chemins vers les artistes cibles**")
+        if paths.empty:
+            st.caption("Renseigne des artistes cibles ci-dessus.")
+        else:
+            st.dataframe(
+                paths.rename(columns={"target": "Cible", "hops": "Sauts", "path": "Chemin",
+                                      "strength": "Similarité moyenne"}),
+                use_container_width=True,
+                hide_index=True,
+            )
+            st.caption("Sauts vides : cible hors du graphe exploré (augmenter les sauts ou le budget).")
 
-    track = tracks[selected_index]
-    track_title = track["name"]
+# -----------------------------------
+# PAGE 2 : LE LABO D'ANALYSE (PRODUIT)
+# -----------------------------------
+@st.cache_resource
+def labo_executor():
+    """Pool partagé des tâches de fond du Labo (audio + paroles)."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="radar-labo")
 
-    st.divider()
 
-    # Variables pour la synthèse finale
-    audio_mood = None
-    tempo = None
-    avg_energy = None
-    avg_centroid = None
-    dynamic_range = None
-    text_polarity = None
-    subjectivity = None
-    vocab_size = None
-    detected_lang = "unknown"
-    analyzed_text = None
-    lyrics_text = None
+@st.cache_resource
+def catalogue_executor():
+    """
+    Pool dédié aux constructions de catalogue (jusqu'à CATALOGUE_MAX_TRACKS titres,
+    recherches iTunes bridées) : elles ne bloquent pas les jobs interactifs du Labo.
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="radar-catalogue")
 
-    # -------------------------------------------------
-    # 2.1 Physique du signal (ADN sonore)
-    # -------------------------------------------------
-    st.markdown("#### 2.1 Physique du signal (ADN sonore)")
 
-    itunes_data = get_itunes_preview_for_track(artist_name, track_title)
+def render_labo_audio(track: dict, track_title: str, audio: dict):
+    """2.1 – Rendu de la section audio. Retourne le dict d'analyse (ou None)."""
+    itunes_data = audio["itunes"]
 
     info_col1, info_col2 = st.columns([1, 3])
     with info_col1:
@@ -1029,130 +940,179 @@ def render_page_labo():
         elif track.get("preview_url"):
             st.audio(track["preview_url"])
 
-    if itunes_data and itunes_data.get("preview_url"):
-        try:
-            resp = requests.get(itunes_data["preview_url"])
-            tmp_name = "temp_preview.m4a"
-            with open(tmp_name, "wb") as f:
-                f.write(resp.content)
-
-            # 30 secondes max
-            y, sr = librosa.load(tmp_name, duration=30)
-            os.remove(tmp_name)
-
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            rms = librosa.feature.rms(y=y)[0]
-            spec_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-
-            avg_energy = float(np.mean(rms))
-            avg_centroid = float(np.mean(spec_centroid))
-            dynamic_range = float(np.max(rms) - np.min(rms))
-
-            # Proxy d'humeur audio (0-1) : tempo + brillance normalisés
-            tempo_norm = float(np.clip((tempo - 60) / (180 - 60), 0, 1))  # 60-180 bpm
-            bright_norm = float(np.clip((avg_centroid - 1000) / (6000 - 1000), 0, 1))
-            audio_mood = (tempo_norm + bright_norm) / 2
-
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("BPM (approx)", int(tempo))
-            c2.metric("Énergie moyenne (RMS)", round(avg_energy, 4))
-            c3.metric("Brillance moyenne", int(avg_centroid))
-            c4.metric("Dynamique", round(dynamic_range, 4))
-
-            # Interprétation textuelle
-            tempo_label, tempo_comment = classify_tempo(tempo)
-            energy_label, energy_comment = classify_energy(avg_energy)
-            bright_label, bright_comment = classify_brightness(avg_centroid)
-            dyn_label, dyn_comment = classify_dynamic(dynamic_range)
-
-            with st.expander("Lecture audio en clair"):
-                st.markdown(
-                    f"- **Tempo** : {tempo_label} – {tempo_comment}\n"
-                    f"- **Énergie** : {energy_label} – {energy_comment}\n"
-                    f"- **Brillance** : {bright_label} – {bright_comment}\n"
-                    f"- **Dynamique** : {dyn_label} – {dyn_comment}"
-                )
+    if not (itunes_data and itunes_data.get("preview_url")):
+        st.info("Aucun extrait iTunes 30s trouvé pour ce titre.")
+        return None
+    analysis = audio["analysis"]
+    if analysis is None:
+        st.warning("Impossible d’analyser le preview audio (problème réseau ou format).")
+        return None
 
-            # Waveform rapide
-            df_wave = pd.DataFrame({"Amplitude": y[::200]})
-            fig_wave = px.line(df_wave, y="Amplitude", title="Waveform (preview 30s)")
-            fig_wave.update_layout(height=200, showlegend=False)
-            st.plotly_chart(fig_wave, use_container_width=True)
+    tempo = analysis["tempo"]
+    avg_energy = analysis["avg_energy"]
+    avg_centroid = analysis["avg_centroid"]
+    dynamic_range = analysis["dynamic_range"]
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("BPM (approx)", int(tempo))
+    c2.metric("Énergie moyenne (RMS)", round(avg_energy, 4))
+    c3.metric("Brillance moyenne", int(avg_centroid))
+    c4.metric("Dynamique", round(dynamic_range, 4))
+
+    # Interprétation textuelle
+    tempo_label, tempo_comment = classify_tempo(tempo)
+    energy_label, energy_comment = classify_energy(avg_energy)
+    bright_label, bright_comment = classify_brightness(avg_centroid)
+    dyn_label, dyn_comment = classify_dynamic(dynamic_range)
+
+    with st.expander("Lecture audio en clair"):
+        st.markdown(
+            f"- **Tempo** : {tempo_label} – {tempo_comment}\n"
+            f"- **Énergie** : {energy_label} – {energy_comment}\n"
+            f"- **Brillance** : {bright_label} – {bright_comment}\n"
+            f"- **Dynamique** : {dyn_label} – {dyn_comment}"
+        )
 
-        except Exception:
-            st.warning("Impossible d’analyser le preview audio (problème réseau ou format).")
-    else:
-        st.info("Aucun extrait iTunes 30s trouvé pour ce titre.")
+    # Waveform rapide
+    waveform = audio["waveform"]
+    with span("chart.waveform", points=len(waveform)):
+        # float16 (mmap) dans un bundle hors-ligne
+        df_wave = pd.DataFrame({"Amplitude": np.asarray(waveform, dtype=float)})
+        fig_wave = px.line(df_wave, y="Amplitude", title="Waveform (preview 30s)")
+        fig_wave.update_layout(height=200, showlegend=False)
+        st.plotly_chart(fig_wave, use_container_width=True)
 
-    st.divider()
+    return analysis
 
-    # -------------------------------------------------
-    # 2.2 Analyse sémantique des paroles
-    # -------------------------------------------------
-    st.markdown("#### 2.2 Analyse sémantique des paroles")
 
-    # 1) Récupération des paroles
-    lyrics_text = get_any_lyrics(artist_name, track_title)
+def render_labo_lyrics(lyrics: dict, artist_name: str, track_title: str, track_key: str = None):
+    """
+    2.2 – Rendu de la section paroles. Retourne le dict analyze_lyrics (ou None).
+    Des paroles collées à la main sont analysées tout de suite et ne rejoignent le
+    corpus local (source "manual") qu'après confirmation explicite.
+    """
+    lyrics_text = lyrics["lyrics_text"]
+    text_analysis = lyrics["text"]
 
     if not lyrics_text:
         st.info("Paroles introuvables automatiquement. Tu peux les coller ci-dessous si tu veux une analyse.")
+        # Une zone de saisie par titre : les paroles d'un titre ne suivent pas le changement de titre
+        widget_key = f"manual_lyrics_{track_key or f'{artist_name}|{track_title}'}"
         manual = st.text_area(
             "Colle les paroles ici (optionnel) :",
-            key="manual_lyrics_input"
+            key=widget_key
         )
         if manual.strip():
             lyrics_text = manual.strip()
+            text_analysis = analyze_lyrics(lyrics_text)
+            if st.button(f"Enregistrer ces paroles pour « {track_title} »", key=f"{widget_key}_store"):
+                get_lyrics_corpus().store(artist_name, track_title, lyrics_text, source="manual")
+                st.success("Paroles ajoutées au corpus local.")
 
-    if lyrics_text:
-        # 2) Traduction éventuelle vers l'anglais (DeepL ou autre API)
-        analyzed_text, detected_lang = translate_to_english(lyrics_text)
-
-        # 3) Analyse sentiment sur la version anglaise (originale ou traduite)
-        blob = TextBlob(analyzed_text)
-        text_polarity = float(blob.sentiment.polarity)
-        subjectivity = float(blob.sentiment.subjectivity)
+    if not lyrics_text:
+        st.info("Aucune parole disponible pour l’instant.")
+        return None
 
-        # Richesse lexicale : calculée sur le texte original
-        tokens = re.findall(r"\b\w+\b", lyrics_text.lower())
-        vocab_size = len(set(tokens)) if tokens else 0
+    analyzed_text = text_analysis["analyzed_text"]
+    detected_lang = text_analysis["detected_lang"]
+    text_polarity = text_analysis["text_polarity"]
+    subjectivity = text_analysis["subjectivity"]
+    mtld = text_analysis["mtld"]
 
-        (mood_label, mood_comment,
-         subj_label, subj_comment,
-         rich_label, rich_comment) = interpret_lyrics_profile(
-            text_polarity, subjectivity, vocab_size
-        )
+    (mood_label, mood_comment,
+     subj_label, subj_comment,
+     rich_label, rich_comment) = interpret_lyrics_profile(
+        text_polarity, subjectivity, mtld
+    )
 
-        c1, c2, c3 = st.columns(3)
-        c1.metric("Polarité (-1 à 1)", round(text_polarity, 2))
-        c2.metric("Subjectivité", round(subjectivity, 2))
-        c3.metric("Richesse lexicale (vocabulaire unique)", vocab_size)
-
-        with st.expander("Lecture texte en clair"):
-            st.markdown(
-                f"- **Langue détectée / déclarée** : `{detected_lang}` (via API de traduction)\n"
-                f"- **Ton général** : {mood_label} – {mood_comment}\n"
-                f"- **Subjectivité** : {subj_label} – {subj_comment}\n"
-                f"- **Richesse lexicale** : {rich_label} – {rich_comment}\n"
-                f"- **Note** : l'analyse est faite sur une éventuelle traduction automatique vers l'anglais, "
-                "il peut y avoir des nuances perdues (ironie, jeu de mots, slang…)."
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Polarité (-1 à 1)", round(text_polarity, 2))
+    c2.metric("Subjectivité", round(subjectivity, 2))
+    c3.metric("Richesse lexicale (MTLD)", "–" if mtld is None else round(mtld, 1),
+              help=f"Diversité lexicale indépendante de la longueur ({text_analysis['vocab_size']} mots uniques).")
+    c4.metric("Répétition (lignes)", f"{text_analysis['repetition_ratio']:.0%}",
+              help="Part des lignes qui répètent une ligne déjà entendue (refrains, hooks).")
+
+    # Arc émotionnel : polarité par strophe + lignes individuelles
+    df_stanzas = text_analysis["stanzas"]
+    if len(df_stanzas) >= 2:
+        with span("chart.emotional_arc", stanzas=len(df_stanzas)):
+            df_lines = text_analysis["lines"].reset_index(drop=True)
+            fig_arc = go.Figure()
+            fig_arc.add_trace(go.Scatter(
+                x=df_lines["stanza"] + 1, y=df_lines["polarity"], mode="markers",
+                name="Lignes", hovertext=df_lines["line"], marker=dict(size=6, opacity=0.4),
+            ))
+            fig_arc.add_trace(go.Scatter(
+                x=df_stanzas["stanza"] + 1, y=df_stanzas["polarity"], mode="lines+markers",
+                name="Strophe (polarité)", line=dict(width=3),
+            ))
+            fig_arc.add_trace(go.Scatter(
+                x=df_stanzas["stanza"] + 1, y=df_stanzas["subjectivity"], mode="lines",
+                name="Strophe (subjectivité)", line=dict(dash="dot"),
+            ))
+            fig_arc.update_layout(
+                title="Arc émotionnel (par strophe)",
+                height=260,
+                margin=dict(l=0, r=0, t=40, b=0),
+                xaxis_title="Strophe",
+                yaxis=dict(range=[-1, 1], title="Score"),
             )
+            st.plotly_chart(fig_arc, use_container_width=True)
 
-        with st.expander("Voir un extrait des paroles originales analysées"):
-            st.text("\n".join(lyrics_text.split("\n")[:15]))
+    rhyme_txt = "–" if text_analysis["rhyme_density"] is None else f"{text_analysis['rhyme_density']:.0%}"
+    common_txt = "–" if text_analysis["common_word_share"] is None else f"{text_analysis['common_word_share']:.0%}"
+    hooks_txt = " / ".join(f"« {line} » (×{n})" for line, n in text_analysis["hooks"]) or "aucune ligne répétée"
 
-        if analyzed_text and analyzed_text != lyrics_text:
-            with st.expander("Voir un extrait du texte utilisé pour l'analyse (EN)"):
-                st.text("\n".join(analyzed_text.split("\n")[:15]))
+    translated = analyzed_text and analyzed_text != lyrics_text
+    if text_analysis["engine"] == "textblob" or translated:
+        engine_txt = "via API de traduction"
+        note_txt = ("l'analyse est faite sur une éventuelle traduction automatique vers l'anglais, "
+                    "il peut y avoir des nuances perdues (ironie, jeu de mots, slang…).")
     else:
-        st.info("Aucune parole disponible pour l’instant.")
+        engine_txt = "lexique local, sans traduction"
+        note_txt = ("score par lexique de mots (négations et intensifieurs pris en compte) : "
+                    "l'ironie, les jeux de mots et le slang peuvent échapper à l'analyse.")
+
+    with st.expander("Lecture texte en clair"):
+        st.markdown(
+            f"- **Langue détectée / déclarée** : `{detected_lang}` ({engine_txt})\n"
+            f"- **Ton général** : {mood_label} – {mood_comment}\n"
+            f"- **Subjectivité** : {subj_label} – {subj_comment}\n"
+            f"- **Richesse lexicale** : {rich_label} – {rich_comment}\n"
+            f"- **Densité de rimes** : {rhyme_txt} des fins de ligne, "
+            f"**mots courants** : {common_txt} du vocabulaire\n"
+            f"- **Hook(s) repéré(s)** : {hooks_txt}\n"
+            f"- **Note** : {note_txt}"
+        )
 
-    st.divider()
+    with st.expander("Voir un extrait des paroles originales analysées"):
+        st.text("\n".join(lyrics_text.split("\n")[:15]))
+
+    if translated:
+        with st.expander("Voir un extrait du texte utilisé pour l'analyse (EN)"):
+            st.text("\n".join(analyzed_text.split("\n")[:15]))
+
+    return text_analysis
+
+
+def render_labo_synthesis(analysis, text_analysis, pending: list):
+    """2.3 + 2.4 – Dissonance et synthèse, recalculées à chaque résultat reçu."""
+    audio_mood = analysis["audio_mood"] if analysis else None
+    tempo = analysis["tempo"] if analysis else None
+    avg_energy = analysis["avg_energy"] if analysis else None
+    text_polarity = text_analysis["text_polarity"] if text_analysis else None
+    subjectivity = text_analysis["subjectivity"] if text_analysis else None
+    mtld = text_analysis["mtld"] if text_analysis else None
 
     # -------------------------------------------------
     # 2.3 Score de dissonance (audio vs texte)
     # -------------------------------------------------
     st.markdown("#### 2.3 Score de dissonance (audio vs texte)")
 
+    if pending:
+        st.caption(f"⏳ En attente : {', '.join(pending)}.")
+
     diss_score, diss_label, diss_comment = interpret_dissonance(audio_mood, text_polarity)
 
     if diss_score is None:
@@ -1183,7 +1143,7 @@ def render_page_labo():
     # Synthèse texte
     if text_polarity is not None:
         mood_label, _, subj_label, _, rich_label, _ = interpret_lyrics_profile(
-            text_polarity, subjectivity, vocab_size
+            text_polarity, subjectivity, mtld
         )
         bullets.append(
             f"- **Texte** : ton plutôt {mood_label.lower()}, "
@@ -1212,7 +1172,7 @@ def render_page_labo():
                 "- Énergie faible : si tu vises playlists dynamiques ou formats courts, "
                 "envisage de renforcer la batterie / la basse / la saturation."
             )
-        if vocab_size and vocab_size > 400:
+        if mtld and mtld > 80:
             suggestions.append(
                 "- Vocabulaire très riche : parfait pour un public qui écoute les textes, "
                 "mais pense à un hook simple pour ne pas perdre les gens."
@@ -1235,6 +1195,209 @@ def render_page_labo():
             "Synthèse impossible : il manque soit l'analyse audio, soit l'analyse texte."
         )
 
+
+def render_catalogue_dissonance(data: dict, snapshot):
+    """
+    2.5 – Heatmap sortie × piste de la dissonance son / texte + tendance par sortie,
+    depuis le store radar.catalogue (complété en tâche de fond à la demande).
+    """
+    artist_id = data["id"]
+    job = st.session_state.get("catalogue_job")
+    if job is not None and job["artist_id"] != artist_id:
+        job = None
+    running = job is not None and not job["future"].done()
+
+    c1, c2 = st.columns([3, 1])
+    if running:
+        done, total = job["progress"]["done"], job["progress"]["total"]
+        c1.caption(f"⏳ Analyse du catalogue en cours ({done}/{total if total is not None else '?'} titres)…")
+    elif c2.button("🔄 Compléter le catalogue", key="catalogue_build"):
+        progress = {"done": 0, "total": None}
+
+        def report(done, total):
+            progress.update(done=done, total=total)
+
+        future = catalogue_executor().submit(
+            propagate(build_catalogue), artist_id, data["name"], progress=report
+        )
+        st.session_state.catalogue_job = {"artist_id": artist_id, "future": future, "progress": progress}
+        running = True
+        c1.caption("⏳ Analyse du catalogue lancée en tâche de fond (priorité basse).")
+
+    df = dissonance_matrix(catalogue_frame(load_catalogue(artist_id), snapshot))
+    scored = df.dropna(subset=["dissonance"])
+    if scored.empty:
+        if not running:
+            st.info("Aucun titre du catalogue analysé pour l’instant : lance l’analyse ci-dessus "
+                    "(iTunes + paroles, titres déjà vus réutilisés).")
+        return
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Titres mesurés", f"{len(scored)} / {len(df)}")
+    m2.metric("Dissonance moyenne", round(float(scored["dissonance"].mean()), 2))
+    m3.metric("Titres en forte tension (> 0.4)", f"{(scored['dissonance'] > 0.4).mean():.0%}")
+
+    with span("chart.catalogue_heatmap", tracks=len(df)):
+        z, names, labels, numbers = heatmap_grid(df)
+        fig_heat = go.Figure(go.Heatmap(
+            z=z, x=numbers, y=labels, text=names, zmin=0, zmax=1,
+            colorscale="RdYlGn_r", colorbar=dict(title="Dissonance"),
+            hovertemplate="%{y}<br>Piste %{x} – %{text}<br>Dissonance %{z:.2f}<extra></extra>",
+        ))
+        fig_heat.update_layout(
+            title="Dissonance son / texte par sortie et par piste",
+            height=max(250, 28 * len(labels) + 100),
+            margin=dict(l=0, r=0, t=40, b=0),
+            xaxis_title="N° de piste",
+            yaxis=dict(autorange="reversed"),
+        )
+        st.plotly_chart(fig_heat, use_container_width=True)
+
+    trend = album_trend(df)
+    if len(trend) >= 2:
+        with span("chart.catalogue_trend", releases=len(trend)):
+            fig_trend = go.Figure()
+            fig_trend.add_trace(go.Scatter(
+                x=trend["release_date"], y=trend["dissonance"], mode="markers",
+                name="Sortie", text=trend["album"], marker=dict(size=6 + 2 * np.sqrt(trend["n_tracks"])),
+            ))
+            fig_trend.add_trace(go.Scatter(
+                x=trend["release_date"], y=trend["trend"], mode="lines", name="Tendance (3 sorties)",
+            ))
+            fig_trend.add_trace(go.Scatter(
+                x=trend["release_date"], y=trend["gap"], mode="lines", line=dict(dash="dot"),
+                name="Écart signé (son − texte)",
+            ))
+            fig_trend.update_layout(
+                title="Évolution de la dissonance dans le temps",
+                height=280,
+                margin=dict(l=0, r=0, t=40, b=0),
+                yaxis=dict(range=[-1, 1]),
+            )
+            st.plotly_chart(fig_trend, use_container_width=True)
+
+    mean_gap = float(scored["gap"].mean())
+    if scored["dissonance"].mean() > 0.4:
+        side = "un son plus lumineux que les textes" if mean_gap > 0 else "des textes plus lumineux que le son"
+        st.success(f"🎭 Tension son / texte récurrente ({side}) : c'est une signature du catalogue.")
+    else:
+        st.info("🎯 Son et texte vont globalement dans le même sens sur le catalogue.")
+
+
+def render_page_labo():
+    """
+    PAGE 2 – Analyse du produit (son + texte)
+    2.1 Physique du signal (ADN sonore)
+    2.2 Analyse sémantique (paroles)
+    2.3 Score de dissonance (audio vs texte)
+    2.4 Synthèse & pistes d'action
+    2.5 Dissonance sur tout le catalogue
+
+    2.1 et 2.2 tournent en tâche de fond (radar.labo) : chaque section
+    s'affiche dès que son résultat arrive, 2.3 / 2.4 se recalculent à chaque fois.
+    """
+    if not st.session_state.artist_loaded:
+        st.info("Charge d’abord un·e artiste pour accéder au labo.")
+        return
+
+    data = st.session_state.artist_data
+    artist_name = data["name"]
+    snapshot = load_artist_snapshot(data["id"], max_age_s=SNAPSHOT_MAX_AGE_S)
+
+    st.markdown("### 📄 PAGE 2 – LE LABO D'ANALYSE")
+    st.caption("Analyse audio & sémantique – pas pour juger, pour comprendre le produit.")
+
+    # -------------------------------------------------
+    # 2.0 – Sélection d'un titre (toujours via Spotify)
+    # -------------------------------------------------
+    tracks = load_top_tracks(data["id"], snapshot)
+
+    if not tracks:
+        st.warning("Aucun titre exploitable trouvé pour cet artiste.")
+        return
+
+    options = list(range(len(tracks)))
+
+    selected_index = st.selectbox(
+        "Choisis un titre à analyser",
+        options=options,
+        format_func=lambda i: make_track_label(tracks[i]),
+        key="labo_track_select"
+    )
+
+    track = tracks[selected_index]
+    track_title = track["name"]
+    tag_profile_capture(track=track_title)
+
+    # Tâches de fond du titre : réutilisées d'un rerun à l'autre,
+    # annulées si le titre (ou l'artiste) change
+    jobs_key = (data["id"], track.get("id") or track_title)
+    jobs = st.session_state.get("labo_jobs")
+    if jobs is None or jobs.key != jobs_key:
+        if jobs is not None:
+            jobs.cancel()
+        # Descripteurs précalculés si le titre est dans le snapshot de l'artiste
+        cached = (snapshot or {}).get("track_features", {}).get(track.get("id"))
+        jobs = LaboJobs(jobs_key, labo_executor(), artist_name, track, cached)
+        st.session_state.labo_jobs = jobs
+
+    st.divider()
+
+    st.markdown("#### 2.1 Physique du signal (ADN sonore)")
+    audio_slot = st.empty()
+    st.divider()
+    st.markdown("#### 2.2 Analyse sémantique des paroles")
+    lyrics_slot = st.empty()
+    st.divider()
+    synthesis_slot = st.empty()
+    st.divider()
+
+    # 2.5 ne lit que des descripteurs en cache : affiché avant la fin des tâches du titre
+    st.markdown("#### 2.5 Dissonance sur tout le catalogue")
+    render_catalogue_dissonance(data, snapshot)
+
+    slots = {"audio": audio_slot, "lyrics": lyrics_slot}
+    waiting_labels = {"audio": "analyse audio", "lyrics": "paroles"}
+    results = {"audio": None, "lyrics": None}
+    pending = dict(jobs.futures)
+    for name in pending:
+        slots[name].info(f"⏳ {waiting_labels[name].capitalize()} en cours...")
+
+    t0 = time.perf_counter()
+    while True:
+        for name, fut in list(pending.items()):
+            if not fut.done():
+                continue
+            del pending[name]
+            try:
+                payload = fut.result()
+            except Exception:
+                payload = None
+            with slots[name].container():
+                if name == "audio":
+                    if payload is None:
+                        st.warning("Impossible d’analyser le preview audio (problème réseau ou format).")
+                    else:
+                        results["audio"] = render_labo_audio(track, track_title, payload)
+                else:
+                    results["lyrics"] = render_labo_lyrics(
+                        payload or {"lyrics_text": None, "text": None}, artist_name, track_title,
+                        track_key=track.get("id"),
+                    )
+
+            with synthesis_slot.container():
+                render_labo_synthesis(
+                    results["audio"], results["lyrics"], [waiting_labels[n] for n in pending]
+                )
+
+        if not pending:
+            break
+        # Appel st.* régulier : laisse Streamlit interrompre le script si le titre change
+        wait(pending.values(), timeout=0.25, return_when=FIRST_COMPLETED)
+        for name in pending:
+            slots[name].info(f"⏳ {waiting_labels[name].capitalize()} en cours... "
+                             f"({time.perf_counter() - t0:.0f} s)")
+
 # -------------------------------------
 # PAGE 3 : LE COMPARATEUR (DATASET OFFLINE)
 # -------------------------------------
@@ -1307,6 +1470,7 @@ def render_page_comparateur():
     )
 
     my_row = results.loc[selected_idx]
+    tag_profile_capture(track=my_row[COL_TRACK])
 
     st.markdown(
         f"**Titre sélectionné :** {my_row[COL_TRACK]} – {my_row[COL_ARTIST]}  "
@@ -1476,51 +1640,452 @@ def render_page_comparateur():
 # --------------------------------------------
 # PAGE 4 : LE PRÉDICTEUR DE TENDANCE (SQUELETTE)
 # --------------------------------------------
+TIKTOK_CRITERIA_LABELS = {
+    "intro": "Intro courte",
+    "drop": "Drop rapide",
+    "duration": "Durée totale",
+    "repetition": "Répétitivité des paroles",
+    "tempo": "Tempo (BPM)",
+}
+
+
+@st.cache_resource
+def tiktok_process_pool():
+    """
+    Pool de process partagé du scoring en lot (décodage + librosa) : créé une fois
+    par serveur, au lieu d'un fork du process Streamlit à chaque clic.
+    """
+    return ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+
+
+def _resolve_tiktok_inputs(artist_name: str, track: dict, itunes_data: dict):
+    """Paroles d'un titre + preview iTunes déjà résolu, sans affichage (appel depuis un thread)."""
+    lyrics_text = fetch_lyrics(artist_name, track["name"])
+    return {
+        "track_id": track.get("id"),
+        "name": track.get("name"),
+        "preview_url": itunes_data.get("preview_url") if itunes_data else None,
+        "lyrics": lyrics_text,
+        "duration_ms": track.get("duration_ms"),
+    }
+
+
+def render_tiktok_potential():
+    """
+    4.1 – Score "TikTok Potential" d'un titre (+ scoring de tout le top titres).
+    """
+    if not st.session_state.artist_loaded:
+        st.info("Charge un·e artiste au-dessus pour scorer ses titres.")
+        return
+
+    data = st.session_state.artist_data
+    artist_name = data["name"]
+
+    tracks = load_top_tracks(data["id"], load_artist_snapshot(data["id"], max_age_s=SNAPSHOT_MAX_AGE_S))
+    if not tracks:
+        st.warning("Aucun titre exploitable trouvé pour cet artiste.")
+        return
+
+    selected_index = st.selectbox(
+        "Choisis un titre à scorer",
+        options=list(range(len(tracks))),
+        format_func=lambda i: make_track_label(tracks[i]),
+        key="predictor_track_select"
+    )
+    track = tracks[selected_index]
+
+    inputs = _resolve_tiktok_inputs(artist_name, track, resolve_itunes_preview(track, artist_name))
+
+    analysis = None
+    if inputs["preview_url"]:
+        try:
+            analysis = analyze_preview_url(inputs["preview_url"])["analysis"]
+        except Exception:
+            st.warning("Impossible d’analyser le preview audio (problème réseau ou format).")
+    else:
+        st.info("Aucun extrait iTunes 30s trouvé : score calculé sans les critères audio.")
+
+    signals = tiktok_signals_from_analysis(analysis, inputs["lyrics"], inputs["duration_ms"])
+    result = score_tiktok_potential([signals]).iloc[0]
+    score = result["tiktok_score"]
+    label, comment = interpret_tiktok_score(score)
+
+    c_score, c_chart = st.columns([1, 2])
+    with c_score:
+        st.metric("TikTok Potential (0-100)", "–" if np.isnan(score) else f"{score:.0f}")
+        st.markdown(f"**{label}** – {comment}")
+        st.caption(f"{int(result['nb_criteres'])}/{len(TIKTOK_WEIGHTS)} critères mesurés.")
+
+    with c_chart:
+        df_crit = pd.DataFrame({
+            "Critère": [TIKTOK_CRITERIA_LABELS[k] for k in TIKTOK_WEIGHTS],
+            "Score": [result[f"score_{k}"] for k in TIKTOK_WEIGHTS],
+            "Poids": [TIKTOK_WEIGHTS[k] for k in TIKTOK_WEIGHTS],
+        }).dropna(subset=["Score"])
+        if not df_crit.empty:
+            fig_crit = px.bar(
+                df_crit, x="Score", y="Critère", orientation="h",
+                range_x=[0, 1], hover_data=["Poids"],
+                title="Répartition des critères (0-1)",
+            )
+            fig_crit.update_layout(height=260, margin=dict(l=0, r=0, t=40, b=0))
+            st.plotly_chart(fig_crit, use_container_width=True)
+
+    with st.expander("Signaux mesurés"):
+        def fmt(v, pattern):
+            if v is None or np.isnan(v):
+                return "n/a"
+            if np.isinf(v):
+                return "non détecté"
+            return pattern.format(v)
+
+        st.markdown(
+            f"- **Intro (dans l'extrait)** : {fmt(signals['intro_s'], '{:.1f}s')}\n"
+            f"- **1er drop (dans l'extrait)** : {fmt(signals['first_drop_s'], '{:.1f}s')}\n"
+            f"- **Durée totale** : {fmt(signals['duration_s'], '{:.0f}s')}\n"
+            f"- **Lignes répétées** : {fmt(signals['lyric_repetition'], '{:.0%}')}\n"
+            f"- **Tempo** : {fmt(signals['tempo'], '{:.0f} BPM')}"
+        )
+        st.caption(
+            "Intro / drop sont mesurés sur le preview 30s, qui ne démarre pas toujours "
+            "au début du morceau."
+        )
+
+    # --- Scoring de tout le top titres ---------------------------------------
+    if st.button("Scorer tous les titres de l'artiste", key="predictor_batch_btn"):
+        with st.spinner("Résolution des previews / paroles et analyse audio en parallèle..."):
+            # Previews du top titres en un passage (table de correspondance + lookup groupé)
+            previews = resolve_itunes_previews(tracks, artist_name=artist_name)
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                batch_inputs = list(pool.map(
+                    propagate(lambda t: _resolve_tiktok_inputs(artist_name, t, previews.get(t.get("id")))), tracks
+                ))
+            st.session_state["tiktok_batch"] = {
+                "artist_id": data["id"],
+                "df": batch_tiktok_scores(batch_inputs, cpu_pool=tiktok_process_pool()),
+            }
+
+    batch = st.session_state.get("tiktok_batch")
+    if batch and batch["artist_id"] == data["id"] and not batch["df"].empty:
+        df_batch = batch["df"].sort_values("tiktok_score", ascending=False)
+        st.dataframe(
+            df_batch[["Titre", "tiktok_score", "intro_s", "first_drop_s",
+                      "duration_s", "lyric_repetition", "tempo"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+def render_market_weather():
+    """
+    4.2 – Bulletin météo du marché à partir d'une playlist de référence.
+    La dernière météo connue s'affiche sans appel réseau ; "Actualiser"
+    ne ré-analyse que les titres entrés depuis le dernier snapshot.
+    Mode hors-ligne : dernière météo connue uniquement (pas d'actualisation).
+    """
+    playlist_query = st.text_input(
+        "Playlist de référence (ID ou lien Spotify)",
+        value=TOP50_FRANCE_ID,
+        help="Par défaut : Top 50 France.",
+        key="weather_playlist_query"
+    )
+    playlist_id = parse_playlist_id(playlist_query)
+    if not playlist_id:
+        st.warning("ID / lien de playlist non reconnu.")
+        return
+
+    if offline_bundle is not None:
+        st.caption("📦 Mode hors-ligne : dernière météo enregistrée, actualisation indisponible.")
+        refresh = force = False
+    else:
+        c_refresh, c_force = st.columns([1, 1])
+        refresh = c_refresh.button("Actualiser la météo", key="weather_refresh_btn")
+        force = c_force.checkbox("Tout ré-analyser", value=False, key="weather_force")
+
+    weather = None
+    if refresh:
+        with st.spinner("Chargement de la playlist et analyse des nouveaux titres..."):
+            try:
+                weather = refresh_market_weather(sp, playlist_id, force=force)
+            except SpotifyException:
+                st.warning("Impossible de charger cette playlist (ID invalide ou accès refusé).")
+            except (ProviderUnavailable, requests.RequestException) as exc:
+                st.warning(f"Spotify indisponible, dernière météo connue affichée ({exc}).")
+    if weather is None:
+        weather = load_cached_weather(playlist_id)
+
+    if weather is None:
+        if offline_bundle is not None:
+            st.info("Pas de météo enregistrée pour cette playlist dans ce mode hors-ligne.")
+        else:
+            st.info("Pas encore de météo pour cette playlist : clique sur « Actualiser la météo ».")
+        return
+
+    agg = weather["aggregate"]
+    title, comment = weather["bulletin"]
+
+    st.markdown(f"**{weather['name']}** – bulletin du marché")
+    st.success(f"🌦️ **{title}** – {comment}")
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("BPM médian", "–" if agg["bpm_median"] is None else int(agg["bpm_median"]))
+    c2.metric("Énergie moyenne (RMS)", "–" if agg["energy_mean"] is None else round(agg["energy_mean"], 4))
+    c3.metric("Brillance moyenne", "–" if agg["centroid_mean"] is None else int(agg["centroid_mean"]))
+    c4.metric("Polarité texte moyenne", "–" if agg["polarity_mean"] is None else round(agg["polarity_mean"], 2))
+
+    fetched = pd.to_datetime(weather["fetched_at"], unit="s") if weather["fetched_at"] else None
+    st.caption(
+        f"{agg['n_tracks']} titres – {agg['n_audio']} analysés en audio, "
+        f"{agg['n_lyrics']} avec paroles. "
+        f"{weather['n_analysed']} titre(s) analysé(s) lors de cette actualisation"
+        + (f" – snapshot du {fetched:%d/%m/%Y %H:%M} (UTC)." if fetched is not None else ".")
+    )
+
+    df_w = weather["tracks"]
+    if not df_w.empty and df_w["tempo"].notna().any():
+        fig_bpm = px.histogram(df_w.dropna(subset=["tempo"]), x="tempo", nbins=20,
+                               title="Distribution des BPM")
+        fig_bpm.update_layout(height=260, margin=dict(l=0, r=0, t=40, b=0))
+        st.plotly_chart(fig_bpm, use_container_width=True)
+
+    with st.expander("Détail par titre"):
+        st.dataframe(
+            df_w[["rank", "name", "artist", "tempo", "avg_energy", "avg_centroid", "text_polarity"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+def render_artist_trends():
+    """
+    4.3 – Croissance followers / popularité de tous les artistes déjà chargés
+    (store local de séries temporelles).
+    """
+    store = get_timeseries_store()
+    window_days = st.select_slider(
+        "Fenêtre de calcul",
+        options=[7, 30, 90, 365],
+        value=30,
+        format_func=lambda d: f"{d} jours",
+        key="trends_window"
+    )
+    df_growth = store.growth_metrics(window_days=window_days)
+    df_growth = df_growth[df_growth["n_days"] > 0] if not df_growth.empty else df_growth
+
+    if df_growth.empty:
+        st.info(
+            "Pas encore assez d'historique : les snapshots s'accumulent à chaque "
+            "chargement d'artiste (au moins deux jours différents nécessaires)."
+        )
+        return
+
+    st.dataframe(
+        df_growth[["Artiste", "followers_end", "followers_growth_pct",
+                   "followers_per_day", "popularity_end", "popularity_delta", "n_days"]],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    top_ids = df_growth["artist_id"].head(10).tolist()
+    df_curves = store.query(top_ids)
+    if not df_curves.empty:
+        df_curves["Artiste"] = df_curves["artist_id"].map(store.artist_name)
+        fig_curves = px.line(df_curves, x="date", y="followers", color="Artiste",
+                             title="Courbes de followers (top croissance)")
+        fig_curves.update_layout(height=320, margin=dict(l=0, r=0, t=40, b=0))
+        st.plotly_chart(fig_curves, use_container_width=True)
+
+
+def render_lyrics_themes():
+    """
+    4.4 – Recherche par thème / mots-clés dans le corpus local de paroles
+    (tous les titres déjà analysés, toutes sessions confondues).
+    """
+    corpus = get_lyrics_corpus()
+    stats = corpus.stats()
+    if not stats["songs"]:
+        st.info("Corpus vide : les paroles s'accumulent à chaque analyse (Labo, météo, jobs batch).")
+        return
+
+    st.caption(
+        f"{stats['songs']} titres · {stats['artists']} artistes · "
+        f"{stats['texts']} textes uniques · {stats['stored_bytes'] / 1e6:.1f} Mo compressés"
+    )
+    query = st.text_input("Thème / mots-clés (ex : nuit, argent rue)", key="lyrics_theme_query")
+    if not query.strip():
+        return
+
+    df_artists = corpus.artists_by_theme(query)
+    if df_artists.empty:
+        st.info("Aucun titre du corpus ne contient tous ces mots.")
+        return
+
+    st.dataframe(
+        df_artists.rename(columns={"artist": "Artiste", "songs": "Titres", "score": "Score",
+                                   "example": "Exemple"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+    with st.expander("Titres correspondants"):
+        st.dataframe(corpus.search(query, limit=100), use_container_width=True, hide_index=True)
+
+
 def render_page_predictor():
     """
-    PAGE 4 – Prédicteur de tendance (squelette)
+    PAGE 4 – Prédicteur de tendance
     4.1 Score "TikTok Potential"
     4.2 Météo du marché (analyse Top 50)
-    Pour l'instant, uniquement structure & placeholders.
+    4.3 Tendances des artistes suivis (historique local)
+    4.4 Thèmes des paroles (corpus local)
     """
     st.markdown("### 📄 PAGE 4 – LE PRÉDICTEUR DE TENDANCE")
     st.caption("Esquisser des signaux sur la viralité potentielle et l'humeur du marché.")
 
-    st.markdown("#### 4.1 Score 'TikTok Potential' (squelette)")
-    st.info(
-        "TODO :\n"
-        "- Sélection ou saisie d'un titre (comme dans le labo / comparateur)\n"
-        "- Calculer une note sur 100 basée sur : intro courte, drop rapide, "
-        "durée totale, répétitivité des paroles, BPM, etc.\n"
-        "- Afficher la répartition des critères + un commentaire interprétatif."
-    )
+    st.markdown("#### 4.1 Score 'TikTok Potential'")
+    render_tiktok_potential()
 
     st.markdown("#### 4.2 Météo du marché (Top 50)")
-    st.info(
-        "TODO :\n"
-        "- Utiliser l'API Spotify pour charger une playlist de référence "
-        "(ex : Top 50 France).\n"
-        "- Calculer : BPM moyen, valence moyenne, énergie moyenne, etc.\n"
-        "- Afficher un petit 'bulletin météo' du marché : "
-        "\"Rapide & sombre\", \"Lent & lumineux\", etc."
-    )
+    render_market_weather()
+
+    st.markdown("#### 4.3 Tendances des artistes suivis")
+    render_artist_trends()
+
+    st.markdown("#### 4.4 Thèmes des paroles (corpus local)")
+    render_lyrics_themes()
 
     # TODO plus tard :
-    # - Ajouter des graphes de tendance dans le temps (si données historiques)
     # - Relier cette météo aux décisions label : quand sortir tel type de track.
 
 
+# =========================================================
+# PANNEAU PERFORMANCE (latence par étape du rerun)
+# =========================================================
+def render_performance_panel(trace):
+    """Waterfall des spans du rerun courant + exports JSON lines / Prometheus."""
+    records = trace.records()
+    st.markdown(f"### ⏱️ Performance – rerun en {trace.duration * 1000:.0f} ms")
+    if not records:
+        st.caption("Aucune étape tracée sur ce rerun.")
+    else:
+        df_spans = pd.DataFrame(records)
+        df_spans["start_ms"] = df_spans["start_s"] * 1000
+        df_spans["duration_ms"] = df_spans["duration_s"] * 1000
+        df_spans["Étape"] = df_spans["name"] + " #" + df_spans["span_id"].astype(str)
+
+        fig_perf = go.Figure(go.Bar(
+            y=df_spans["Étape"],
+            x=df_spans["duration_ms"],
+            base=df_spans["start_ms"],
+            orientation="h",
+            marker_color=np.where(df_spans["status"] == "ok", "#4c78a8", "#e45756"),
+            hovertext=df_spans["thread"],
+        ))
+        fig_perf.update_layout(
+            height=max(200, 22 * len(df_spans)),
+            margin=dict(l=0, r=0, t=10, b=0),
+            xaxis_title="ms depuis le début du rerun",
+            yaxis=dict(autorange="reversed"),
+        )
+        st.plotly_chart(fig_perf, use_container_width=True)
+
+        attr_cols = [c for c in df_spans.columns if c.startswith("attr.")]
+        st.dataframe(
+            df_spans[["name", "start_ms", "duration_ms", "status", "thread"] + attr_cols].round(1),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    st.markdown("**Fournisseurs d'API**")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Fournisseur": provider,
+                "Disjoncteur": m["circuit"],
+                "File (interactif)": m["queue"]["interactive"],
+                "File (fond)": m["queue"]["background"],
+                "Rejets débit": m["rejected_rate_limit"],
+                "Rejets disjoncteur": m["rejected_circuit"],
+                "Débit (req/s)": f"{m['rate']:g} / {m['base_rate']:g}",
+                "Réponses périmées": m["stale_served"],
+            }
+            for provider, m in provider_metrics().items()
+        ]),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    sf = singleflight_stats()
+    st.caption(
+        f"Coalescence : {sf.get('executed', 0)} appels exécutés, "
+        f"{sf.get('shared', 0)} partagés entre sessions, {sf['in_flight']} en cours."
+    )
+
+    st.markdown("**Caches mémoire**")
+    memo = memo_metrics()
+    memo_total = memo.pop("total")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Cache": name,
+                "Entrées": m["entries"],
+                "Taille (Mo)": round(m["bytes"] / 1e6, 2),
+                "Budget (Mo)": round(m["max_bytes"] / 1e6, 1) if m["max_bytes"] else None,
+                "TTL (s)": m["ttl"],
+                "Politique": m["policy"].upper(),
+                "Taux de hit": f"{m['hit_rate']:.0%}" if m["hit_rate"] is not None else "–",
+                "Évictions": m["evictions"],
+                "Expirations": m["expirations"],
+            }
+            for name, m in memo.items()
+        ]),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        f"Total : {memo_total['entries']} entrées, {memo_total['bytes'] / 1e6:.1f} Mo "
+        f"sur un budget global de {memo_total['max_bytes'] / 1e6:.0f} Mo (RADAR_CACHE_MAX_MB)."
+    )
+
+    c_json, c_prom = st.columns(2)
+    c_json.download_button(
+        "Traces récentes (JSON lines)",
+        data=export_jsonl(),
+        file_name="radar_traces.jsonl",
+        mime="application/x-ndjson",
+    )
+    c_prom.download_button(
+        "Métriques (Prometheus)",
+        data=export_prometheus() + memo_prometheus(),
+        file_name="radar_metrics.prom",
+        mime="text/plain",
+    )
+
+
 # =========================================================
 # ROUTAGE DES PAGES
 # =========================================================
 
 st.divider()
 
-if page == "1. Audit artiste":
-    render_page_audit()
-elif page == "2. Labo d'analyse (son + texte)":
-    render_page_labo()
-elif page == "3. Comparateur & contexte":
-    render_page_comparateur()
-elif page == "4. Prédicteur de tendance":
-    render_page_predictor()
+# finally : un rerun interrompu (nouvelle interaction) clôt quand même sa trace et son échantillonnage
+try:
+    with span("page.render", page=page):
+        if page == "1. Audit artiste":
+            render_page_audit()
+        elif page == "2. Labo d'analyse (son + texte)":
+            render_page_labo()
+        elif page == "3. Comparateur & contexte":
+            render_page_comparateur()
+        elif page == "4. Prédicteur de tendance":
+            render_page_predictor()
+finally:
+    finish_trace(rerun_trace)
+    profile_base = profile_capture.end() if profile_capture is not None else None
+    if profile_capture is not None and profile_capture.done:
+        st.session_state.profile_capture = None
+
+if profile_base:
+    st.sidebar.success(f"Profil enregistré : {os.path.basename(profile_base)}")
+
+if show_perf_panel:
+    st.divider()
+    render_performance_panel(rerun_trace)
@@ -0,0 +1,81 @@
+"""
+Benchmark du graphe d'écosystème (radar.similarity_graph) à cache chaud.
+
+Usage :
+    python -m bench.bench_graph --artists 20000 --hops 3 --max-nodes 500
+
+Un store d'adjacence synthétique (fichier temporaire) est rempli d'artistes
+reliés par attachement préférentiel, comme le voisinage Last.fm : tous les
+artistes sont « déjà explorés », le crawl ne fait donc aucun appel réseau.
+On mesure crawl + métriques + chemins + sous-graphe affiché.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from radar.similarity_graph import (
+    SimilarityStore,
+    crawl,
+    graph_metrics,
+    render_subgraph,
+    shortest_paths,
+)
+
+
+def fill_store(store: SimilarityStore, n_artists: int, fanout: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    popularity = rng.zipf(1.6, n_artists).astype(float)
+    popularity /= popularity.sum()
+    results = []
+    for a in range(n_artists):
+        # Voisins proches (même scène) + quelques artistes très populaires
+        local = (a + rng.integers(-500, 500, fanout)) % n_artists
+        hubs = rng.choice(n_artists, fanout // 3, p=popularity)
+        targets = list(dict.fromkeys(int(t) for t in np.concatenate([local, hubs]) if t != a))[:fanout]
+        matches = np.sort(rng.uniform(0.05, 1.0, len(targets)))[::-1]
+        results.append((f"artist {a}", f"Artist {a}",
+                        [{"name": f"Artist {t}", "match": str(m)} for t, m in zip(targets, matches)]))
+    store.save(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=20_000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--hops", type=int, default=3)
+    parser.add_argument("--max-nodes", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SimilarityStore(os.path.join(tmp, "similarity.sqlite3"))
+        t0 = time.perf_counter()
+        fill_store(store, args.artists, args.fanout)
+        print(f"store : {store.stats()} rempli en {time.perf_counter() - t0:.1f} s")
+
+        timings = []
+        for run in range(args.runs):
+            t0 = time.perf_counter()
+            graph = crawl("Artist 0", hops=args.hops, max_nodes=args.max_nodes,
+                          fanout=args.fanout, store=store)
+            t_crawl = time.perf_counter() - t0
+            metrics = graph_metrics(graph)
+            paths = shortest_paths(graph, [f"Artist {k}" for k in (7, 120, 999)])
+            render_subgraph(graph, metrics, keep=paths["target"].dropna().tolist())
+            timings.append((t_crawl, time.perf_counter() - t0))
+
+        t_crawl, t_total = np.median(np.array(timings), axis=0)
+        print(f"graphe : {graph.stats}")
+        print(f"crawl (cache chaud)        : {t_crawl * 1e3:.0f} ms (médiane sur {args.runs})")
+        print(f"crawl + analyse + rendu    : {t_total * 1e3:.0f} ms")
+        print(f"communautés : {metrics['community'].nunique()} · "
+              f"top PageRank : {', '.join(metrics.nlargest(5, 'pagerank')['artist'])}")
+        print(paths.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
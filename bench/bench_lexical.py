@@ -0,0 +1,59 @@
+"""
+Benchmark du profil lexical vectorisé (radar.lexical) sur une discographie synthétique.
+
+Usage :
+    python -m bench.bench_lexical --songs 10000
+
+Chaque chanson = couplets tirés d'un vocabulaire zipfien + refrain répété.
+On compare l'appel vectorisé sur tout le lot à des appels titre par titre.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from radar.lexical import lexical_profile, lexical_profiles
+
+
+def make_corpus(n_songs: int, seed: int = 0, vocab: int = 5000) -> list:
+    rng = np.random.default_rng(seed)
+    words = np.array([f"mot{i}" for i in range(vocab)])
+    texts = []
+    for _ in range(n_songs):
+        chorus = [" ".join(words[rng.zipf(1.3, 6) % vocab]) for _ in range(2)]
+        stanzas = []
+        for _ in range(int(rng.integers(2, 5))):
+            verse = [" ".join(words[rng.zipf(1.3, int(rng.integers(4, 10))) % vocab]) for _ in range(4)]
+            stanzas.append("\n".join(verse))
+            stanzas.append("\n".join(chorus * 2))
+        texts.append("\n\n".join(stanzas))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--songs", type=int, default=10_000)
+    parser.add_argument("--single", type=int, default=500, help="titres scorés un par un (comparaison)")
+    args = parser.parse_args()
+
+    texts = make_corpus(args.songs)
+    n_tokens = sum(len(t.split()) for t in texts)
+
+    t0 = time.perf_counter()
+    df = lexical_profiles(texts)
+    t_batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for t in texts[: args.single]:
+        lexical_profile(t)
+    t_single = (time.perf_counter() - t0) / max(args.single, 1)
+
+    print(f"{args.songs} titres, {n_tokens} tokens")
+    print(f"lot vectorisé     : {t_batch:.2f} s ({t_batch / args.songs * 1e3:.3f} ms / titre)")
+    print(f"titre par titre   : {t_single * 1e3:.2f} ms / titre (sur {args.single})")
+    print(df[["mtld", "hdd", "bigram_repetition", "rhyme_density", "common_word_share"]].describe().round(3))
+
+
+if __name__ == "__main__":
+    main()
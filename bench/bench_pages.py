@@ -0,0 +1,166 @@
+"""
+Benchmark du rendu des pages Streamlit, hors-ligne (fixtures radar.replay).
+
+Usage :
+    # 1. capture des réponses amont (clés d'API réelles nécessaires)
+    python -m bench.bench_pages --record --artist "Laylow"
+    # 2. benchmark sans réseau
+    python -m bench.bench_pages --artist "Laylow" --runs 20 [--latency-ms 50]
+
+Chaque page est jouée dans un process dédié (pic de RSS isolé) via
+streamlit.testing (AppTest) : chargement de l'artiste / saisie de la
+recherche, puis `--runs` reruns chronométrés. Rapporte le premier rendu
+(à froid), p50 / p95 des reruns et le pic de RSS par page.
+
+La page 3 lit data/spotify_tracks.csv : sans ce fichier elle est
+rapportée en erreur.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+PAGES = {
+    "audit": "1. Audit artiste",
+    "labo": "2. Labo d'analyse (son + texte)",
+    "comparateur": "3. Comparateur & contexte",
+    "predictor": "4. Prédicteur de tendance",
+}
+SECRET_NAMES = ["SPOTIPY_CLIENT_ID", "SPOTIPY_CLIENT_SECRET", "LASTFM_API_KEY", "DEEPL_API_KEY"]
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _timed_run(at, timeout: float) -> float:
+    t0 = time.perf_counter()
+    at.run(timeout=timeout)
+    return time.perf_counter() - t0
+
+
+def _first_error(at):
+    return str(at.exception[0].message) if len(at.exception) else None
+
+
+def run_page(page_key: str, artist: str, comparator_query: str, runs: int,
+             record: bool, timeout: float) -> dict:
+    """Exécuté dans le process worker : rendu d'une page + mesures."""
+    from streamlit.testing.v1 import AppTest
+
+    from radar.config import get_secret
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for name in SECRET_NAMES:
+        at.secrets[name] = (get_secret(name) or "") if record else "replay"
+
+    at.run()
+    at.sidebar.radio[0].set_value(PAGES[page_key])
+
+    if page_key == "comparateur":
+        at.text_input(key="offline_track_query").input(comparator_query)
+    else:
+        at.text_input(key="artist_search_query").input(artist)
+        next(b for b in at.button if b.label == "Charger l'artiste").click()
+
+    cold_s = _timed_run(at, timeout)
+    error = _first_error(at)
+
+    warm = []
+    if not error and not record:
+        for _ in range(runs):
+            warm.append(_timed_run(at, timeout))
+        error = _first_error(at)
+
+    result = {
+        "page": page_key,
+        "cold_ms": round(cold_s * 1000, 1),
+        "runs": len(warm),
+        "p50_ms": round(float(np.percentile(warm, 50)) * 1000, 1) if warm else None,
+        "p95_ms": round(float(np.percentile(warm, 95)) * 1000, 1) if warm else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "error": error,
+    }
+
+    from radar.replay import install_from_env
+    replay = install_from_env()
+    if replay is not None:
+        result["http"] = replay.stats()
+    return result
+
+
+def _worker_env(args) -> dict:
+    env = dict(os.environ)
+    env["RADAR_HTTP_MODE"] = "record" if args.record else "replay"
+    if args.fixtures:
+        env["RADAR_FIXTURES_DIR"] = os.path.abspath(args.fixtures)
+    if args.latency_ms:
+        env["RADAR_REPLAY_LATENCY_MS"] = str(args.latency_ms)
+    # Pas de refresher de fond pendant la mesure
+    env["RADAR_WATCHLIST"] = os.devnull
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.bench_pages")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--artist", default="Laylow")
+    parser.add_argument("--comparator-query", default="Drake")
+    parser.add_argument("--runs", type=int, default=10, help="Reruns chronométrés par page.")
+    parser.add_argument("--record", action="store_true", help="Capturer les fixtures (réseau réel).")
+    parser.add_argument("--fixtures", default=None, help="Dossier des fixtures (défaut DATA_DIR/fixtures).")
+    parser.add_argument("--latency-ms", default=None, help='Latence injectée en replay (ms ou "recorded").')
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--json", default=None, help="Écrire aussi les résultats dans ce fichier.")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        res = run_page(args.worker, args.artist, args.comparator_query, args.runs,
+                       args.record, args.timeout)
+        print(json.dumps(res, ensure_ascii=False))
+        return 0
+
+    results = []
+    for page_key in args.pages:
+        cmd = [sys.executable, "-m", "bench.bench_pages", "--worker", page_key,
+               "--artist", args.artist, "--comparator-query", args.comparator_query,
+               "--runs", str(args.runs), "--timeout", str(args.timeout)]
+        if args.record:
+            cmd.append("--record")
+        proc = subprocess.run(cmd, env=_worker_env(args), capture_output=True, text=True,
+                              cwd=os.path.dirname(APP_PATH))
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            res = {"page": page_key, "error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+        else:
+            res = json.loads(lines[-1])
+        results.append(res)
+
+        if res.get("error"):
+            print(f"{page_key:<12} ERREUR : {res['error']}")
+        elif args.record:
+            print(f"{page_key:<12} capturé en {res['cold_ms']:.0f} ms – {res.get('http', {})}")
+        else:
+            print(f"{page_key:<12} froid {res['cold_ms']:>8.1f} ms | p50 {res['p50_ms']:>8.1f} ms "
+                  f"| p95 {res['p95_ms']:>8.1f} ms | RSS max {res['peak_rss_mb']:>7.1f} Mo "
+                  f"| http {res.get('http', {})}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if any(r.get("error") for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
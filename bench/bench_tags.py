@@ -0,0 +1,81 @@
+"""
+Benchmark de l'index de tags Last.fm (radar.tag_index) sur des profils synthétiques.
+
+Usage :
+    python -m bench.bench_tags --artists 50000 --queries 200
+
+Chaque artiste reçoit 15 tags tirés d'un vocabulaire zipfien (quelques tags
+très courants, une longue traîne), avec des counts décroissants comme Last.fm.
+On mesure l'import, le rechargement depuis le disque et les requêtes top-k.
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from radar.tag_index import TagIndex
+
+
+def make_profiles(n_artists: int, vocab: int = 3000, tags_per_artist: int = 15, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    names = np.array([f"tag {i}" for i in range(vocab)])
+    p = 1 / np.arange(1, vocab + 1)
+    p /= p.sum()
+    out = []
+    for a in range(n_artists):
+        tags = rng.choice(vocab, tags_per_artist, replace=False, p=p)
+        counts = np.sort(rng.integers(1, 100, tags_per_artist))[::-1]
+        counts[0] = 100
+        out.append((f"Artist {a}", [{"name": names[t], "count": int(c)} for t, c in zip(tags, counts)]))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--roster", type=int, default=50, help="taille du roster pour les requêtes filtrées")
+    args = parser.parse_args()
+
+    profiles = make_profiles(args.artists)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = TagIndex(tmp)
+        t0 = time.perf_counter()
+        index.add_many(profiles)
+        t_add = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = TagIndex(tmp)
+        t_load = time.perf_counter() - t0
+
+        rng = np.random.default_rng(1)
+        queries = [f"Artist {i}" for i in rng.integers(0, args.artists, args.queries)]
+        roster = [f"Artist {i}" for i in rng.integers(0, args.artists, args.roster)]
+
+        t0 = time.perf_counter()
+        for name in queries:
+            index.similar_to(name, k=10)
+        t_query = (time.perf_counter() - t0) / len(queries)
+
+        t0 = time.perf_counter()
+        for name in queries:
+            index.similar_to(name, k=5, among=roster)
+        t_roster = (time.perf_counter() - t0) / len(queries)
+
+        t0 = time.perf_counter()
+        index.add("Artist 0", profiles[1][1])
+        t_update = time.perf_counter() - t0
+
+        print(f"index : {index.stats()}")
+        print(f"import            : {t_add:.1f} s")
+        print(f"rechargement      : {t_load * 1e3:.0f} ms")
+        print(f"top-10 (tous)     : {t_query * 1e3:.2f} ms / requête")
+        print(f"top-5 (roster)    : {t_roster * 1e3:.2f} ms / requête")
+        print(f"mise à jour 1 profil : {t_update * 1e3:.2f} ms")
+        print(index.similar_to(queries[0], k=5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Test de charge : N sessions concurrentes sur l'app, hors-ligne (fixtures radar.replay).
+
+Usage :
+    python -m bench.load_test --sessions 1 5 10 15 20 --artists "Laylow" "Angèle" \
+        --out bench_load.csv [--label v1.4] [--latency-ms 80]
+
+Pour chaque palier, un process dédié joue N sessions AppTest en parallèle
+(comme un serveur Streamlit : un process, un thread de script par session,
+caches partagés). Parcours de chaque session :
+    charger un artiste -> Labo, changer de titre (--track-switches fois)
+    -> Comparateur, recherche dans le dataset.
+
+Mesures par palier : débit (actions/s), latence p50 / p95 / p99 par action,
+saturation CPU (temps CPU du process / (durée x nb cœurs)), RSS avant / après
+et croissance mémoire par session. Les lignes sont ajoutées au CSV avec un
+label (commit git par défaut) pour suivre la courbe de montée en charge
+d'une version à l'autre.
+
+Les fixtures doivent couvrir les artistes choisis (cf. bench.bench_pages --record).
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench.bench_pages import APP_PATH, PAGES, SECRET_NAMES
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _session(session_id: int, args, timings: list, errors: list, lock: threading.Lock):
+    """Parcours d'une session simulée ; chaque action chronométrée est ajoutée à `timings`."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    for name in SECRET_NAMES:
+        at.secrets[name] = "replay"
+
+    def action(name, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+            at.run(timeout=args.timeout)
+        except Exception as exc:
+            with lock:
+                errors.append(f"{name}: {type(exc).__name__}: {exc}")
+            return False
+        dt = time.perf_counter() - t0
+        with lock:
+            timings.append((name, dt))
+            if len(at.exception):
+                errors.append(f"{name}: {at.exception[0].message}")
+        return not len(at.exception)
+
+    if not action("open", lambda: None):
+        return
+
+    def load_artist():
+        at.text_input(key="artist_search_query").input(rng.choice(args.artists))
+        next(b for b in at.button if b.label == "Charger l'artiste").click()
+
+    action("load_artist", load_artist)
+    action("page_labo", lambda: at.sidebar.radio[0].set_value(PAGES["labo"]))
+
+    for _ in range(args.track_switches):
+        try:
+            select = at.selectbox(key="labo_track_select")
+        except KeyError:
+            break
+        action("switch_track", lambda: select.select_index(rng.randrange(len(select.options))))
+
+    action("page_comparateur", lambda: at.sidebar.radio[0].set_value(PAGES["comparateur"]))
+    action("search_comparateur",
+           lambda: at.text_input(key="offline_track_query").input(rng.choice(args.queries)))
+
+
+def run_level(n_sessions: int, args) -> dict:
+    """Exécuté dans le process worker : un palier de N sessions concurrentes."""
+    timings, errors, lock = [], [], threading.Lock()
+    rss_start = _current_rss_mb()
+    cpu_start = _cpu_seconds()
+    t0 = time.perf_counter()
+
+    threads = [
+        threading.Thread(target=_session, args=(i, args, timings, errors, lock), daemon=True)
+        for i in range(n_sessions)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    wall = time.perf_counter() - t0
+    cpu = _cpu_seconds() - cpu_start
+    rss_end = _current_rss_mb()
+    lat = np.array([dt for _, dt in timings]) if timings else np.array([np.nan])
+    per_action = pd.DataFrame(timings, columns=["action", "s"]).groupby("action")["s"].quantile(0.95)
+
+    return {
+        "sessions": n_sessions,
+        "actions": len(timings),
+        "wall_s": round(wall, 2),
+        "throughput_per_s": round(len(timings) / wall, 3) if wall else None,
+        "p50_ms": round(float(np.nanpercentile(lat, 50)) * 1000, 1),
+        "p95_ms": round(float(np.nanpercentile(lat, 95)) * 1000, 1),
+        "p99_ms": round(float(np.nanpercentile(lat, 99)) * 1000, 1),
+        "cpu_saturation": round(cpu / (wall * (os.cpu_count() or 1)), 3) if wall else None,
+        "rss_start_mb": round(rss_start, 1),
+        "rss_end_mb": round(rss_end, 1),
+        "rss_per_session_mb": round((rss_end - rss_start) / n_sessions, 2),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p95_by_action_ms": {k: round(v * 1000, 1) for k, v in per_action.items()},
+    }
+
+
+def _git_label() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP_PATH)).stdout.strip() or "local"
+    except OSError:
+        return "local"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.load_test")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 5, 10, 15, 20])
+    parser.add_argument("--artists", nargs="+", default=["Laylow"])
+    parser.add_argument("--queries", nargs="+", default=["Drake", "Travis", "Eminem"])
+    parser.add_argument("--track-switches", type=int, default=3)
+    parser.add_argument("--fixtures", default=None, help="Dossier des fixtures (défaut DATA_DIR/fixtures).")
+    parser.add_argument("--latency-ms", default=None, help='Latence injectée (ms ou "recorded").')
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--label", default=None, help="Label de la version mesurée (défaut : commit git).")
+    parser.add_argument("--out", default=None, help="CSV de la courbe de montée en charge (ajout).")
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_level(args.worker, args), ensure_ascii=False))
+        return 0
+
+    env = dict(os.environ)
+    env["RADAR_HTTP_MODE"] = "replay"
+    env["RADAR_WATCHLIST"] = os.devnull
+    if args.fixtures:
+        env["RADAR_FIXTURES_DIR"] = os.path.abspath(args.fixtures)
+    if args.latency_ms:
+        env["RADAR_REPLAY_LATENCY_MS"] = str(args.latency_ms)
+
+    label = args.label or _git_label()
+    rows = []
+    for n in args.sessions:
+        cmd = [sys.executable, "-m", "bench.load_test", "--worker", str(n),
+               "--artists", *args.artists, "--queries", *args.queries,
+               "--track-switches", str(args.track_switches), "--timeout", str(args.timeout)]
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=os.path.dirname(APP_PATH))
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"{n:>3} sessions : ÉCHEC – {(proc.stderr.strip().splitlines() or ['?'])[-1]}")
+            continue
+        res = json.loads(lines[-1])
+        rows.append({"label": label, "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"), **res})
+        print(f"{n:>3} sessions : {res['throughput_per_s']:.2f} actions/s | p50 {res['p50_ms']:.0f} ms "
+              f"| p95 {res['p95_ms']:.0f} ms | p99 {res['p99_ms']:.0f} ms | CPU {res['cpu_saturation']:.0%} "
+              f"| RSS {res['rss_start_mb']:.0f}->{res['rss_end_mb']:.0f} Mo "
+              f"({res['rss_per_session_mb']:+.1f}/session) | erreurs {res['errors']}")
+
+    if args.out and rows:
+        df = pd.DataFrame(rows)
+        df["p95_by_action_ms"] = df["p95_by_action_ms"].map(json.dumps)
+        df.to_csv(args.out, mode="a", header=not os.path.exists(args.out), index=False)
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Briques métier de l'Artist Performance & Strategy Dashboard,
+utilisables hors de l'interface Streamlit (scripts, jobs, benchmarks).
+"""
@@ -0,0 +1,164 @@
+# =========================================================
+# PIPELINE AUDIO (preview 30s -> descripteurs)
+# =========================================================
+"""
+Pipeline audio partagé entre le Labo (page 2) et le Prédicteur (page 4).
+
+- téléchargement + décodage d'un preview (fichier temporaire unique par appel),
+- une seule STFT réutilisée pour la brillance et l'enveloppe d'onsets,
+- descripteurs agrégés (tempo, énergie, brillance, dynamique, humeur audio)
+  + enveloppes brutes (RMS / onsets) pour les analyses plus fines.
+
+librosa (et sa chaîne numba / scipy, plusieurs secondes) n'est importé qu'au
+premier décodage / analyse : les pages sans audio n'en paient pas le coût.
+radar.startup le précharge (et compile ses chemins numba) au démarrage.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import requests
+
+from radar.singleflight import coalesce
+from radar.tracing import span
+
+
+# Descripteurs scalaires (sérialisables) issus de analyze_signal
+AUDIO_SUMMARY_FIELDS = ["tempo", "avg_energy", "avg_centroid", "dynamic_range", "audio_mood"]
+
+# Pas de sous-échantillonnage de la waveform affichée (preview 30s -> ~3300 points)
+WAVEFORM_STEP = 200
+
+ANALYSIS_SR = 22050
+PREVIEW_MAX_DURATION = 30
+HOP_LENGTH = 512
+N_FFT = 2048
+
+
+@coalesce("audio.download")
+def download_preview(preview_url: str, timeout: int = 15) -> bytes:
+    """Télécharge le binaire d'un preview (iTunes / Spotify)."""
+    with span("audio.download") as s:
+        resp = requests.get(preview_url, timeout=timeout)
+        s.set(status=resp.status_code, bytes=len(resp.content))
+        resp.raise_for_status()
+        return resp.content
+
+
+def decode_preview(content: bytes, duration: float = PREVIEW_MAX_DURATION):
+    """
+    Décode un preview en signal mono.
+    Retourne (y, sr).
+
+    Chaque appel écrit dans son propre fichier temporaire : plusieurs
+    sessions / workers peuvent décoder en parallèle sans s'écraser.
+    """
+    import librosa
+
+    fd, tmp_name = tempfile.mkstemp(suffix=".m4a")
+    try:
+        with span("audio.decode", bytes=len(content)):
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            y, sr = librosa.load(tmp_name, sr=ANALYSIS_SR, duration=duration)
+    finally:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+    return y, sr
+
+
+def load_preview_audio(preview_url: str, duration: float = PREVIEW_MAX_DURATION):
+    """Téléchargement + décodage en un appel. Retourne (y, sr)."""
+    return decode_preview(download_preview(preview_url), duration=duration)
+
+
+def compute_audio_mood(tempo: float, avg_centroid: float) -> float:
+    """
+    Proxy d'humeur audio (0-1) : tempo + brillance normalisés.
+    Fonctionne aussi sur des tableaux numpy (calcul vectorisé).
+    """
+    tempo_norm = np.clip((np.asarray(tempo, dtype=float) - 60) / (180 - 60), 0, 1)  # 60-180 bpm
+    bright_norm = np.clip((np.asarray(avg_centroid, dtype=float) - 1000) / (6000 - 1000), 0, 1)
+    mood = (tempo_norm + bright_norm) / 2
+    return float(mood) if np.ndim(mood) == 0 else mood
+
+
+def analyze_signal(y: np.ndarray, sr: int) -> dict:
+    """
+    Analyse un signal en une passe :
+    - RMS (énergie) sur le signal temporel,
+    - une STFT unique -> centroïde spectral + enveloppe d'onsets,
+    - suivi de tempo à partir de l'enveloppe d'onsets (pas de 2e STFT).
+
+    Retourne un dict :
+    tempo, avg_energy, avg_centroid, dynamic_range, audio_mood,
+    rms, onset_env, beat_frames, sr, hop_length, duration
+    """
+    import librosa
+
+    with span("audio.features"):
+        rms = librosa.feature.rms(y=y, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+
+        S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+        spec_centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S ** 2, sr=sr))
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=HOP_LENGTH)
+
+    with span("audio.beat_track"):
+        tempo, beat_frames = librosa.beat.beat_track(
+            onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH
+        )
+        tempo = float(np.atleast_1d(tempo)[0])
+
+    avg_energy = float(np.mean(rms))
+    avg_centroid = float(np.mean(spec_centroid))
+    dynamic_range = float(np.max(rms) - np.min(rms))
+
+    return {
+        "tempo": tempo,
+        "avg_energy": avg_energy,
+        "avg_centroid": avg_centroid,
+        "dynamic_range": dynamic_range,
+        "audio_mood": compute_audio_mood(tempo, avg_centroid),
+        "rms": rms,
+        "onset_env": onset_env,
+        "beat_frames": beat_frames,
+        "sr": sr,
+        "hop_length": HOP_LENGTH,
+        "duration": float(len(y) / sr) if sr else 0.0,
+    }
+
+
+def summarize_analysis(analysis: dict) -> dict:
+    """Descripteurs scalaires d'une analyse (JSON / pickle friendly)."""
+    return {k: analysis[k] for k in AUDIO_SUMMARY_FIELDS}
+
+
+def waveform_envelope(y: np.ndarray, step: int = WAVEFORM_STEP) -> list:
+    """Waveform sous-échantillonnée pour l'affichage (liste de floats arrondis)."""
+    return np.round(y[::step].astype(float), 4).tolist()
+
+
+@coalesce("audio.analyze_url")
+def analyze_preview_url(preview_url: str) -> dict:
+    """
+    Téléchargement + analyse complète d'un preview : {"analysis", "waveform"}.
+    Coalescé par URL : plusieurs sessions sur le même titre = un seul passage librosa.
+    """
+    y, sr = load_preview_audio(preview_url)
+    return {"analysis": analyze_signal(y, sr), "waveform": waveform_envelope(y)}
+
+
+def analyze_preview_bytes(content: bytes):
+    """
+    Décodage + analyse d'un preview déjà téléchargé -> descripteurs scalaires.
+    None si le binaire est illisible. Pensé pour un pool de process.
+    """
+    try:
+        y, sr = decode_preview(content)
+        return summarize_analysis(analyze_signal(y, sr))
+    except Exception:
+        return None
@@ -0,0 +1,79 @@
+# =========================================================
+# AUDIT ARTISTE (métriques hors UI)
+# =========================================================
+"""
+Calculs de la page 1 réutilisables hors Streamlit :
+timeline des sorties et rythme de publication (le grind).
+"""
+
+import pandas as pd
+
+
+def build_release_timeline(album_items: list) -> pd.DataFrame:
+    """
+    Timeline des sorties à partir des items Spotify (albums + singles).
+    Colonnes : Date, Titre, Type, Nb_pistes, Marchés (triée par date ; vide si aucune date).
+    Marchés : disponibilité par marché des sorties fusionnées (radar.markets), "" sinon.
+    """
+    dates, titles, types, total_tracks_list, markets = [], [], [], [], []
+
+    for item in album_items:
+        release_date = item.get("release_date")
+        if release_date:
+            dates.append(release_date)
+            titles.append(item.get("name", "Sans titre"))
+            album_type = item.get("album_type", "other")  # "album" / "single"
+            types.append(album_type)
+            total_tracks_list.append(item.get("total_tracks", 1) or 1)
+            markets.append(" · ".join(item.get("markets") or []))
+
+    if not dates:
+        return pd.DataFrame(columns=["Date", "Titre", "Type", "Nb_pistes", "Marchés"])
+
+    # Précision Spotify variable ("2012", "2015-06", "2020-01-02") : ISO8601 accepte les trois
+    return pd.DataFrame({
+        "Date": pd.to_datetime(dates, format="ISO8601", errors="coerce"),
+        "Titre": titles,
+        "Type": types,
+        "Nb_pistes": total_tracks_list,
+        "Marchés": markets,
+    }).dropna(subset=["Date"]).sort_values("Date")
+
+
+def release_cadence(df_timeline: pd.DataFrame) -> dict:
+    """
+    Statistiques de sortie + rythme moyen.
+    `median_gap` vaut None si le rythme n'est pas calculable
+    (trop peu de sorties ou dates identiques).
+    """
+    out = {
+        "nb_singles": int((df_timeline["Type"] == "single").sum()),
+        "nb_albums": int((df_timeline["Type"] == "album").sum()),
+        "total_tracks": int(df_timeline["Nb_pistes"].sum()),
+        "median_gap": None,
+        "mean_gap": None,
+        "days_per_release": None,
+        "releases_per_year": None,
+        "tracks_per_year": None,
+        "years_range": None,
+    }
+
+    df_sorted = df_timeline.sort_values("Date").copy()
+    deltas = df_sorted["Date"].diff().dt.days.dropna()
+    # On enlève les éventuels 0 jours (sorties le même jour)
+    deltas_pos = deltas[deltas > 0]
+    if deltas_pos.empty:
+        return out
+
+    median_gap = float(deltas_pos.median())
+    out["median_gap"] = median_gap
+    out["mean_gap"] = float(deltas_pos.mean())
+    out["days_per_release"] = int(round(median_gap))
+    out["releases_per_year"] = 365.0 / median_gap if median_gap > 0 else None
+
+    # Période couverte
+    nb_days_range = (df_sorted["Date"].max() - df_sorted["Date"].min()).days or 1
+    nb_years_range = nb_days_range / 365.0
+    out["years_range"] = nb_years_range
+    out["tracks_per_year"] = out["total_tracks"] / nb_years_range if nb_years_range > 0 else None
+    return out
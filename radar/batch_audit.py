@@ -0,0 +1,309 @@
+# =========================================================
+# AUDIT BATCH HEADLESS (CLI)
+# =========================================================
+"""
+Audit + Labo en batch, sans interface Streamlit.
+
+Usage :
+    python -m radar.batch_audit artistes.txt -o audit.jsonl [--parquet]
+        [--threads 8] [--procs 4] [--tracks 10] [--no-lyrics]
+
+- artistes.txt : un nom d'artiste, un ID ou un lien Spotify par ligne
+  (lignes vides et lignes commençant par # ignorées),
+- une ligne de sortie par artiste (row_type="artist") et par titre (row_type="track"),
+- reprise automatique : les entrées déjà traitées sont listées dans
+  <sortie>.checkpoint et sautées au relancement,
+- --parquet : écrit aussi la sortie en Parquet à la fin, dédoublonnée, à côté du
+  JSONL avec l'extension .parquet (audit.jsonl -> audit.parquet) ; nécessite
+  pyarrow (ou fastparquet), vérifié avant de lancer le batch.
+
+Les clés d'API sont lues dans les variables d'environnement ou
+.streamlit/secrets.toml (cf. radar.config).
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from radar.audio import analyze_preview_bytes, download_preview
+from radar.audit import build_release_timeline, release_cadence
+from radar.corpus import fetch_lyrics
+from radar.interpret import (
+    classify_brightness,
+    classify_dynamic,
+    classify_energy,
+    classify_tempo,
+    interpret_dissonance,
+    interpret_genre_clarity,
+    interpret_lyrics_profile,
+    interpret_spotify_popularity,
+)
+from radar.sources import (
+    get_artist_albums,
+    get_artist_top_tracks,
+    get_lastfm_artist_tags,
+    get_lastfm_similar_artists,
+    search_best_artist,
+)
+from radar.itunes_map import resolve_itunes_previews
+from radar.ratelimit import background_priority
+from radar.text import analyze_lyrics
+from radar.timeseries import record_artist_snapshot
+
+
+def read_inputs(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [l.strip() for l in f]
+    seen, out = set(), []
+    for l in lines:
+        if l and not l.startswith("#") and l not in seen:
+            seen.add(l)
+            out.append(l)
+    return out
+
+
+# ---------------------------------------------------------
+# Audit d'un artiste (exécuté dans un thread)
+# ---------------------------------------------------------
+
+def _track_row(base: dict, artist: dict, track: dict, itunes_data: dict, cpu_pool, with_lyrics: bool) -> dict:
+    name = artist["name"]
+    row = {
+        **base,
+        "row_type": "track",
+        "track_id": track.get("id"),
+        "track_name": track.get("name"),
+        "album": (track.get("album") or {}).get("name"),
+        "duration_ms": track.get("duration_ms"),
+        "preview_found": False,
+        "lyrics_found": False,
+    }
+
+    audio_future = None
+    if itunes_data and itunes_data.get("preview_url"):
+        try:
+            content = download_preview(itunes_data["preview_url"])
+            audio_future = cpu_pool.submit(analyze_preview_bytes, content)
+        except Exception:
+            pass
+
+    # Paroles pendant que le process worker décode l'audio
+    text = None
+    if with_lyrics:
+        lyrics_text = fetch_lyrics(name, track["name"])
+        if lyrics_text:
+            text = analyze_lyrics(lyrics_text)
+            mood_label, _, subj_label, _, rich_label, _ = interpret_lyrics_profile(
+                text["text_polarity"], text["subjectivity"], text["mtld"]
+            )
+            row.update({
+                "lyrics_found": True,
+                "detected_lang": text["detected_lang"],
+                "text_polarity": text["text_polarity"],
+                "subjectivity": text["subjectivity"],
+                "vocab_size": text["vocab_size"],
+                "mtld": text["mtld"],
+                "hdd": text["hdd"],
+                "rhyme_density": text["rhyme_density"],
+                "common_word_share": text["common_word_share"],
+                "hook": text["hook"],
+                "repetition_ratio": text["repetition_ratio"],
+                "mood_label": mood_label,
+                "subjectivity_label": subj_label,
+                "richness_label": rich_label,
+            })
+
+    audio = audio_future.result() if audio_future is not None else None
+    if audio:
+        row.update(audio)
+        row.update({
+            "preview_found": True,
+            "tempo_label": classify_tempo(audio["tempo"])[0],
+            "energy_label": classify_energy(audio["avg_energy"])[0],
+            "brightness_label": classify_brightness(audio["avg_centroid"])[0],
+            "dynamic_label": classify_dynamic(audio["dynamic_range"])[0],
+        })
+
+    diss_score, diss_label, _ = interpret_dissonance(
+        audio["audio_mood"] if audio else None,
+        text["text_polarity"] if text else None,
+    )
+    row["dissonance"] = diss_score
+    row["dissonance_label"] = diss_label
+    return row
+
+
+def audit_artist(query: str, cpu_pool, max_tracks: int = 10, with_lyrics: bool = True) -> list:
+    """Lignes de sortie (artiste + titres) pour une entrée du fichier."""
+    artist = search_best_artist(query)
+    audited_at = time.time()
+    if artist is None:
+        return [{"row_type": "artist", "input": query, "error": "artist_not_found",
+                 "audited_at": audited_at}]
+
+    record_artist_snapshot(artist)
+
+    genres = artist.get("genres", [])
+    base = {"input": query, "artist_id": artist["id"], "artist_name": artist["name"]}
+
+    df_timeline = build_release_timeline(get_artist_albums(artist["id"]))
+    cadence = release_cadence(df_timeline) if not df_timeline.empty else {}
+    tags = get_lastfm_artist_tags(artist["name"], limit=15)
+    similar = get_lastfm_similar_artists(artist["name"], limit=8)
+
+    artist_row = {
+        **base,
+        "row_type": "artist",
+        "popularity": artist.get("popularity"),
+        "followers": (artist.get("followers") or {}).get("total"),
+        "genres": "|".join(genres),
+        "popularity_label": interpret_spotify_popularity(artist.get("popularity"))[0],
+        "genre_label": interpret_genre_clarity(genres)[0],
+        "n_releases": int(len(df_timeline)),
+        **cadence,
+        "top_tags": "|".join(t.get("name", "") for t in tags),
+        "similar_artists": "|".join(a.get("name", "") for a in similar),
+        "audited_at": audited_at,
+    }
+
+    rows = [artist_row]
+    tracks = get_artist_top_tracks(artist["id"])[:max_tracks]
+    previews = resolve_itunes_previews(tracks, artist_name=artist["name"])
+    for track in tracks:
+        try:
+            rows.append(_track_row(base, artist, track, previews.get(track.get("id")), cpu_pool, with_lyrics))
+        except Exception as exc:
+            rows.append({**base, "row_type": "track", "track_id": track.get("id"),
+                         "track_name": track.get("name"), "error": f"{type(exc).__name__}: {exc}"})
+    return rows
+
+
+def _audit_artist_background(*args) -> list:
+    """audit_artist en priorité "fond" : l'app interactive reste servie en premier."""
+    with background_priority():
+        return audit_artist(*args)
+
+
+# ---------------------------------------------------------
+# Orchestration + checkpoints
+# ---------------------------------------------------------
+
+def _load_checkpoint(path: str) -> set:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {l.rstrip("\n") for l in f if l.strip()}
+    except OSError:
+        return set()
+
+
+def parquet_path_for(jsonl_path: str) -> str:
+    """audit.jsonl -> audit.parquet"""
+    return os.path.splitext(jsonl_path)[0] + ".parquet"
+
+
+def parquet_engine_available() -> bool:
+    return any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+
+
+def write_parquet(jsonl_path: str, parquet_path: str):
+    """Conversion finale JSONL -> Parquet (doublons de reprise retirés)."""
+    df = pd.read_json(jsonl_path, lines=True)
+    if df.empty:
+        return
+    key_cols = [c for c in ("row_type", "input", "track_id") if c in df.columns]
+    df = df.drop_duplicates(subset=key_cols, keep="last")
+    df.to_parquet(parquet_path, index=False)
+
+
+def run_batch(inputs: list, output: str, threads: int = 8, procs: int = None,
+              max_tracks: int = 10, with_lyrics: bool = True, log=print) -> int:
+    """
+    Audite toutes les entrées non encore présentes dans le checkpoint.
+    Retourne le nombre d'entrées traitées lors de cet appel.
+    """
+    checkpoint_path = output + ".checkpoint"
+    done = _load_checkpoint(checkpoint_path)
+    todo = [q for q in inputs if q not in done]
+    log(f"{len(inputs)} entrées, {len(done & set(inputs))} déjà traitées, {len(todo)} à traiter.")
+    if not todo:
+        return 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    n_done = 0
+    t0 = time.time()
+
+    with ProcessPoolExecutor(max_workers=procs) as cpu_pool, \
+            ThreadPoolExecutor(max_workers=threads) as io_pool, \
+            open(output, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as ckpt:
+        futures = {
+            io_pool.submit(_audit_artist_background, q, cpu_pool, max_tracks, with_lyrics): q
+            for q in todo
+        }
+        for fut in as_completed(futures):
+            query = futures[fut]
+            try:
+                rows = fut.result()
+            except Exception as exc:
+                # Erreur inattendue : pas de checkpoint, l'entrée sera retentée
+                log(f"[erreur] {query} : {type(exc).__name__}: {exc}")
+                continue
+
+            for row in rows:
+                out.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            # Checkpoint seulement une fois les lignes écrites
+            ckpt.write(query + "\n")
+            ckpt.flush()
+
+            n_done += 1
+            if n_done % 25 == 0 or n_done == len(todo):
+                rate = n_done / max(time.time() - t0, 1e-9)
+                log(f"{n_done}/{len(todo)} artistes ({rate * 3600:.0f}/h)")
+
+    return n_done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m radar.batch_audit",
+        description="Audit artiste + Labo en batch (sans UI).",
+    )
+    parser.add_argument("inputs", help="Fichier texte : un artiste (nom, ID ou lien Spotify) par ligne.")
+    parser.add_argument("-o", "--output", required=True, help="Fichier JSONL de sortie (ajout + reprise).")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Écrire aussi la sortie en Parquet à la fin (audit.jsonl -> audit.parquet ; pyarrow).")
+    parser.add_argument("--threads", type=int, default=8, help="Artistes traités en parallèle (I/O).")
+    parser.add_argument("--procs", type=int, default=None, help="Process d'analyse audio (défaut : nb CPU).")
+    parser.add_argument("--tracks", type=int, default=10, help="Top titres analysés par artiste.")
+    parser.add_argument("--no-lyrics", action="store_true", help="Ne pas récupérer / analyser les paroles.")
+    args = parser.parse_args(argv)
+    # Avant le batch (des heures) plutôt qu'à l'étape Parquet finale
+    if args.parquet and not parquet_engine_available():
+        parser.error("--parquet nécessite pyarrow (pip install pyarrow) ou fastparquet.")
+
+    inputs = read_inputs(args.inputs)
+    run_batch(
+        inputs,
+        args.output,
+        threads=args.threads,
+        procs=args.procs,
+        max_tracks=args.tracks,
+        with_lyrics=not args.no_lyrics,
+    )
+
+    if args.parquet:
+        parquet_path = parquet_path_for(args.output)
+        write_parquet(args.output, parquet_path)
+        print(f"Parquet écrit : {parquet_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
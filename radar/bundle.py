@@ -0,0 +1,447 @@
+# =========================================================
+# BUNDLES HORS-LIGNE (export + mode dashboard sans API)
+# =========================================================
+"""
+Un bundle = un seul fichier local (.radar) avec tout ce que les pages affichent
+pour un ensemble d'artistes, pour une session dashboard sans réseau (démo,
+rendez-vous label, machine sans clés API) :
+
+- snapshots (métadonnées, sorties, top titres, tags / similaires Last.fm,
+  descripteurs audio des previews),
+- waveforms d'affichage (float16),
+- paroles des top titres + analyse complète (radar.text : lignes, strophes,
+  profil lexical),
+- catalogue (dissonance sur tous les titres) et historique popularité / followers.
+
+Format (petit-boutiste) :
+    b"RADARBDL" | version u32 | taille du manifeste u64
+    manifeste JSON compressé (zlib)
+    bourrage jusqu'à un multiple de ARRAY_ALIGN
+    tableaux numériques bruts, chacun aligné sur ARRAY_ALIGN octets
+
+Le manifeste référence les tableaux ({"$array": nom}) et les DataFrames
+({"$frame": colonnes}). À l'ouverture, le fichier est mappé en mémoire (mmap) :
+seul le manifeste est lu, les tableaux d'un artiste sont vus sans copie
+(np.frombuffer sur le mmap) au premier accès.
+
+Mode hors-ligne (activate() ou RADAR_OFFLINE_BUNDLE=chemin) : radar.ratelimit.call
+refuse tout appel sortant (ProviderUnavailable -> dernières valeurs / défauts),
+snapshots, paroles et catalogue sont servis par le bundle, sans limite d'âge.
+
+En ligne de commande :
+    python -m radar.bundle export --out roster.radar              (watchlist)
+    python -m radar.bundle export --out demo.radar <artist_id> ...
+    python -m radar.bundle info roster.radar
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from radar import ratelimit
+from radar.config import data_path, get_secret
+from radar.tracing import propagate, span
+
+
+BUNDLE_MAGIC = b"RADARBDL"
+BUNDLE_VERSION = 1
+BUNDLE_EXT = ".radar"
+ARRAY_ALIGN = 64
+WAVEFORM_DTYPE = np.float16
+
+_HEADER = struct.Struct("<8sIQ")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ARRAY_ALIGN) * ARRAY_ALIGN
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Non sérialisable : {type(obj).__name__}")
+
+
+def bundles_dir() -> str:
+    return os.path.dirname(data_path("bundles", "x" + BUNDLE_EXT))
+
+
+def list_bundles() -> list:
+    """Bundles de DATA_DIR/bundles/, du plus récent au plus ancien."""
+    root = bundles_dir()
+    paths = [os.path.join(root, f) for f in os.listdir(root) if f.endswith(BUNDLE_EXT)]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+# ---------------------------------------------------------
+# Écriture
+# ---------------------------------------------------------
+
+class _ArrayWriter:
+    """Tableaux à écrire dans la zone binaire ; encode() remplace tableaux et DataFrames par des références."""
+
+    def __init__(self):
+        self.arrays = {}
+
+    def add(self, name: str, array) -> dict:
+        self.arrays[name] = np.ascontiguousarray(array)
+        return {"$array": name}
+
+    def frame(self, name: str, df: pd.DataFrame) -> dict:
+        data = {}
+        for col in df.columns:
+            values = df[col].to_numpy()
+            if values.dtype == np.float64:
+                values = values.astype(np.float32)
+            if values.dtype.kind in "biufM":
+                data[str(col)] = self.add(f"{name}/{col}", values)
+            else:
+                data[str(col)] = df[col].tolist()
+        return {"$frame": {"columns": [str(c) for c in df.columns], "data": data}}
+
+    def encode(self, obj, name: str):
+        if isinstance(obj, pd.DataFrame):
+            return self.frame(name, obj)
+        if isinstance(obj, np.ndarray):
+            return self.add(name, obj)
+        if isinstance(obj, dict):
+            return {k: self.encode(v, f"{name}/{k}") for k, v in obj.items()}
+        return obj
+
+
+def write_bundle(path: str, manifest: dict, arrays: dict) -> int:
+    """Écriture atomique du fichier ; retourne sa taille en octets."""
+    index, offset = {}, 0
+    for name, a in arrays.items():
+        offset = _align(offset)
+        index[name] = {"offset": offset, "dtype": a.dtype.str, "shape": list(a.shape)}
+        offset += a.nbytes
+    raw = json.dumps({**manifest, "arrays": index}, ensure_ascii=False, default=_json_default)
+    raw = zlib.compress(raw.encode("utf-8"), 9)
+    data_start = _align(_HEADER.size + len(raw))
+
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(raw)))
+        f.write(raw)
+        for name, a in arrays.items():
+            f.seek(data_start + index[name]["offset"])
+            f.write(a.tobytes())
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _slim_features(writer: _ArrayWriter, artist_id: str, features: dict) -> dict:
+    """track_features avec les waveforms en tableaux float16."""
+    out = {}
+    for track_id, f in (features or {}).items():
+        audio = (f or {}).get("audio")
+        if audio and audio.get("waveform") is not None:
+            waveform = np.asarray(audio["waveform"], dtype=WAVEFORM_DTYPE)
+            audio = {**audio, "waveform": writer.add(f"wave/{artist_id}/{track_id}", waveform)}
+        out[track_id] = {**(f or {}), "audio": audio}
+    return out
+
+
+def _lyrics_entry(artist_name: str, title: str) -> dict:
+    from radar.corpus import fetch_lyrics
+    from radar.text import analyze_lyrics
+
+    text = fetch_lyrics(artist_name, title)
+    if not text:
+        return None
+    return {"title": title, "text": text, "analysis": analyze_lyrics(text)}
+
+
+def export_bundle(artist_ids: list, path: str, lyrics: bool = True, refresh_missing: bool = True,
+                  workers: int = 8, progress=None) -> dict:
+    """
+    Exporte les artistes `artist_ids` dans le bundle `path`.
+    Snapshot absent : recalculé (refresher) si `refresh_missing`, sinon artiste ignoré.
+    `progress(done, total)` est appelé après chaque artiste.
+    Retourne {"path", "artists", "skipped", "arrays", "bytes", "seconds"}.
+    """
+    from radar.catalogue import load_catalogue
+    from radar.corpus import fold
+    from radar.refresher import refresh_artist
+    from radar.snapshots import load_artist_snapshot
+    from radar.timeseries import get_timeseries_store
+
+    t0 = time.perf_counter()
+    writer = _ArrayWriter()
+    artists, skipped = {}, []
+    artist_ids = list(dict.fromkeys(artist_ids))
+
+    with span("bundle.export", artists=len(artist_ids)) as s, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="radar-bundle") as pool:
+        for done, artist_id in enumerate(artist_ids, start=1):
+            snapshot = load_artist_snapshot(artist_id)
+            if snapshot is None and refresh_missing:
+                try:
+                    snapshot = refresh_artist(artist_id)
+                except Exception:
+                    snapshot = None
+            if snapshot is None:
+                skipped.append(artist_id)
+                continue
+
+            name = snapshot["artist"]["name"]
+            entry = {
+                "snapshot": {**snapshot, "track_features": _slim_features(
+                    writer, artist_id, snapshot.get("track_features"))},
+                "catalogue": load_catalogue(artist_id),
+                "lyrics": {},
+            }
+            if lyrics:
+                titles = list(dict.fromkeys(t["name"] for t in snapshot.get("top_tracks") or []))
+                found = pool.map(propagate(lambda title: _lyrics_entry(name, title)), titles)
+                for title, item in zip(titles, found):
+                    if item is not None:
+                        entry["lyrics"][fold(title)] = writer.encode(item, f"lyrics/{artist_id}/{fold(title)}")
+            artists[artist_id] = entry
+            if progress is not None:
+                progress(done, len(artist_ids))
+
+        history = get_timeseries_store().query(list(artists), freq=None)
+        manifest = {
+            "created_at": time.time(),
+            "artists": artists,
+            "history": writer.frame("history", history),
+        }
+        size = write_bundle(path, manifest, writer.arrays)
+        s.set(bytes=size, arrays=len(writer.arrays), skipped=len(skipped))
+
+    return {
+        "path": path,
+        "artists": len(artists),
+        "skipped": skipped,
+        "arrays": len(writer.arrays),
+        "bytes": size,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# ---------------------------------------------------------
+# Lecture (mmap)
+# ---------------------------------------------------------
+
+class Bundle:
+    """Bundle ouvert : manifeste en mémoire, tableaux lus sans copie depuis le mmap."""
+
+    def __init__(self, path: str):
+        from radar.corpus import fold
+
+        self._fold = fold
+        self.path = path
+        with span("bundle.open") as s:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mmap) < _HEADER.size:
+                raise ValueError(f"Bundle tronqué : {path}")
+            magic, version, size = _HEADER.unpack_from(self._mmap, 0)
+            if magic != BUNDLE_MAGIC:
+                raise ValueError(f"Pas un bundle radar : {path}")
+            if version != BUNDLE_VERSION:
+                raise ValueError(f"Version de bundle non supportée : {version} (attendue {BUNDLE_VERSION})")
+            manifest = json.loads(zlib.decompress(self._mmap[_HEADER.size:_HEADER.size + size]))
+            self._data_start = _align(_HEADER.size + size)
+            self._index = manifest.pop("arrays")
+            self._artists = manifest.pop("artists")
+            self._history = manifest.pop("history")
+            self.meta = manifest
+            s.set(bytes=len(self._mmap), artists=len(self._artists))
+
+        self._decoded = {}
+        self._lock = threading.Lock()
+        self._by_name = {fold(a["snapshot"]["artist"]["name"]): artist_id for artist_id, a in self._artists.items()}
+
+    # ----------------------------- décodage
+    def array(self, name: str) -> np.ndarray:
+        """Tableau `name` en lecture seule, vu directement dans le mmap."""
+        meta = self._index[name]
+        dtype = np.dtype(meta["dtype"])
+        count = int(np.prod(meta["shape"], dtype=np.int64))
+        a = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._data_start + meta["offset"])
+        return a.reshape(meta["shape"])
+
+    def _decode(self, obj):
+        if isinstance(obj, dict):
+            if "$array" in obj:
+                return self.array(obj["$array"])
+            if "$frame" in obj:
+                f = obj["$frame"]
+                return pd.DataFrame({c: self._decode(f["data"][c]) for c in f["columns"]}, columns=f["columns"])
+            return {k: self._decode(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self._decode(v) for v in obj]
+        return obj
+
+    def _artist(self, artist_id: str):
+        with self._lock:
+            hit = self._decoded.get(artist_id)
+            if hit is None and artist_id in self._artists:
+                with span("bundle.decode", artist=artist_id):
+                    hit = self._decoded[artist_id] = self._decode(self._artists[artist_id])
+            return hit
+
+    # ----------------------------- accès
+    def __len__(self):
+        return len(self._artists)
+
+    def __contains__(self, artist_id: str):
+        return artist_id in self._artists
+
+    def artists(self) -> list:
+        """Fiches artiste {id, name, genres, followers, popularity, image, url}, par nom."""
+        return sorted((a["snapshot"]["artist"] for a in self._artists.values()), key=lambda a: a["name"])
+
+    def snapshot(self, artist_id: str):
+        entry = self._artist(artist_id)
+        return entry["snapshot"] if entry else None
+
+    def catalogue(self, artist_id: str):
+        entry = self._artist(artist_id)
+        return entry["catalogue"] if entry else None
+
+    def lyrics(self, artist_name: str, track_title: str):
+        """{"title", "text", "analysis"} d'un top titre, None s'il n'est pas dans le bundle."""
+        artist_id = self._by_name.get(self._fold(artist_name))
+        entry = self._artist(artist_id) if artist_id else None
+        return entry["lyrics"].get(self._fold(track_title)) if entry else None
+
+    def history(self, artist_ids: list = None) -> pd.DataFrame:
+        """Historique [artist_id, date, popularity, followers] exporté (brut)."""
+        df = self._decode(self._history)
+        if artist_ids is not None:
+            df = df[df["artist_id"].isin(artist_ids)].reset_index(drop=True)
+        return df
+
+    def search(self, query: str):
+        """
+        Artiste du bundle pour une requête (ID / lien Spotify, nom exact, début ou
+        partie du nom), au format Spotify de radar.sources.search_best_artist. None sinon.
+        """
+        if not query:
+            return None
+        artist_id = next((a for a in self._artists if a in query), None)
+        if artist_id is None:
+            q = self._fold(query)
+            names = self._by_name
+            if q in names:
+                key = q
+            else:
+                key = (next((n for n in names if n.startswith(q)), None)
+                       or next((n for n in names if q in n), None))
+            artist_id = names.get(key)
+        if artist_id is None:
+            return None
+        a = self._artists[artist_id]["snapshot"]["artist"]
+        return {
+            "id": a["id"],
+            "name": a["name"],
+            "genres": a.get("genres") or [],
+            "followers": {"total": a.get("followers")},
+            "popularity": a.get("popularity"),
+            "images": [{"url": a["image"]}] if a.get("image") else [],
+            "external_urls": {"spotify": a.get("url")},
+        }
+
+    def stats(self) -> dict:
+        return {
+            "artists": len(self._artists),
+            "arrays": len(self._index),
+            "bytes": len(self._mmap),
+            "created_at": self.meta.get("created_at"),
+        }
+
+
+# ---------------------------------------------------------
+# Mode hors-ligne
+# ---------------------------------------------------------
+
+_active = None
+_active_lock = threading.Lock()
+
+
+def active_bundle():
+    """Bundle du mode hors-ligne, None en mode connecté."""
+    return _active
+
+
+def activate(path: str) -> Bundle:
+    """Ouvre `path` et passe le process en mode hors-ligne (aucun appel API sortant)."""
+    global _active
+    bundle = Bundle(path)
+    with _active_lock:
+        _active = bundle
+    ratelimit.set_offline(f"mode hors-ligne ({os.path.basename(path)})")
+    return bundle
+
+
+def deactivate():
+    global _active
+    with _active_lock:
+        _active = None
+    ratelimit.set_offline(None)
+
+
+def install_from_env():
+    """Active le mode hors-ligne si RADAR_OFFLINE_BUNDLE est défini (idempotent). Retourne le bundle ou None."""
+    path = get_secret("RADAR_OFFLINE_BUNDLE")
+    if not path or _active is not None:
+        return _active
+    return activate(path)
+
+
+# ---------------------------------------------------------
+# CLI
+# ---------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundles hors-ligne du dashboard.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="exporte des artistes (watchlist par défaut)")
+    p_export.add_argument("artist_ids", nargs="*")
+    p_export.add_argument("--out", required=True)
+    p_export.add_argument("--no-lyrics", action="store_true")
+    p_export.add_argument("--no-refresh", action="store_true", help="ignore les artistes sans snapshot local")
+    p_info = sub.add_parser("info", help="contenu d'un bundle")
+    p_info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        artist_ids = args.artist_ids
+        if not artist_ids:
+            from radar.refresher import load_watchlist
+
+            artist_ids = [e.artist_id for e in load_watchlist()[0]]
+        report = export_bundle(
+            artist_ids, args.out, lyrics=not args.no_lyrics, refresh_missing=not args.no_refresh,
+            progress=lambda done, total: print(f"{done}/{total}", end="\r"),
+        )
+        print(f"{report['artists']} artiste(s), {report['arrays']} tableaux, "
+              f"{report['bytes'] / 1e6:.2f} Mo en {report['seconds']:.1f} s -> {report['path']}")
+        if report["skipped"]:
+            print(f"ignorés (pas de snapshot) : {', '.join(report['skipped'])}")
+    else:
+        bundle = Bundle(args.path)
+        print(bundle.stats())
+        for a in bundle.artists():
+            print(f"{a['id']}  {a['name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# =========================================================
+# CATALOGUE D'UN ARTISTE (dissonance son / texte par titre)
+# =========================================================
+"""
+Descripteurs audio + sentiment des paroles pour tous les titres d'un artiste
+(albums + singles), stockés dans DATA_DIR/catalogue/<artist_id>.json :
+
+    {"artist_id", "artist_name", "updated_at",
+     "tracks": {track_id: {name, album_id, album, album_type, release_date,
+                           track_number, audio, text_polarity, has_lyrics, analyzed_at}}}
+
+- build_catalogue() complète le store de façon incrémentale (seuls les titres
+  absents sont analysés : iTunes + librosa en pool de process, paroles via le
+  corpus local, polarité en un appel vectorisé), en priorité "fond" ; un titre
+  incomplet (audio ou paroles manquants) est retenté après INCOMPLETE_RETRY_S,
+- catalogue_frame() / dissonance_matrix() / album_trend() ne lisent que le
+  store (+ les descripteurs du snapshot) : affichage immédiat, sans réseau.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from radar.audio import AUDIO_SUMMARY_FIELDS, analyze_preview_bytes, download_preview
+from radar.bundle import active_bundle
+from radar.config import data_path
+from radar.corpus import fetch_lyrics, fold
+from radar.interpret import dissonance_components
+from radar.itunes_map import resolve_itunes_previews
+from radar.markets import DEFAULT_MARKETS, get_albums_multi
+from radar.ratelimit import background_priority
+from radar.sources import get_album_tracks
+from radar.text import lyrics_polarities
+from radar.tracing import propagate, span, traced
+
+
+CATALOGUE_MAX_TRACKS = 200
+INCOMPLETE_RETRY_S = 24 * 3600
+FRAME_COLUMNS = [
+    "track_id", "track", "album_id", "album", "album_type", "release_date", "track_number",
+    *AUDIO_SUMMARY_FIELDS, "text_polarity", "has_audio", "has_lyrics",
+]
+
+
+# ---------------------------------------------------------
+# Store
+# ---------------------------------------------------------
+
+def catalogue_path(artist_id: str) -> str:
+    return data_path("catalogue", f"{artist_id}.json")
+
+
+def load_catalogue(artist_id: str) -> dict:
+    """Store d'un artiste (vide s'il n'existe pas encore ; celui du bundle en mode hors-ligne)."""
+    bundle = active_bundle()
+    if bundle is not None and artist_id in bundle:
+        return bundle.catalogue(artist_id)
+    try:
+        with open(catalogue_path(artist_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"artist_id": artist_id, "tracks": {}, "updated_at": None}
+
+
+def save_catalogue(catalogue: dict):
+    path = catalogue_path(catalogue["artist_id"])
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(catalogue, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------
+# Construction (réseau + CPU)
+# ---------------------------------------------------------
+
+def list_catalogue_tracks(artist_id: str, max_tracks: int = CATALOGUE_MAX_TRACKS, io_workers: int = 8) -> list:
+    """
+    Titres de l'artiste sur toutes ses sorties (marchés RADAR_MARKETS). Un titre présent
+    sur un single puis sur un album est gardé une fois (version album, sinon la plus ancienne).
+    """
+    albums = [a for a in get_albums_multi(artist_id) if a.get("id")]
+    # Pistes lues sur un marché où la sortie est disponible (sinon relinkées / injouables)
+    with ThreadPoolExecutor(max_workers=io_workers) as pool:
+        album_tracks = list(pool.map(
+            propagate(lambda a: get_album_tracks(a["id"], market=(a.get("markets") or DEFAULT_MARKETS)[0])),
+            albums,
+        ))
+
+    releases = sorted(
+        zip(albums, album_tracks),
+        key=lambda r: (r[0].get("album_type") != "album", r[0].get("release_date") or ""),
+    )
+    seen, out = set(), []
+    for album, items in releases:
+        for t in items:
+            key = fold(t.get("name"))
+            if not t.get("id") or key in seen:
+                continue
+            if not any(a.get("id") == artist_id for a in t.get("artists", [])):
+                continue
+            seen.add(key)
+            out.append({
+                "id": t["id"],
+                "name": t.get("name"),
+                "track_number": t.get("track_number"),
+                "album_id": album["id"],
+                "album": album.get("name"),
+                "album_type": album.get("album_type"),
+                "release_date": album.get("release_date"),
+            })
+    return out[:max_tracks]
+
+
+def _fetch_inputs(artist_name: str, track: dict, itunes_data: dict) -> dict:
+    """Partie I/O d'un titre : binaire du preview iTunes (déjà résolu) + paroles."""
+    out = {"content": None, "lyrics": None}
+    if itunes_data and itunes_data.get("preview_url"):
+        try:
+            out["content"] = download_preview(itunes_data["preview_url"])
+        except Exception:
+            pass
+    try:
+        out["lyrics"] = fetch_lyrics(artist_name, track["name"])
+    except Exception:
+        pass
+    return out
+
+
+def _is_complete(entry: dict) -> bool:
+    return bool(entry and entry.get("audio") and entry.get("has_lyrics"))
+
+
+def _needs_analysis(entry: dict, now: float) -> bool:
+    """Titre jamais analysé, ou incomplet et dont le délai de nouvel essai est passé."""
+    if not entry:
+        return True
+    return not _is_complete(entry) and entry.get("retry_after", 0) <= now
+
+
+def _merge_entry(old: dict, new: dict, now: float) -> dict:
+    """Nouvelle analyse d'un titre, sans perdre ce que l'ancienne avait obtenu ; marque les incomplets."""
+    old = old or {}
+    # `is not None` : une polarité neutre (0.0) est une vraie valeur
+    merged = {**old, **{k: v for k, v in new.items() if v is not None}}
+    merged.setdefault("audio", None)
+    merged.setdefault("text_polarity", None)
+    merged["has_lyrics"] = bool(old.get("has_lyrics") or new.get("has_lyrics"))
+    merged.pop("retry_after", None)
+    if not _is_complete(merged):
+        merged["retry_after"] = now + INCOMPLETE_RETRY_S
+    return merged
+
+
+@traced("catalogue.build")
+def build_catalogue(artist_id: str, artist_name: str, max_tracks: int = CATALOGUE_MAX_TRACKS,
+                    io_workers: int = 8, cpu_workers: int = None, progress=None) -> dict:
+    """
+    Complète (et enregistre) le store de l'artiste : seuls les titres absents, ou
+    incomplets depuis plus de INCOMPLETE_RETRY_S, sont analysés.
+    `progress(done, total)` est appelé après chaque titre.
+    """
+    with background_priority():
+        catalogue = load_catalogue(artist_id)
+        catalogue["artist_name"] = artist_name
+        tracks = list_catalogue_tracks(artist_id, max_tracks=max_tracks)
+        now = time.time()
+        missing = [t for t in tracks if _needs_analysis(catalogue["tracks"].get(t["id"]), now)]
+        if progress:
+            progress(0, len(missing))
+        # Previews de tous les titres d'un coup (table de correspondance + lookup groupé)
+        previews = resolve_itunes_previews(missing, artist_name=artist_name, workers=io_workers)
+
+        entries, lyrics, done = {}, {}, 0
+        with ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+            io_futures = {
+                io_pool.submit(propagate(_fetch_inputs), artist_name, t, previews.get(t["id"])): t
+                for t in missing
+            }
+            audio_futures = {}
+            for fut in as_completed(io_futures):
+                track = io_futures[fut]
+                try:
+                    inputs = fut.result()
+                except Exception:
+                    inputs = {"content": None, "lyrics": None}
+                entries[track["id"]] = {**{k: v for k, v in track.items() if k != "id"},
+                                        "audio": None, "text_polarity": None,
+                                        "has_lyrics": bool(inputs["lyrics"]), "analyzed_at": time.time()}
+                lyrics[track["id"]] = inputs["lyrics"]
+                if inputs["content"]:
+                    audio_futures[cpu_pool.submit(analyze_preview_bytes, inputs["content"])] = track["id"]
+                else:
+                    done += 1
+                    if progress:
+                        progress(done, len(missing))
+
+            ids = list(lyrics)
+            for track_id, polarity in zip(ids, lyrics_polarities([lyrics[i] for i in ids])):
+                entries[track_id]["text_polarity"] = polarity
+
+            for fut in as_completed(audio_futures):
+                try:
+                    entries[audio_futures[fut]]["audio"] = fut.result()
+                except Exception:
+                    pass
+                done += 1
+                if progress:
+                    progress(done, len(missing))
+
+        now = time.time()
+        catalogue["tracks"].update({
+            track_id: _merge_entry(catalogue["tracks"].get(track_id), entry, now)
+            for track_id, entry in entries.items()
+        })
+        catalogue["updated_at"] = now
+        save_catalogue(catalogue)
+    return catalogue
+
+
+# ---------------------------------------------------------
+# Lecture + dissonance (store uniquement)
+# ---------------------------------------------------------
+
+def catalogue_frame(catalogue: dict, snapshot: dict = None) -> pd.DataFrame:
+    """
+    Une ligne par titre (colonnes FRAME_COLUMNS). Les descripteurs audio des top
+    titres du snapshot complètent les titres sans audio dans le store.
+    """
+    snap_audio = {
+        track_id: f["audio"]
+        for track_id, f in ((snapshot or {}).get("track_features") or {}).items()
+        if f and f.get("audio")
+    }
+    rows = []
+    for track_id, t in catalogue.get("tracks", {}).items():
+        audio = t.get("audio") or snap_audio.get(track_id) or {}
+        rows.append({
+            "track_id": track_id,
+            "track": t.get("name"),
+            "album_id": t.get("album_id"),
+            "album": t.get("album"),
+            "album_type": t.get("album_type"),
+            "release_date": t.get("release_date"),
+            "track_number": t.get("track_number"),
+            **{k: audio.get(k) for k in AUDIO_SUMMARY_FIELDS},
+            "text_polarity": t.get("text_polarity"),
+            "has_audio": bool(audio),
+            "has_lyrics": bool(t.get("has_lyrics")),
+        })
+    df = pd.DataFrame(rows, columns=FRAME_COLUMNS)
+    # Dates Spotify à l'année ("2012") ou au mois ("2015-06") selon la sortie
+    df["release_date"] = pd.to_datetime(df["release_date"], format="ISO8601", errors="coerce")
+    for col in [*AUDIO_SUMMARY_FIELDS, "text_polarity"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def dissonance_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute text_valence, gap et dissonance (NaN si l'audio ou le texte manque)."""
+    with span("catalogue.dissonance", tracks=len(df)):
+        components = dissonance_components(df["audio_mood"].to_numpy(), df["text_polarity"].to_numpy())
+        return df.assign(**components)
+
+
+def album_trend(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dissonance moyenne par sortie, dans l'ordre chronologique, + moyenne glissante
+    sur 3 sorties (tendance). Colonnes : album, release_date, n_tracks, dissonance, gap, trend.
+    """
+    scored = df.dropna(subset=["dissonance"])
+    if scored.empty:
+        return pd.DataFrame(columns=["album", "release_date", "n_tracks", "dissonance", "gap", "trend"])
+    trend = (
+        scored.groupby(["album_id", "album", "release_date"], dropna=False)
+        .agg(n_tracks=("track_id", "size"), dissonance=("dissonance", "mean"), gap=("gap", "mean"))
+        .reset_index()
+        .sort_values("release_date")
+        .drop(columns="album_id")
+    )
+    trend["trend"] = trend["dissonance"].rolling(3, min_periods=1).mean()
+    return trend.reset_index(drop=True)
+
+
+def heatmap_grid(df: pd.DataFrame) -> tuple:
+    """
+    Grille sortie × n° de piste pour la heatmap : (z, noms des titres, labels des sorties,
+    n° de pistes). Sorties par date de sortie, NaN là où la dissonance manque.
+    """
+    scored = df.dropna(subset=["track_number"]).copy()
+    if scored.empty:
+        return np.empty((0, 0)), np.empty((0, 0), dtype=object), [], []
+    scored["label"] = scored["release_date"].dt.strftime("%Y-%m").fillna("????") + " · " + scored["album"].fillna("")
+    order = scored.sort_values("release_date").drop_duplicates("album_id")
+    labels = order["label"].tolist()
+    numbers = sorted(int(n) for n in scored["track_number"].unique())
+
+    row_of = pd.Series(range(len(order)), index=order["album_id"].to_numpy())
+    col_of = pd.Series(range(len(numbers)), index=numbers)
+    r = row_of[scored["album_id"]].to_numpy()
+    c = col_of[scored["track_number"].astype(int)].to_numpy()
+
+    z = np.full((len(labels), len(numbers)), np.nan)
+    names = np.full((len(labels), len(numbers)), "", dtype=object)
+    z[r, c] = scored["dissonance"].to_numpy()
+    names[r, c] = scored["track"].fillna("").to_numpy()
+    return z, names, labels, numbers
@@ -0,0 +1,82 @@
+# =========================================================
+# CONFIGURATION (secrets + dossiers locaux)
+# =========================================================
+"""
+Configuration commune à l'app Streamlit et aux jobs hors UI.
+
+Ordre de résolution d'un secret :
+1. mapping enregistré via use_secrets() (st.secrets côté app),
+2. variable d'environnement du même nom,
+3. fichier .streamlit/secrets.toml à la racine du projet.
+"""
+
+import os
+import tomllib
+
+import spotipy
+from spotipy.oauth2 import SpotifyClientCredentials
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stores locaux (caches, séries temporelles, snapshots...)
+DATA_DIR = os.environ.get("RADAR_DATA_DIR", os.path.join(PROJECT_ROOT, ".radar_data"))
+
+_registered_secrets = None
+_toml_secrets = None
+
+
+def use_secrets(mapping):
+    """Enregistre une source de secrets prioritaire (ex : st.secrets)."""
+    global _registered_secrets
+    _registered_secrets = mapping
+
+
+def _load_toml_secrets() -> dict:
+    global _toml_secrets
+    if _toml_secrets is None:
+        path = os.path.join(PROJECT_ROOT, ".streamlit", "secrets.toml")
+        try:
+            with open(path, "rb") as f:
+                _toml_secrets = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError):
+            _toml_secrets = {}
+    return _toml_secrets
+
+
+def get_secret(name: str, default=None):
+    """Retourne la valeur d'un secret ou `default` s'il est introuvable."""
+    if _registered_secrets is not None:
+        try:
+            value = _registered_secrets.get(name)
+        except Exception:
+            value = None
+        if value is not None:
+            return value
+
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+
+    return _load_toml_secrets().get(name, default)
+
+
+def data_path(*parts: str) -> str:
+    """Chemin dans DATA_DIR (le dossier parent est créé si besoin)."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def make_spotify_client():
+    """Client Spotify (client credentials). Lève KeyError si les secrets manquent."""
+    client_id = get_secret("SPOTIPY_CLIENT_ID")
+    client_secret = get_secret("SPOTIPY_CLIENT_SECRET")
+    if not client_id or not client_secret:
+        raise KeyError("SPOTIPY_CLIENT_ID / SPOTIPY_CLIENT_SECRET manquants")
+    return spotipy.Spotify(
+        auth_manager=SpotifyClientCredentials(
+            client_id=client_id,
+            client_secret=client_secret,
+        )
+    )
@@ -0,0 +1,317 @@
+# =========================================================
+# CORPUS LOCAL DE PAROLES (+ index plein texte)
+# =========================================================
+"""
+Toutes les paroles récupérées (lyrics.ovh) ou collées à la main sont gardées
+dans DATA_DIR/lyrics.sqlite3 :
+
+- songs    : (artiste, titre) normalisés -> texte, source, date,
+- texts    : textes normalisés, compressés (zlib), dédupliqués par hash :
+             un remix / edit aux paroles identiques pointe sur le même texte,
+- terms / postings : index inversé (terme replié sans accents -> textes, tf),
+             mots outils exclus (radar.lexical.COMMON_WORDS).
+
+fetch_lyrics(artiste, titre) : corpus d'abord, sinon lyrics.ovh puis stockage.
+search(...) / artists_by_theme(...) : recherche par mots-clés sur tout le corpus
+(« quels artistes du roster parlent de 'nuit' ? »), classée en tf-idf.
+
+SQLite (WAL) : une connexion par thread, écritures sérialisées, lookups par
+clé primaire -> quelques ms même avec des millions de titres.
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+
+import pandas as pd
+
+from radar.bundle import active_bundle
+from radar.config import data_path
+from radar.lexical import COMMON_WORDS
+from radar.sources import get_any_lyrics
+from radar.tracing import span
+
+
+COMPRESSION_LEVEL = 6
+MIN_TERM_LEN = 2
+SNIPPET_MAX_CHARS = 160
+SQL_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    id INTEGER PRIMARY KEY,
+    sha1 TEXT NOT NULL UNIQUE,
+    body BLOB NOT NULL,
+    n_chars INTEGER NOT NULL,
+    n_terms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS songs (
+    artist_key TEXT NOT NULL,
+    track_key TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    track TEXT NOT NULL,
+    text_id INTEGER NOT NULL REFERENCES texts(id),
+    source TEXT,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (artist_key, track_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS songs_text ON songs(text_id);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE,
+    df INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    text_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term_id, text_id)
+) WITHOUT ROWID;
+"""
+
+
+# ---------------------------------------------------------
+# Normalisation
+# ---------------------------------------------------------
+
+def fold(s: str) -> str:
+    """Minuscules, sans accents, espaces compactés (clés + termes d'index)."""
+    s = s or ""
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.casefold().split())
+
+
+def normalize_lyrics(text: str) -> str:
+    """Texte stocké : NFC, fins de ligne unifiées, lignes nettoyées, au plus une ligne vide d'affilée."""
+    lines = [l.strip() for l in unicodedata.normalize("NFC", text or "").replace("\r\n", "\n").split("\n")]
+    out = []
+    for line in lines:
+        if line or (out and out[-1]):
+            out.append(line)
+    return "\n".join(out).strip()
+
+
+_FOLDED_COMMON = frozenset(fold(w) for w in COMMON_WORDS)
+
+
+def index_terms(text: str) -> dict:
+    """Terme replié -> nb d'occurrences (mots outils et termes trop courts exclus)."""
+    counts = {}
+    for term in re.findall(r"\w+", fold(text)):
+        if len(term) >= MIN_TERM_LEN and term not in _FOLDED_COMMON and not term.isdigit():
+            counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+# ---------------------------------------------------------
+# Store
+# ---------------------------------------------------------
+
+class LyricsCorpus:
+    def __init__(self, path: str = None):
+        self.path = path or data_path("lyrics.sqlite3")
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- écriture --------------------------------------------
+
+    def store(self, artist: str, track: str, text: str, source: str = None) -> int:
+        """Enregistre les paroles de (artiste, titre). Retourne l'id du texte (partagé si doublon)."""
+        return self.store_many([(artist, track, text)], source=source)[0]
+
+    def store_many(self, items: list, source: str = None) -> list:
+        """
+        Import en une transaction de [(artiste, titre, paroles)].
+        Retourne les ids de texte (None pour des paroles vides).
+        """
+        ids, new_texts = [], 0
+        with span("corpus.store", songs=len(items)) as s, self._write_lock:
+            conn = self._conn()
+            with conn:
+                for artist, track, text in items:
+                    body = normalize_lyrics(text)
+                    if not body:
+                        ids.append(None)
+                        continue
+                    sha1 = hashlib.sha1(body.encode("utf-8")).hexdigest()
+                    row = conn.execute("SELECT id FROM texts WHERE sha1 = ?", (sha1,)).fetchone()
+                    if row is not None:
+                        text_id = row[0]
+                    else:
+                        terms = index_terms(body)
+                        text_id = conn.execute(
+                            "INSERT INTO texts (sha1, body, n_chars, n_terms) VALUES (?, ?, ?, ?)",
+                            (sha1, zlib.compress(body.encode("utf-8"), COMPRESSION_LEVEL),
+                             len(body), sum(terms.values())),
+                        ).lastrowid
+                        self._index(conn, text_id, terms)
+                        new_texts += 1
+                    conn.execute(
+                        "INSERT OR REPLACE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (fold(artist), fold(track), artist, track, text_id, source, time.time()),
+                    )
+                    ids.append(text_id)
+            s.set(new_texts=new_texts, dedup=len(items) - new_texts)
+        return ids
+
+    @staticmethod
+    def _index(conn, text_id: int, terms: dict):
+        conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", ((t,) for t in terms))
+        words = list(terms)
+        ids = {}
+        # Par paquets : limite SQLite sur le nombre de paramètres
+        for i in range(0, len(words), SQL_BATCH):
+            chunk = words[i:i + SQL_BATCH]
+            marks = ",".join("?" * len(chunk))
+            ids.update(conn.execute(f"SELECT term, id FROM terms WHERE term IN ({marks})", chunk))
+            conn.execute(f"UPDATE terms SET df = df + 1 WHERE term IN ({marks})", chunk)
+        conn.executemany(
+            "INSERT INTO postings (term_id, text_id, tf) VALUES (?, ?, ?)",
+            ((ids[t], text_id, tf) for t, tf in terms.items()),
+        )
+
+    # -- lecture ---------------------------------------------
+
+    def get(self, artist: str, track: str):
+        """Paroles stockées pour (artiste, titre), ou None."""
+        row = self._conn().execute(
+            "SELECT t.body FROM songs s JOIN texts t ON t.id = s.text_id "
+            "WHERE s.artist_key = ? AND s.track_key = ?",
+            (fold(artist), fold(track)),
+        ).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def _text(self, text_id: int) -> str:
+        row = self._conn().execute("SELECT body FROM texts WHERE id = ?", (text_id,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else ""
+
+    def search(self, query: str, limit: int = 50, artists: list = None) -> pd.DataFrame:
+        """
+        Titres contenant tous les termes de `query`, classés en tf-idf.
+        Colonnes : artist, track, score, snippet. `artists` : filtre optionnel (roster).
+        """
+        columns = ["artist", "track", "score", "snippet"]
+        terms = list(index_terms(query))
+        if not terms:
+            return pd.DataFrame(columns=columns)
+
+        with span("corpus.search", terms=len(terms)) as s:
+            conn = self._conn()
+            n_texts = conn.execute("SELECT COUNT(*) FROM texts").fetchone()[0] or 1
+            term_rows = conn.execute(
+                f"SELECT id, df FROM terms WHERE term IN ({','.join('?' * len(terms))})", terms
+            ).fetchall()
+            if len(term_rows) < len(terms):
+                return pd.DataFrame(columns=columns)
+
+            # Terme le plus rare d'abord : ses postings sont les seuls candidats, les autres
+            # termes ne sont cherchés que pour eux (clé primaire (term_id, text_id))
+            term_rows.sort(key=lambda r: r[1])
+            idf = {tid: math.log(1 + n_texts / df) for tid, df in term_rows}
+            placeholders = ",".join("?" * len(term_rows))
+            sql = (
+                "SELECT p.text_id, SUM(p.tf * CASE p.term_id "
+                + " ".join(f"WHEN {tid} THEN {w!r}" for tid, w in idf.items())
+                + f" END) / (1 + t.n_terms / 100.0) AS score "
+                f"FROM postings p JOIN texts t ON t.id = p.text_id "
+                f"WHERE p.term_id IN ({placeholders}) "
+                f"AND p.text_id IN (SELECT text_id FROM postings WHERE term_id = ?) "
+                f"GROUP BY p.text_id HAVING COUNT(*) = ? "
+            )
+            params = [tid for tid, _ in term_rows] + [term_rows[0][0], len(term_rows)]
+
+            songs_sql = (
+                f"SELECT s.artist, s.track, m.score, m.text_id FROM ({sql}) m "
+                "JOIN songs s ON s.text_id = m.text_id"
+            )
+            if artists:
+                songs_sql += f" WHERE s.artist_key IN ({','.join('?' * len(artists))})"
+                params += [fold(a) for a in artists]
+            songs_sql += " ORDER BY m.score DESC LIMIT ?"
+            params.append(limit)
+
+            rows = conn.execute(songs_sql, params).fetchall()
+            s.set(hits=len(rows))
+
+        out = []
+        for artist, track, score, text_id in rows:
+            out.append((artist, track, round(score, 3), self._snippet(self._text(text_id), terms)))
+        return pd.DataFrame(out, columns=columns)
+
+    @staticmethod
+    def _snippet(text: str, terms: list) -> str:
+        for line in text.splitlines():
+            if any(t in fold(line) for t in terms):
+                return line[:SNIPPET_MAX_CHARS]
+        return ""
+
+    def artists_by_theme(self, query: str, artists: list = None, limit: int = 5000) -> pd.DataFrame:
+        """Artistes dont les paroles contiennent `query` : nb de titres et score cumulé."""
+        hits = self.search(query, limit=limit, artists=artists)
+        if hits.empty:
+            return pd.DataFrame(columns=["artist", "songs", "score", "example"])
+        return (
+            hits.groupby("artist")
+            .agg(songs=("track", "nunique"), score=("score", "sum"), example=("snippet", "first"))
+            .sort_values(["songs", "score"], ascending=False)
+            .reset_index()
+        )
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        songs, artists = conn.execute("SELECT COUNT(*), COUNT(DISTINCT artist_key) FROM songs").fetchone()
+        texts, raw, stored = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(n_chars), 0), COALESCE(SUM(LENGTH(body)), 0) FROM texts"
+        ).fetchone()
+        terms = conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        return {"songs": songs, "artists": artists, "texts": texts, "terms": terms,
+                "raw_chars": raw, "stored_bytes": stored}
+
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+def get_lyrics_corpus() -> LyricsCorpus:
+    """Instance partagée par le process (app, refresher, jobs)."""
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = LyricsCorpus()
+        return _corpus
+
+
+def fetch_lyrics(artist_name: str, track_title: str):
+    """Paroles depuis le bundle hors-ligne ou le corpus local, sinon lyrics.ovh (et stockage). None si introuvables."""
+    bundle = active_bundle()
+    entry = bundle.lyrics(artist_name, track_title) if bundle is not None else None
+    if entry:
+        return entry["text"]
+    corpus = get_lyrics_corpus()
+    with span("corpus.lookup") as s:
+        text = corpus.get(artist_name, track_title)
+        s.set(cache="hit" if text else "miss")
+    if text:
+        return text
+    text = get_any_lyrics(artist_name, track_title)
+    if text:
+        corpus.store(artist_name, track_title, text, source="lyrics.ovh")
+    return text
@@ -0,0 +1,195 @@
+# =========================================================
+# INTERPRÉTATIONS (labels + commentaires lisibles)
+# =========================================================
+"""
+Classifieurs heuristiques partagés par l'app et les jobs batch :
+chaque fonction renvoie un label court + un commentaire en clair.
+"""
+
+import numpy as np
+
+
+def classify_tempo(bpm: float):
+    if bpm is None:
+        return "Inconnu", "Tempo non estimé."
+    if bpm < 80:
+        return "Lent", "Plutôt adapté à des ambiances posées / introspectives."
+    elif bpm < 110:
+        return "Modéré", "Zone mid-tempo polyvalente (rap, pop, r&b)."
+    elif bpm < 140:
+        return "Rapide", "Énergie naturelle pour bangers, club, formats dynamiques."
+    else:
+        return "Très rapide", "Très intense, à manier avec soin pour ne pas fatiguer l’auditeur."
+
+
+def classify_energy(avg_energy: float):
+    if avg_energy is None:
+        return "Inconnue", "Énergie non mesurée."
+    if avg_energy < 0.15:
+        return "Faible", "Titre plutôt doux / retenu, peu de punch perçu."
+    elif avg_energy < 0.30:
+        return "Moyenne", "Énergie modérée, laisse de la place à la voix / au texte."
+    else:
+        return "Élevée", "Titre assez puissant / agressif, bonne base pour formats dynamiques."
+
+
+def classify_brightness(avg_centroid: float):
+    if avg_centroid is None:
+        return "Inconnue", "Brillance non mesurée."
+    if avg_centroid < 1500:
+        return "Sombre / chaud", "Spectre plutôt grave, ambiance feutrée ou lourde."
+    elif avg_centroid < 3500:
+        return "Équilibrée", "Équilibre entre graves et aigus, écoute confortable."
+    else:
+        return "Brillante", "Spectre très aigu, peut donner un côté agressif ou moderne."
+
+
+def classify_dynamic(dynamic_range: float):
+    if dynamic_range is None:
+        return "Inconnue", "Dynamique non mesurée."
+    if dynamic_range < 0.1:
+        return "Très compressée", "Peu de variation, son 'collé', ressenti fort mais fatigant."
+    elif dynamic_range < 0.25:
+        return "Modérée", "Bonne présence avec quelques respirations."
+    else:
+        return "Respirante", "Beaucoup de variations, plus organique mais moins 'radio ready'."
+
+
+def interpret_lyrics_profile(text_polarity: float, subjectivity: float, mtld: float):
+    """
+    Labels ton / subjectivité / richesse lexicale.
+    `mtld` : diversité lexicale MTLD (radar.lexical), indépendante de la longueur du titre.
+    """
+    # Mood
+    if text_polarity is None:
+        mood_label = "Inconnu"
+        mood_comment = "Impossible d'estimer le ton émotionnel du texte."
+    elif text_polarity < -0.25:
+        mood_label = "Sombre / négatif"
+        mood_comment = "Thèmes plutôt tristes, en colère ou mélancoliques."
+    elif text_polarity > 0.25:
+        mood_label = "Lumineux / positif"
+        mood_comment = "Thèmes plutôt optimistes, chaleureux ou confiants."
+    else:
+        mood_label = "Ambivalent / neutre"
+        mood_comment = "Mélange de positif et de négatif ou ton plus descriptif."
+
+    # Subjectivité
+    if subjectivity is None:
+        subj_label = "Inconnue"
+        subj_comment = "Subjectivité non mesurée."
+    elif subjectivity < 0.3:
+        subj_label = "Plutôt factuel"
+        subj_comment = "Texte plus descriptif / narratif que très introspectif."
+    elif subjectivity < 0.6:
+        subj_label = "Mixte"
+        subj_comment = "Équilibre entre description et subjectivité personnelle."
+    else:
+        subj_label = "Très subjectif"
+        subj_comment = "Texte très centré sur le ressenti et le vécu personnel."
+
+    # Richesse lexicale (seuils heuristiques sur MTLD)
+    if mtld is None or np.isnan(mtld):
+        rich_label = "Inconnue"
+        rich_comment = "Richesse lexicale non calculée (texte trop court ou absent)."
+    elif mtld < 40:
+        rich_label = "Simple"
+        rich_comment = "Vocabulaire resserré, bon pour la mémorisation / formats viraux."
+    elif mtld < 80:
+        rich_label = "Moyenne"
+        rich_comment = "Assez de variété pour raconter quelque chose sans perdre l’auditeur."
+    else:
+        rich_label = "Élevée"
+        rich_comment = "Vocabulaire dense, intéressant pour un public qui écoute les paroles."
+
+    return (mood_label, mood_comment,
+            subj_label, subj_comment,
+            rich_label, rich_comment)
+
+
+def interpret_dissonance(audio_mood: float, text_polarity: float):
+    """
+    Retourne (score, label, commentaire) pour la dissonance audio/texte.
+    """
+    if (audio_mood is None) or (text_polarity is None):
+        return None, "Non calculable", "Il manque soit l'analyse audio, soit l'analyse du texte."
+
+    text_valence = (text_polarity + 1) / 2  # [-1,1] -> [0,1]
+    dissonance = abs(audio_mood - text_valence)
+
+    if dissonance < 0.2:
+        label = "Très cohérent"
+        comment = "Ambiance sonore et texte vont dans la même direction émotionnelle."
+    elif dissonance < 0.4:
+        label = "Cohérent avec nuances"
+        comment = "Globalement aligné, avec quelques décalages intéressants."
+    else:
+        label = "Forte tension créative"
+        comment = "Décalage marqué entre son et texte : peut devenir une vraie signature si c'est assumé."
+
+    return dissonance, label, comment
+
+def dissonance_components(audio_mood, text_polarity) -> dict:
+    """
+    Version vectorisée de interpret_dissonance (tableaux, NaN si une mesure manque) :
+    text_valence (polarité ramenée à [0,1]), gap (humeur audio - valence texte,
+    signé : > 0 = son plus lumineux que le texte), dissonance (|gap|).
+    """
+    audio_mood = np.asarray(audio_mood, dtype=float)
+    text_valence = (np.asarray(text_polarity, dtype=float) + 1) / 2
+    gap = audio_mood - text_valence
+    return {"text_valence": text_valence, "gap": gap, "dissonance": np.abs(gap)}
+
+
+def interpret_tiktok_score(score: float):
+    """
+    Étiquette lisible pour le score "TikTok Potential" (0-100).
+    """
+    if score is None or np.isnan(score):
+        return "Non calculable", "Pas assez de critères mesurés (audio et paroles manquants)."
+    if score < 40:
+        return "Peu adapté", "Format long / intro lente : peu de prise pour un usage court."
+    elif score < 60:
+        return "Potentiel moyen", "Quelques atouts, mais il faudra isoler le bon extrait (cut / sped up)."
+    elif score < 80:
+        return "Bon potentiel", "Entrée rapide et hook identifiable : bon candidat pour des formats courts."
+    else:
+        return "Très fort potentiel", "Drop rapide, hook répété, tempo dans la zone : taillé pour la viralité."
+
+
+def interpret_spotify_popularity(score: int):
+    """
+    Donne une étiquette lisible pour un score de popularité artiste Spotify.
+    Heuristique simple sur 0-100.
+    """
+    if score is None:
+        return "Inconnu", "Pas assez de données pour estimer la popularité."
+    if score < 15:
+        return "Sous les radars", "Profil très early, quasi invisible pour l’algorithme."
+    elif score < 25:
+        return "Émergent", "Commence à apparaître, mais encore peu de traction régulière."
+    elif score < 50:
+        return "En construction", "Base d’audience réelle, croissance possible si bien accompagnée."
+    elif score < 75:
+        return "En plein buzz", "Artiste bien installé·e, bon potentiel playlists & algorithme."
+    else:
+        return "Star / très établi", "Très forte traction, forte visibilité dans l’écosystème Spotify."
+
+
+def interpret_genre_clarity(genres: list[str]):
+    """
+    Prend la liste de genres Spotify et renvoie (label, commentaire).
+    On veut qualifier la clarté du positionnement.
+    """
+    n = len(genres or [])
+    if n == 0:
+        return "Aucun", "Spotify n’a pas encore assez de données pour catégoriser l’artiste."
+    if n <= 2:
+        return "Très ciblé", "Positionnement clair : une scène principale bien identifiée."
+    elif n <= 5:
+        return "Segmenté", "Quelques sous-genres, l’artiste navigue dans un même univers global."
+    else:
+        return "Éclaté", (
+            "Beaucoup de micro-genres : soit l’artiste est très hybride, "
+            "soit le positionnement perçu est flou."
+        )
@@ -0,0 +1,233 @@
+# =========================================================
+# CORRESPONDANCE SPOTIFY -> ITUNES (previews 30s)
+# =========================================================
+"""
+Table persistante titre Spotify -> titre iTunes (DATA_DIR/itunes_map.sqlite3) :
+identifiant iTunes, preview, pochette, confiance du rapprochement
+(radar.sources.itunes_match_confidence) et date de vérification. Les titres
+introuvables sont gardés aussi (itunes_id NULL) pour ne pas les rechercher à
+chaque passage.
+
+resolve_itunes_previews(titres) pour une liste de titres Spotify :
+- correspondance récente (< PREVIEW_MAX_AGE_S) : servie sans appel,
+- correspondance ancienne : lookup groupé par identifiants iTunes (jusqu'à
+  ITUNES_LOOKUP_MAX_IDS par requête, requêtes en parallèle) -> preview à jour,
+- titre inconnu, retiré d'iTunes ou raté ancien (> MISS_RETRY_S) : recherches
+  plein texte en parallèle.
+Une fois la table remplie, 50 titres = un aller-retour /lookup au plus, au lieu
+de 50 recherches séquentielles.
+
+Le chemin à froid reste bridé par radar.ratelimit (~20 recherches / min, rafale
+de 5) : 50 titres inconnus prennent plus de 2 min. L'attente d'un jeton est donc
+allongée en proportion du lot au lieu du délai de 30 s par défaut.
+
+Un appel en échec (réseau, disjoncteur, mode hors-ligne) n'est jamais enregistré
+comme un raté : la dernière correspondance connue est servie telle quelle, et un
+titre sans correspondance connue est absent du résultat (« inconnu », à ne pas
+enregistrer comme « pas de preview »), alors que None signifie « introuvable ».
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from radar.config import data_path
+from radar.ratelimit import PROVIDER_RATES
+from radar.sources import ITUNES_LOOKUP_MAX_IDS, ITUNES_WAIT_S, itunes_lookup, search_itunes_track
+from radar.tracing import propagate, span
+
+
+PREVIEW_MAX_AGE_S = 7 * 24 * 3600
+MISS_RETRY_S = 14 * 24 * 3600
+SQL_BATCH = 500
+# Attente max d'un jeton pour un lot de recherches (au-delà : titre laissé inconnu)
+SEARCH_MAX_WAIT_S = 15 * 60
+RECORD_FIELDS = ("title", "artist", "preview_url", "cover", "itunes_id", "confidence")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS itunes_map (
+    spotify_id  TEXT PRIMARY KEY,
+    itunes_id   INTEGER,
+    confidence  REAL,
+    title       TEXT,
+    artist      TEXT,
+    preview_url TEXT,
+    cover       TEXT,
+    checked_at  REAL NOT NULL
+);
+"""
+
+
+class ItunesMap:
+    def __init__(self, path: str = None):
+        self.path = path or data_path("itunes_map.sqlite3")
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, spotify_ids: list) -> dict:
+        """{spotify_id: {itunes_id, confidence, title, artist, preview_url, cover, checked_at}} des titres connus."""
+        out = {}
+        ids = list(dict.fromkeys(spotify_ids))
+        for i in range(0, len(ids), SQL_BATCH):
+            chunk = ids[i:i + SQL_BATCH]
+            rows = self._conn().execute(
+                "SELECT spotify_id, itunes_id, confidence, title, artist, preview_url, cover, checked_at "
+                f"FROM itunes_map WHERE spotify_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for sid, itunes_id, confidence, title, artist, preview_url, cover, checked_at in rows:
+                out[sid] = {"itunes_id": itunes_id, "confidence": confidence, "title": title, "artist": artist,
+                            "preview_url": preview_url, "cover": cover, "checked_at": checked_at}
+        return out
+
+    def save_many(self, results: dict):
+        """Enregistre {spotify_id: record iTunes | None (introuvable)} en une transaction."""
+        if not results:
+            return
+        now = time.time()
+        rows = [
+            (sid, *((r or {}).get(k) for k in ("itunes_id", "confidence", "title", "artist",
+                                                "preview_url", "cover")), now)
+            for sid, r in results.items()
+        ]
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO itunes_map VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def stats(self) -> dict:
+        found, missed, confidence = self._conn().execute(
+            "SELECT COUNT(itunes_id), SUM(itunes_id IS NULL), AVG(confidence) FROM itunes_map"
+        ).fetchone()
+        return {"found": found, "missed": missed or 0,
+                "avg_confidence": round(confidence, 3) if confidence is not None else None}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_itunes_map() -> ItunesMap:
+    """Instance partagée par le process (app, refresher, jobs)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ItunesMap()
+        return _store
+
+
+# ---------------------------------------------------------
+# Résolution groupée
+# ---------------------------------------------------------
+
+def _record(row: dict) -> dict:
+    return {k: row.get(k) for k in RECORD_FIELDS}
+
+
+def _track_artist(track: dict, artist_name: str = None) -> str:
+    return artist_name or track.get("artist") or ((track.get("artists") or [{}])[0].get("name") or "")
+
+
+def _lookup_chunk(itunes_ids: tuple):
+    """Lookup d'un paquet d'identifiants ; None si l'appel échoue (pas de conclusion)."""
+    try:
+        return itunes_lookup(itunes_ids)
+    except Exception:
+        return None
+
+
+def _search(track: dict, artist_name: str, wait_timeout: float = ITUNES_WAIT_S):
+    """(trouvé ?, record | None) ; trouvé=None si l'appel échoue."""
+    try:
+        return True, search_itunes_track(_track_artist(track, artist_name), track["name"],
+                                         track.get("duration_ms"), wait_timeout=wait_timeout)
+    except Exception:
+        return None, None
+
+
+def _search_wait(n_searches: int) -> float:
+    """Attente d'un jeton suffisante pour que le dernier d'un lot de recherches passe."""
+    rate, _ = PROVIDER_RATES["itunes"]
+    return min(ITUNES_WAIT_S + n_searches / rate, SEARCH_MAX_WAIT_S)
+
+
+def resolve_itunes_previews(tracks: list, artist_name: str = None, workers: int = 8,
+                            store: ItunesMap = None) -> dict:
+    """
+    Previews iTunes d'une liste de titres Spotify ({id, name, duration_ms, artists ou artist}).
+    `artist_name` : artiste commun (sinon artiste de chaque titre).
+    Retourne {spotify_id: {title, artist, preview_url, cover, itunes_id, confidence} | None}
+    (None : introuvable sur iTunes). Un titre absent du résultat est inconnu (appel en
+    échec, sans correspondance en table) : à retenter plus tard, pas à enregistrer comme raté.
+    """
+    store = store or get_itunes_map()
+    tracks = list({t["id"]: t for t in tracks if t.get("id")}.values())
+    now = time.time()
+    out, to_lookup, to_search = {}, {}, []
+
+    with span("itunes.resolve", tracks=len(tracks)) as s:
+        known = store.get_many([t["id"] for t in tracks])
+        for t in tracks:
+            row = known.get(t["id"])
+            age = now - row["checked_at"] if row else None
+            if row is None:
+                to_search.append(t)
+            elif row["itunes_id"] is None:
+                out[t["id"]] = None
+                if age > MISS_RETRY_S:
+                    to_search.append(t)
+            else:
+                out[t["id"]] = _record(row)
+                if age > PREVIEW_MAX_AGE_S:
+                    to_lookup.setdefault(row["itunes_id"], []).append(t)
+
+        n_lookup = sum(map(len, to_lookup.values()))
+        updates, cached = {}, len(tracks) - n_lookup - len(to_search)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="radar-itunes") as pool:
+            # 1) Correspondances anciennes : preview rafraîchi par lookup groupé
+            ids = list(to_lookup)
+            chunks = [tuple(ids[i:i + ITUNES_LOOKUP_MAX_IDS]) for i in range(0, len(ids), ITUNES_LOOKUP_MAX_IDS)]
+            for chunk, found in zip(chunks, pool.map(propagate(_lookup_chunk), chunks)):
+                if found is None:
+                    continue  # iTunes indisponible : ancienne correspondance servie
+                for itunes_id in chunk:
+                    for t in to_lookup[itunes_id]:
+                        if itunes_id in found:
+                            updates[t["id"]] = out[t["id"]] = {**found[itunes_id],
+                                                               "confidence": out[t["id"]]["confidence"]}
+                        else:
+                            to_search.append(t)  # retiré du catalogue iTunes
+
+            # 2) Titres inconnus : recherches plein texte en parallèle (débit iTunes : lent à froid)
+            wait = _search_wait(len(to_search))
+            results = pool.map(propagate(lambda t: _search(t, artist_name, wait)), to_search)
+            unknown = 0
+            for t, (ok, record) in zip(to_search, results):
+                if ok is None:
+                    unknown += t["id"] not in out  # ancienne correspondance servie sinon
+                    continue
+                updates[t["id"]] = out[t["id"]] = record
+
+        store.save_many(updates)
+        s.set(cached=cached, lookup=n_lookup, search=len(to_search), unknown=unknown,
+              found=sum(r is not None for r in out.values()))
+    return out
+
+
+def resolve_itunes_preview(track: dict, artist_name: str = None):
+    """Preview iTunes d'un seul titre Spotify (même table de correspondance)."""
+    if not track.get("id"):
+        return _search(track, artist_name)[1]
+    return resolve_itunes_previews([track], artist_name=artist_name, workers=1).get(track["id"])
@@ -0,0 +1,99 @@
+# =========================================================
+# TÂCHES DE FOND DU LABO (page 2)
+# =========================================================
+"""
+Les deux pipelines du Labo sont indépendants et tournent en tâche de fond :
+
+- audio  : preview iTunes (radar.itunes_map) -> téléchargement -> décodage + librosa,
+- paroles: corpus local / lyrics.ovh -> sentiment par lexiques locaux (radar.text) ;
+  en mode hors-ligne, paroles et analyse viennent du bundle (radar.bundle).
+
+La page affiche chaque section dès que son résultat arrive (les paroles
+n'attendent plus librosa). Un LaboJobs est lié à un (artiste, titre Spotify) :
+changer de titre annule les tâches en cours (les étapes non démarrées
+sont sautées, l'étape en cours termine puis le résultat est ignoré).
+"""
+
+import threading
+
+from radar.audio import analyze_preview_url
+from radar.bundle import active_bundle
+from radar.corpus import fetch_lyrics
+from radar.itunes_map import resolve_itunes_preview
+from radar.text import analyze_lyrics
+from radar.tracing import propagate
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _check(cancel: threading.Event):
+    if cancel.is_set():
+        raise JobCancelled()
+
+
+def audio_job(artist_name: str, track: dict, cached: dict, cancel: threading.Event) -> dict:
+    """
+    Retourne {"itunes": ..., "analysis": dict | None, "waveform": list | None, "error": str | None}.
+    `track` : titre Spotify ; `cached` : entrée track_features d'un snapshot (ou None).
+    """
+    if cached is not None:
+        itunes_data = cached["itunes"]
+    else:
+        itunes_data = resolve_itunes_preview(track, artist_name)
+    result = {"itunes": itunes_data, "analysis": None, "waveform": None, "error": None}
+
+    if not (itunes_data and itunes_data.get("preview_url")):
+        return result
+    if cached is not None and cached.get("audio"):
+        result["analysis"] = cached["audio"]
+        result["waveform"] = cached["audio"]["waveform"]
+        return result
+
+    _check(cancel)
+    try:
+        result.update(analyze_preview_url(itunes_data["preview_url"]))
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def lyrics_job(artist_name: str, track_title: str, cancel: threading.Event) -> dict:
+    """Retourne {"lyrics_text": str | None, "text": dict analyze_lyrics | None}."""
+    bundle = active_bundle()
+    entry = bundle.lyrics(artist_name, track_title) if bundle is not None else None
+    if entry and entry.get("analysis"):
+        return {"lyrics_text": entry["text"], "text": entry["analysis"]}
+    lyrics_text = fetch_lyrics(artist_name, track_title)
+    if not lyrics_text:
+        return {"lyrics_text": None, "text": None}
+    _check(cancel)
+    return {"lyrics_text": lyrics_text, "text": analyze_lyrics(lyrics_text)}
+
+
+class LaboJobs:
+    """Tâches audio + paroles d'un titre, soumises à un executor partagé."""
+
+    def __init__(self, key, executor, artist_name: str, track: dict, cached: dict = None):
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.audio = executor.submit(
+            propagate(audio_job), artist_name, track, cached, self.cancel_event
+        )
+        self.lyrics = executor.submit(
+            propagate(lyrics_job), artist_name, track["name"], self.cancel_event
+        )
+
+    @property
+    def futures(self) -> dict:
+        return {"audio": self.audio, "lyrics": self.lyrics}
+
+    def cancel(self):
+        self.cancel_event.set()
+        for fut in self.futures.values():
+            fut.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
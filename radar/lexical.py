@@ -0,0 +1,249 @@
+# =========================================================
+# ANALYSE LEXICALE DES PAROLES (vectorisée)
+# =========================================================
+"""
+Indicateurs lexicaux stables (indépendants de la longueur du titre),
+calculés en une passe sur les tokens de tout un lot de chansons :
+
+- mtld            : Measure of Textual Lexical Diversity (McCarthy & Jarvis),
+                    moyenne des passes avant / arrière, seuil TTR 0.72,
+- hdd             : HD-D, TTR attendu d'un échantillon de 42 tokens (0-1),
+- bigram_repetition / trigram_repetition : part des n-grammes qui répètent
+                    un n-gramme déjà vu dans le titre,
+- hooks           : lignes répétées (≥ 3 mots) les plus fréquentes, [(ligne, nb)],
+- rhyme_density   : part des fins de ligne qui riment avec l'une des deux
+                    fins de ligne voisines (avant / après, AABB ou ABAB),
+- common_word_share : part du vocabulaire faite de mots courants FR / EN / ES.
+
+lexical_profiles(texts) -> DataFrame (une ligne par texte, même ordre) ;
+lexical_profile(text) -> dict pour un seul titre.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+from radar.tracing import span
+
+
+TOKEN_RE = re.compile(r"\w+")
+VOWELS = "aeiouyàâäéèêëîïôöùûüœæíóúñ"
+RHYME_RE = re.compile(rf"[{VOWELS}]+[^{VOWELS}]*$")
+
+MTLD_THRESHOLD = 0.72
+MTLD_MIN_TOKENS = 50
+HDD_SAMPLE = 42
+HOOK_MIN_WORDS = 3
+MAX_HOOKS = 3
+
+# Mots outils / très fréquents, par langue (aussi utilisés pour identifier la langue)
+COMMON_WORDS_BY_LANG = {
+    "FR": frozenset("""
+a à au aux avec ce ces c cette dans de des du elle elles en est et eux il ils j je la le les leur lui
+m ma mais me mes moi mon ne nos notre nous on ou où par pas pour qu que qui s sa se ses si son
+sur t ta te tes toi ton tu un une vos votre vous y ça oui non plus tout tous bien comme fait être avoir
+""".split()),
+    "EN": frozenset("""
+the a an and or but if of to in on at by for with from as is are was were be been am i you he she it
+we they me him her us them my your his its our their this that these those not no yes so do don t s
+can will just all what when where who how there here up out get got like oh yeah baby love know
+""".split()),
+    "ES": frozenset("""
+el la los las un una unos unas y o pero de del al en con por para que se es son yo tú tu él ella
+nosotros ellos me te le nos les mi mis su sus no sí si lo como más muy ya
+""".split()),
+}
+COMMON_WORDS = frozenset().union(*COMMON_WORDS_BY_LANG.values())
+
+PROFILE_COLUMNS = [
+    "n_tokens", "vocab_size", "mtld", "hdd", "bigram_repetition", "trigram_repetition",
+    "hooks", "hook", "hook_count", "rhyme_density", "common_word_share",
+]
+
+
+# ---------------------------------------------------------
+# MTLD (seule étape séquentielle : une boucle sur des codes entiers)
+# ---------------------------------------------------------
+
+def _mtld_pass(codes: list, bounds: list, n_types: int) -> np.ndarray:
+    """Facteurs MTLD d'une passe, par titre. `bounds` = [(début, fin)] dans `codes`."""
+    stamp = [-1] * n_types
+    segment = 0
+    out = np.zeros(len(bounds))
+    threshold = MTLD_THRESHOLD
+    for k, (start, end) in enumerate(bounds):
+        factors, count, types = 0.0, 0, 0
+        segment += 1
+        for i in range(start, end):
+            c = codes[i]
+            count += 1
+            if stamp[c] != segment:
+                stamp[c] = segment
+                types += 1
+            if types <= threshold * count:
+                factors += 1
+                segment += 1
+                count = types = 0
+        if count:
+            factors += (1 - types / count) / (1 - threshold)
+        out[k] = factors
+    return out
+
+
+def _mtld(codes: np.ndarray, lengths: np.ndarray, n_types: int) -> np.ndarray:
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    forward = _mtld_pass(codes.tolist(), list(zip(starts, ends)), n_types)
+    # Passe arrière : titres inversés en place dans le tableau global
+    total = int(ends[-1]) if len(ends) else 0
+    reversed_codes = codes[::-1].tolist()
+    backward = _mtld_pass(reversed_codes, list(zip(total - ends, total - starts)), n_types)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mtld = (np.where(forward > 0, lengths / forward, lengths)
+                + np.where(backward > 0, lengths / backward, lengths)) / 2
+    return np.where(lengths >= MTLD_MIN_TOKENS, mtld, np.nan)
+
+
+# ---------------------------------------------------------
+# Lignes : hooks + rimes
+# ---------------------------------------------------------
+
+def _tokenize(texts: list) -> tuple:
+    """
+    Passe unique sur les lignes : tokens à plat, nb de tokens par titre,
+    et table des lignes (song, line, n_words, last_word).
+    """
+    tokens, lengths, rows = [], [], []
+    for song, text in enumerate(texts):
+        n = 0
+        for raw in (text or "").lower().splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            words = TOKEN_RE.findall(line)
+            tokens.extend(words)
+            n += len(words)
+            rows.append((song, line, len(words), words[-1] if words else None))
+        lengths.append(n)
+    lines = pd.DataFrame(rows, columns=["song", "line", "n_words", "last_word"])
+    return tokens, np.asarray(lengths, dtype=np.int64), lines
+
+
+def _rhyme_key(word: str) -> str:
+    match = RHYME_RE.search(word)
+    return match.group(0) if match else word
+
+
+def _hooks(lines: pd.DataFrame, n_songs: int) -> list:
+    hooks = [[] for _ in range(n_songs)]
+    if lines.empty:
+        return hooks
+    long_lines = lines.loc[lines["n_words"] >= HOOK_MIN_WORDS, ["song", "line"]]
+    counts = long_lines.groupby(["song", "line"], sort=False).size().reset_index(name="count")
+    counts = counts[counts["count"] >= 2].sort_values(["song", "count"], ascending=[True, False])
+    for song, line, count in counts.groupby("song").head(MAX_HOOKS).itertuples(index=False):
+        hooks[song].append((line, int(count)))
+    return hooks
+
+
+def _rhyme_density(lines: pd.DataFrame, n_songs: int) -> np.ndarray:
+    out = np.full(n_songs, np.nan)
+    if lines.empty:
+        return out
+    ends = lines.dropna(subset=["last_word"]).reset_index(drop=True)
+    song = ends["song"]
+    # Clé de rime = dernier groupe voyelle + consonnes finales, calculée une fois par mot
+    word_codes, words = pd.factorize(ends["last_word"].to_numpy(dtype=object))
+    key_codes = pd.factorize(np.array([_rhyme_key(w) for w in words], dtype=object))[0]
+    word, key = pd.Series(word_codes), pd.Series(key_codes[word_codes])
+    rhymes = pd.Series(False, index=ends.index)
+    for shift in (1, 2, -1, -2):
+        same_song = song.shift(shift) == song
+        rhymes |= same_song & (key.shift(shift) == key) & (word.shift(shift) != word)
+
+    per_song = rhymes.groupby(song).mean()
+    out[per_song.index.to_numpy()] = per_song.to_numpy()
+    return out
+
+
+# ---------------------------------------------------------
+# Profil complet
+# ---------------------------------------------------------
+
+def _ngram_repetition(codes: np.ndarray, song_of: np.ndarray, n: int, n_songs: int) -> np.ndarray:
+    if len(codes) < n:
+        return np.full(n_songs, np.nan)
+    valid = song_of[: len(codes) - n + 1] == song_of[n - 1:]
+    grams = pd.DataFrame({"song": song_of[: len(codes) - n + 1][valid]})
+    for k in range(n):
+        grams[k] = codes[k: len(codes) - n + 1 + k][valid]
+    total = np.bincount(grams["song"], minlength=n_songs)
+    repeated = np.bincount(grams["song"][grams.duplicated()], minlength=n_songs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, repeated / np.maximum(total, 1), np.nan)
+
+
+def lexical_profiles(texts: list) -> pd.DataFrame:
+    """Profil lexical de chaque texte (colonnes PROFILE_COLUMNS, même ordre que `texts`)."""
+    texts = list(texts)
+    n_songs = len(texts)
+    if not n_songs:
+        return pd.DataFrame(columns=PROFILE_COLUMNS)
+
+    with span("text.lexical", songs=n_songs) as s:
+        tokens, lengths, lines = _tokenize(texts)
+        codes, uniques = pd.factorize(pd.Series(tokens, dtype=object))
+        codes = codes.astype(np.int64)
+        n_types = len(uniques)
+        song_of = np.repeat(np.arange(n_songs), lengths)
+        s.set(tokens=int(lengths.sum()))
+
+        # Fréquences (titre, type) : vocabulaire, HD-D, mots courants
+        pair, freq = np.unique(song_of * max(n_types, 1) + codes, return_counts=True)
+        pair_song = pair // max(n_types, 1)
+        pair_type = pair % max(n_types, 1)
+        vocab_size = np.bincount(pair_song, minlength=n_songs)
+
+        is_common = pd.Index(uniques).isin(COMMON_WORDS)
+        common = np.bincount(pair_song, weights=is_common[pair_type].astype(float), minlength=n_songs)
+
+        n_tok = lengths[pair_song]
+        log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, int(lengths.max(initial=0)) + 1)))])
+        rest = n_tok - freq
+        ok = rest >= HDD_SAMPLE
+        p_absent = np.zeros(len(pair))
+        p_absent[ok] = np.exp(
+            log_fact[rest[ok]] - log_fact[rest[ok] - HDD_SAMPLE]
+            - log_fact[n_tok[ok]] + log_fact[n_tok[ok] - HDD_SAMPLE]
+        )
+        hdd = np.bincount(pair_song, weights=(1 - p_absent) / HDD_SAMPLE, minlength=n_songs)
+
+        hooks = _hooks(lines, n_songs)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df = pd.DataFrame({
+                "n_tokens": lengths,
+                "vocab_size": vocab_size,
+                "mtld": _mtld(codes, lengths, n_types),
+                "hdd": np.where(lengths >= HDD_SAMPLE, hdd, np.nan),
+                "bigram_repetition": _ngram_repetition(codes, song_of, 2, n_songs),
+                "trigram_repetition": _ngram_repetition(codes, song_of, 3, n_songs),
+                "hooks": hooks,
+                "hook": [h[0][0] if h else None for h in hooks],
+                "hook_count": [h[0][1] if h else 0 for h in hooks],
+                "rhyme_density": _rhyme_density(lines, n_songs),
+                "common_word_share": np.where(vocab_size > 0, common / np.maximum(vocab_size, 1), np.nan),
+            })
+    return df
+
+
+def lexical_profile(text: str) -> dict:
+    """Profil lexical d'un seul titre (NaN -> None)."""
+    row = lexical_profiles([text]).iloc[0].to_dict()
+    out = {}
+    for k, v in row.items():
+        if isinstance(v, np.generic):
+            v = v.item()
+        out[k] = None if isinstance(v, float) and np.isnan(v) else v
+    return out
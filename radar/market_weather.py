@@ -0,0 +1,362 @@
+# =========================================================
+# MÉTÉO DU MARCHÉ (page 4.2)
+# =========================================================
+"""
+Pipeline "Météo du marché" sur une playlist de référence (Top 50 France par défaut).
+
+1. Métadonnées de la playlist en appels groupés (pages de 100 titres).
+2. Par titre, en parallèle (threads, I/O) : preview iTunes + téléchargement,
+   paroles + polarité du texte.
+3. Décodage + librosa sur un pool de process (CPU), lancé dès qu'un
+   téléchargement est terminé.
+4. Agrégation BPM / énergie / brillance / polarité -> bulletin météo.
+
+Le résultat est mis en cache par playlist et par snapshot Spotify :
+- snapshot inchangé -> aucune analyse,
+- nouveau snapshot  -> seuls les titres entrés dans la playlist sont analysés.
+Un titre incomplet (preview, analyse audio ou paroles manquants, souvent pour
+une raison passagère : débit, réseau) est ré-analysé après INCOMPLETE_RETRY_S,
+même si le snapshot n'a pas changé.
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from radar.audio import AUDIO_SUMMARY_FIELDS as AUDIO_FIELDS, analyze_preview_bytes, download_preview
+from radar.config import data_path
+from radar.corpus import fetch_lyrics
+from radar.itunes_map import resolve_itunes_previews
+from radar.ratelimit import call
+from radar.text import lyrics_polarities
+from radar.tracing import current_span, propagate, traced
+
+
+TOP50_FRANCE_ID = "37i9dQZEVXbIPWwFssbupI"
+INCOMPLETE_RETRY_S = 6 * 3600
+
+def parse_playlist_id(query: str):
+    """Accepte un ID brut, un lien open.spotify.com ou une URI spotify:playlist:..."""
+    if not query:
+        return None
+    query = query.strip()
+    m = re.search(r"playlist[/:]([a-zA-Z0-9]+)", query)
+    if m:
+        return m.group(1)
+    if re.fullmatch(r"[a-zA-Z0-9]+", query):
+        return query
+    return None
+
+
+# ---------------------------------------------------------
+# 1) Ingestion de la playlist
+# ---------------------------------------------------------
+
+@traced("spotify.playlist")
+def fetch_playlist_snapshot(sp, playlist_id: str) -> dict:
+    """
+    Charge nom + snapshot_id + titres d'une playlist.
+    Les titres sont récupérés par pages de 100 (un appel par page),
+    via l'ordonnanceur Spotify (radar.ratelimit).
+    """
+    meta = call("spotify", sp.playlist, playlist_id, fields="name,snapshot_id")
+
+    page = call(
+        "spotify",
+        sp.playlist_items,
+        playlist_id,
+        limit=100,
+        fields="items(track(id,name,duration_ms,popularity,artists(id,name))),next",
+        additional_types=("track",),
+    )
+    items = []
+    while page:
+        items.extend(page.get("items", []))
+        page = call("spotify", sp.next, page) if page.get("next") else None
+    current_span().set(items=len(items))
+
+    tracks = []
+    for rank, item in enumerate(items, start=1):
+        t = (item or {}).get("track") or {}
+        if not t.get("id"):
+            continue  # titres locaux / épisodes
+        artists = t.get("artists", [])
+        tracks.append({
+            "id": t["id"],
+            "name": t.get("name", ""),
+            "artist": artists[0].get("name", "") if artists else "",
+            "duration_ms": t.get("duration_ms"),
+            "popularity": t.get("popularity"),
+            "rank": rank,
+        })
+
+    return {
+        "playlist_id": playlist_id,
+        "name": meta.get("name", playlist_id),
+        "snapshot_id": meta.get("snapshot_id"),
+        "tracks": tracks,
+    }
+
+
+# ---------------------------------------------------------
+# 2-3) Analyse des titres (threads I/O + process CPU)
+# ---------------------------------------------------------
+
+def _fetch_track_inputs(track: dict, itunes_data: dict) -> dict:
+    """Partie I/O d'un titre : binaire du preview iTunes (déjà résolu), paroles."""
+    out = {"content": None, "lyrics": None, "has_preview": False, "has_lyrics": False}
+
+    if itunes_data and itunes_data.get("preview_url"):
+        try:
+            out["content"] = download_preview(itunes_data["preview_url"])
+            out["has_preview"] = True
+        except Exception:
+            pass
+
+    try:
+        lyrics_text = fetch_lyrics(track["artist"], track["name"])
+    except Exception:
+        lyrics_text = None
+    if lyrics_text:
+        out["has_lyrics"] = True
+        out["lyrics"] = lyrics_text
+
+    return out
+
+
+def analyze_tracks(tracks: list, io_workers: int = 16, cpu_workers: int = None) -> dict:
+    """
+    Analyse une liste de titres. Retourne {track_id: features}.
+    Le décodage d'un titre démarre dès que son preview est téléchargé.
+    """
+    results, lyrics = {}, {}
+    if not tracks:
+        return results
+
+    # Previews de toute la playlist d'un coup (table de correspondance + lookup groupé)
+    previews = resolve_itunes_previews(tracks, workers=io_workers)
+
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+            ProcessPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+        io_futures = {io_pool.submit(propagate(_fetch_track_inputs), t, previews.get(t["id"])): t for t in tracks}
+        audio_futures = {}
+
+        for fut in as_completed(io_futures):
+            track = io_futures[fut]
+            try:
+                inputs = fut.result()
+            except Exception:
+                inputs = {"content": None, "lyrics": None,
+                          "has_preview": False, "has_lyrics": False}
+
+            content = inputs.pop("content")
+            lyrics[track["id"]] = inputs.pop("lyrics")
+            results[track["id"]] = {**{k: None for k in AUDIO_FIELDS}, **inputs}
+            if content:
+                audio_futures[cpu_pool.submit(analyze_preview_bytes, content)] = track["id"]
+
+        # Polarité de tous les titres en un appel (lexiques locaux) pendant le décodage audio
+        ids = list(lyrics)
+        for track_id, polarity in zip(ids, lyrics_polarities([lyrics[i] for i in ids])):
+            results[track_id]["text_polarity"] = polarity
+
+        for fut in as_completed(audio_futures):
+            audio = fut.result()
+            if audio:
+                results[audio_futures[fut]].update(audio)
+
+    return results
+
+
+# ---------------------------------------------------------
+# Cache par snapshot
+# ---------------------------------------------------------
+
+def _cache_file(playlist_id: str) -> str:
+    return data_path("market_weather", f"{playlist_id}.json")
+
+
+def load_weather_cache(playlist_id: str):
+    try:
+        with open(_cache_file(playlist_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_weather_cache(cache: dict):
+    path = _cache_file(cache["playlist_id"])
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------
+# 4) Agrégation + bulletin
+# ---------------------------------------------------------
+
+def aggregate_weather(df: pd.DataFrame) -> dict:
+    """Indicateurs agrégés du marché à partir du tableau par titre."""
+    def col(name):
+        return pd.to_numeric(df[name], errors="coerce") if name in df else pd.Series(dtype=float)
+
+    tempo = col("tempo")
+    energy = col("avg_energy")
+    centroid = col("avg_centroid")
+    polarity = col("text_polarity")
+
+    bright_norm = np.clip((centroid - 1000) / (6000 - 1000), 0, 1)
+    text_valence = (polarity + 1) / 2
+    # Humeur : brillance du son et valence du texte, à parts égales quand les deux existent
+    mood_index = pd.concat([bright_norm, text_valence], axis=1).mean(axis=1, skipna=True)
+
+    return {
+        "n_tracks": int(len(df)),
+        "n_audio": int(tempo.notna().sum()),
+        "n_lyrics": int(polarity.notna().sum()),
+        "bpm_median": float(tempo.median()) if tempo.notna().any() else None,
+        "energy_mean": float(energy.mean()) if energy.notna().any() else None,
+        "centroid_mean": float(centroid.mean()) if centroid.notna().any() else None,
+        "polarity_mean": float(polarity.mean()) if polarity.notna().any() else None,
+        "mood_index": float(mood_index.mean()) if mood_index.notna().any() else None,
+    }
+
+
+def weather_bulletin(agg: dict):
+    """
+    Traduit les agrégats en bulletin lisible.
+    Retourne (titre, commentaire), ex : ("Rapide & sombre", "...").
+    """
+    bpm = agg.get("bpm_median")
+    mood = agg.get("mood_index")
+    if bpm is None and mood is None:
+        return "Pas de prévision", "Aucun titre analysable dans cette playlist."
+
+    if bpm is None:
+        speed = "Tempo inconnu"
+    elif bpm < 100:
+        speed = "Lent"
+    elif bpm < 120:
+        speed = "Mid-tempo"
+    else:
+        speed = "Rapide"
+
+    if mood is None:
+        tone = "humeur inconnue"
+    elif mood < 0.4:
+        tone = "sombre"
+    elif mood > 0.6:
+        tone = "lumineux"
+    else:
+        tone = "nuancé"
+
+    comments = {
+        "sombre": "Le marché tire vers des ambiances graves / mélancoliques.",
+        "lumineux": "Le marché privilégie des sons brillants et des textes positifs.",
+        "nuancé": "Pas de dominante claire : ni très sombre, ni très lumineux.",
+        "humeur inconnue": "Humeur non mesurée (previews et paroles indisponibles).",
+    }
+    energy = agg.get("energy_mean")
+    energy_note = ""
+    if energy is not None:
+        energy_note = " Énergie globale élevée." if energy >= 0.30 else (
+            " Énergie globale retenue." if energy < 0.15 else ""
+        )
+
+    return f"{speed} & {tone}", comments[tone] + energy_note
+
+
+def _is_complete(features: dict) -> bool:
+    return bool(features and features.get("has_preview") and features.get("has_lyrics")
+                and features.get("tempo") is not None)
+
+
+def _needs_analysis(features: dict, now: float) -> bool:
+    """Titre jamais analysé, ou incomplet et dont le délai de nouvel essai est passé."""
+    if not features:
+        return True
+    return not _is_complete(features) and features.get("retry_after", 0) <= now
+
+
+def _merge_features(old: dict, new: dict, now: float) -> dict:
+    """Nouvelle analyse d'un titre, sans perdre ce que l'ancienne avait obtenu ; marque les incomplets."""
+    old, new = old or {}, new or {}
+    # `is not None` : 0.0 (polarité neutre, BPM nul...) est une vraie valeur
+    merged = {**old, **{k: v for k, v in new.items() if v is not None}}
+    for k in ("has_preview", "has_lyrics"):
+        merged[k] = bool(old.get(k) or new.get(k))
+    merged.pop("retry_after", None)
+    if not _is_complete(merged):
+        merged["retry_after"] = now + INCOMPLETE_RETRY_S
+    return merged
+
+
+def _build_result(snapshot: dict, features: dict, n_analysed: int, fetched_at: float) -> dict:
+    rows = []
+    for t in snapshot["tracks"]:
+        f = features.get(t["id"]) or {}
+        rows.append({**t, **{k: f.get(k) for k in AUDIO_FIELDS + ["text_polarity"]}})
+    df = pd.DataFrame(rows)
+    agg = aggregate_weather(df)
+    title, comment = weather_bulletin(agg)
+    return {
+        "playlist_id": snapshot["playlist_id"],
+        "name": snapshot["name"],
+        "snapshot_id": snapshot["snapshot_id"],
+        "fetched_at": fetched_at,
+        "n_analysed": n_analysed,
+        "tracks": df,
+        "aggregate": agg,
+        "bulletin": (title, comment),
+    }
+
+
+@traced("market_weather.cache")
+def load_cached_weather(playlist_id: str):
+    """Dernière météo connue pour la playlist, sans aucun appel réseau (ou None)."""
+    cache = load_weather_cache(playlist_id)
+    current_span().set(cache="hit" if cache else "miss")
+    if not cache:
+        return None
+    return _build_result(cache["snapshot"], cache["features"], 0, cache.get("fetched_at"))
+
+
+@traced("market_weather.refresh")
+def refresh_market_weather(sp, playlist_id: str, force: bool = False,
+                           io_workers: int = 16, cpu_workers: int = None) -> dict:
+    """
+    Recharge la playlist et met à jour la météo.
+    Seuls les titres absents du dernier snapshot, ou incomplets et à réessayer,
+    sont analysés (tous si force=True).
+    """
+    snapshot = fetch_playlist_snapshot(sp, playlist_id)
+    cache = None if force else load_weather_cache(playlist_id)
+    known = (cache or {}).get("features", {})
+    now = time.time()
+
+    new_tracks = [t for t in snapshot["tracks"] if _needs_analysis(known.get(t["id"]), now)]
+    if cache and cache.get("snapshot", {}).get("snapshot_id") == snapshot["snapshot_id"] and not new_tracks:
+        return _build_result(snapshot, known, 0, cache.get("fetched_at"))
+
+    fresh = analyze_tracks(new_tracks, io_workers=io_workers, cpu_workers=cpu_workers)
+
+    # On ne garde que les titres présents dans le snapshot courant
+    features = {
+        t["id"]: (_merge_features(known.get(t["id"]), fresh.get(t["id"]), now)
+                  if t["id"] in fresh else known.get(t["id"]))
+        for t in snapshot["tracks"]
+    }
+    fetched_at = time.time()
+    save_weather_cache({
+        "playlist_id": playlist_id,
+        "snapshot": snapshot,
+        "features": features,
+        "fetched_at": fetched_at,
+    })
+    return _build_result(snapshot, features, len(new_tracks), fetched_at)
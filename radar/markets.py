@@ -0,0 +1,135 @@
+# =========================================================
+# MULTI-MARCHÉS (top titres + discographie Spotify)
+# =========================================================
+"""
+Les endpoints Spotify top tracks / albums répondent pour un seul marché.
+Pour un ensemble de marchés (FR, BE, CH, CA...), les appels partent en
+parallèle (un thread par marché : le coût ≈ un aller-retour, pas N) puis
+sont fusionnés en un modèle unique, dédupliqué :
+
+- top titres : un titre par enregistrement (ISRC, sinon id Spotify ; un même
+  titre peut avoir un id différent selon le marché), avec
+  `markets` (marchés où il est dans le top) et `market_ranks` {marché: rang 1-10},
+  triés par meilleur rang, puis nb de marchés, puis popularité,
+- sorties : une sortie par (nom, type, date) — Spotify duplique les albums
+  par territoire —, avec `markets` (marchés où elle est disponible).
+
+Marchés par défaut : secret / variable RADAR_MARKETS (« FR,BE,CH »), sinon FR.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from radar.config import get_secret
+from radar.corpus import fold
+from radar.sources import get_artist_albums, get_artist_top_tracks
+from radar.tracing import propagate, span
+
+
+MARKET_LABELS = {
+    "FR": "France",
+    "BE": "Belgique",
+    "CH": "Suisse",
+    "CA": "Canada",
+    "LU": "Luxembourg",
+    "MC": "Monaco",
+    "MA": "Maroc",
+    "SN": "Sénégal",
+    "CI": "Côte d'Ivoire",
+    "GB": "Royaume-Uni",
+    "US": "États-Unis",
+    "DE": "Allemagne",
+    "ES": "Espagne",
+}
+DEFAULT_MARKETS = ("FR",)
+
+
+def default_markets() -> tuple:
+    """Marchés configurés (RADAR_MARKETS), dans l'ordre donné ; FR sinon."""
+    raw = get_secret("RADAR_MARKETS") or ""
+    markets = tuple(dict.fromkeys(m.strip().upper() for m in raw.split(",") if m.strip()))
+    return markets or DEFAULT_MARKETS
+
+
+def _fan_out(fn, artist_id: str, markets: tuple) -> list:
+    """fn(artist_id, market=m) pour chaque marché, en parallèle ; résultats dans l'ordre de `markets`."""
+    if len(markets) == 1:
+        return [fn(artist_id, market=markets[0])]
+    with ThreadPoolExecutor(max_workers=len(markets), thread_name_prefix="radar-markets") as pool:
+        return list(pool.map(propagate(lambda m: fn(artist_id, market=m)), markets))
+
+
+# ---------------------------------------------------------
+# Top titres
+# ---------------------------------------------------------
+
+def _track_key(track: dict) -> str:
+    return (track.get("external_ids") or {}).get("isrc") or track.get("id")
+
+
+def merge_top_tracks(per_market: dict) -> list:
+    """{marché: top titres Spotify} -> titres fusionnés (+ markets, market_ranks)."""
+    merged = {}
+    for market, tracks in per_market.items():
+        for rank, t in enumerate(tracks or [], start=1):
+            key = _track_key(t)
+            if not key:
+                continue
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {**t, "markets": [], "market_ranks": {}}
+            elif (t.get("popularity") or 0) > (entry.get("popularity") or 0):
+                # Version la plus écoutée (id / popularité du marché principal de l'artiste)
+                entry.update({k: v for k, v in t.items() if k not in ("markets", "market_ranks")})
+            entry["markets"].append(market)
+            entry["market_ranks"][market] = rank
+    return sorted(
+        merged.values(),
+        key=lambda t: (min(t["market_ranks"].values()), -len(t["markets"]), -(t.get("popularity") or 0)),
+    )
+
+
+def get_top_tracks_multi(artist_id: str, markets: tuple = None) -> list:
+    """Top titres fusionnés de l'artiste sur `markets` (défaut : default_markets())."""
+    markets = tuple(markets or default_markets())
+    with span("markets.top_tracks", markets=",".join(markets)) as s:
+        results = _fan_out(get_artist_top_tracks, artist_id, markets)
+        merged = merge_top_tracks(dict(zip(markets, results)))
+        s.set(items=len(merged))
+    return merged
+
+
+# ---------------------------------------------------------
+# Discographie
+# ---------------------------------------------------------
+
+def _album_key(album: dict) -> tuple:
+    return fold(album.get("name")), album.get("album_type"), album.get("release_date")
+
+
+def merge_albums(per_market: dict) -> list:
+    """{marché: sorties Spotify} -> sorties dédupliquées (+ markets), ordre du premier marché."""
+    merged = {}
+    for market, albums in per_market.items():
+        for a in albums or []:
+            entry = merged.setdefault(_album_key(a), {**a, "markets": []})
+            if market not in entry["markets"]:
+                entry["markets"].append(market)
+    return list(merged.values())
+
+
+def get_albums_multi(artist_id: str, markets: tuple = None) -> list:
+    """Sorties (albums + singles) de l'artiste disponibles sur au moins un des `markets`."""
+    markets = tuple(markets or default_markets())
+    with span("markets.albums", markets=",".join(markets)) as s:
+        results = _fan_out(get_artist_albums, artist_id, markets)
+        merged = merge_albums(dict(zip(markets, results)))
+        s.set(items=len(merged))
+    return merged
+
+
+def format_markets(track_or_album: dict) -> str:
+    """« FR #1 · BE #3 » (top titres) ou « FR · BE » (sorties)."""
+    ranks = track_or_album.get("market_ranks")
+    if ranks:
+        return " · ".join(f"{m} #{r}" for m, r in ranks.items())
+    return " · ".join(track_or_album.get("markets") or [])
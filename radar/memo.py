@@ -0,0 +1,282 @@
+# =========================================================
+# CACHE MÉMOIRE BORNÉ (fonctions mémoïsées)
+# =========================================================
+"""
+Remplace @st.cache_data pour les fonctions mémoïsées de l'app, avec une
+enveloppe mémoire fixe pour le process serveur :
+
+- taille de chaque entrée estimée en octets (DataFrame : memory_usage(deep),
+  numpy : nbytes, conteneurs : récursif borné), comptée à l'insertion,
+- budget par fonction (max_bytes / max_entries) + budget global partagé
+  (RADAR_CACHE_MAX_MB, MEMO_DEFAULT_MAX_MB par défaut) ; au-delà, éviction
+  LRU ou LFU (policy= par fonction ; en global : l'entrée candidate la moins
+  récemment utilisée parmi tous les caches),
+- TTL par fonction (ttl= secondes, None = pas d'expiration),
+- clés explicites et bon marché : key=lambda artist_id, ...: artist_id,
+  au lieu du hash de tous les arguments (listes de dicts Last.fm...),
+- ratés concurrents de même clé coalescés (radar.singleflight) : un seul calcul,
+- memo_metrics() / memo_prometheus() : hits, ratés, évictions, expirations,
+  entrées, octets par fonction.
+
+Comme pour radar.singleflight, le résultat est partagé entre sessions :
+ne pas le modifier en place.
+"""
+
+import functools
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from radar.config import get_secret
+from radar.singleflight import SingleFlight
+from radar.tracing import span
+
+
+MEMO_DEFAULT_MAX_MB = 512
+SIZE_MAX_DEPTH = 4
+POLICIES = ("lru", "lfu")
+
+
+def estimate_size(obj, _depth: int = 0) -> int:
+    """Taille mémoire approximative de `obj` en octets."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes) + sys.getsizeof(np.empty(0))
+    size = sys.getsizeof(obj)
+    if _depth >= SIZE_MAX_DEPTH or isinstance(obj, (str, bytes, bytearray)):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(v, _depth + 1) for v in obj)
+    return size
+
+
+def global_budget_bytes() -> int:
+    try:
+        return int(float(get_secret("RADAR_CACHE_MAX_MB", MEMO_DEFAULT_MAX_MB)) * 1e6)
+    except (TypeError, ValueError):
+        return int(MEMO_DEFAULT_MAX_MB * 1e6)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "hits", "last_access")
+
+    def __init__(self, value, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.hits = 0
+        self.last_access = time.monotonic()
+
+
+class MemoCache:
+    """Cache d'une fonction : OrderedDict (ordre = récence) + comptage des octets."""
+
+    def __init__(self, name: str, ttl: float = None, max_bytes: int = None,
+                 max_entries: int = None, policy: str = "lru"):
+        if policy not in POLICIES:
+            raise ValueError(f"policy inconnue : {policy} ({', '.join(POLICIES)})")
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.policy = policy
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    # ----------------------------- accès
+    def get(self, key):
+        """(True, valeur) si présente et non expirée, sinon (False, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._drop(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            entry.hits += 1
+            entry.last_access = now
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry.value
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._stats["too_large"] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+            self._entries[key] = _Entry(value, size, expires_at)
+            self.bytes += size
+            self._purge_expired()
+            while self._entries and self._over_budget():
+                self._evict_one()
+        _enforce_global_budget()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    # ----------------------------- éviction (verrou tenu)
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key).size
+
+    def _over_budget(self) -> bool:
+        return ((self.max_bytes is not None and self.bytes > self.max_bytes)
+                or (self.max_entries is not None and len(self._entries) > self.max_entries))
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+        for k in expired:
+            self._drop(k)
+        self._stats["expirations"] += len(expired)
+
+    def _victim(self):
+        if self.policy == "lru":
+            return next(iter(self._entries))
+        return min(self._entries, key=lambda k: (self._entries[k].hits, self._entries[k].last_access))
+
+    def _evict_one(self):
+        self._drop(self._victim())
+        self._stats["evictions"] += 1
+
+    def victim_age(self):
+        """Dernier accès de l'entrée qu'on évincerait (None si vide) : arbitrage du budget global."""
+        with self._lock:
+            if not self._entries:
+                return None
+            return self._entries[self._victim()].last_access
+
+    def evict_one(self) -> bool:
+        with self._lock:
+            if not self._entries:
+                return False
+            self._evict_one()
+            return True
+
+    # ----------------------------- métriques
+    def metrics(self) -> dict:
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "policy": self.policy,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else None,
+                "evictions": self._stats["evictions"],
+                "expirations": self._stats["expirations"],
+                "too_large": self._stats["too_large"],
+                "uncacheable": self._stats["uncacheable"],
+            }
+
+
+# ---------------------------------------------------------
+# Registre + budget global
+# ---------------------------------------------------------
+
+_caches = {}
+_registry_lock = threading.Lock()
+_global_lock = threading.Lock()
+_flights = SingleFlight()
+
+
+def _enforce_global_budget():
+    budget = global_budget_bytes()
+    with _global_lock:
+        while sum(c.bytes for c in list(_caches.values())) > budget:
+            ages = [(age, c) for c in list(_caches.values()) if (age := c.victim_age()) is not None]
+            if not ages:
+                return
+            min(ages, key=lambda a: a[0])[1].evict_one()
+
+
+def memoize(name: str = None, ttl: float = None, max_bytes: int = None, max_entries: int = None,
+            policy: str = "lru", key=None):
+    """
+    Décorateur : résultat gardé dans un MemoCache borné.
+    `key(*args, **kwargs)` -> clé hashable ; par défaut (args, kwargs triés).
+    """
+    def decorator(fn):
+        op = name or f"{fn.__module__}.{fn.__qualname__}"
+        cache = MemoCache(op, ttl=ttl, max_bytes=max_bytes, max_entries=max_entries, policy=policy)
+        with _registry_lock:
+            _caches[op] = cache
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            try:
+                hash(k)
+            except TypeError:
+                cache._stats["uncacheable"] += 1
+                return fn(*args, **kwargs)
+
+            with span(f"memo.{op}") as s:
+                found, value = cache.get(k)
+                s.set(cache="hit" if found else "miss")
+                if found:
+                    return value
+                value = _flights.do((op, k), fn, *args, **kwargs)
+                cache.put(k, value)
+                s.set(cache_bytes=cache.bytes)  # occupation du cache, pas un volume reçu
+                return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def memo_metrics() -> dict:
+    """{fonction: métriques} + "total" (octets, entrées, budget global)."""
+    with _registry_lock:
+        caches = dict(_caches)
+    out = {name: c.metrics() for name, c in sorted(caches.items())}
+    out["total"] = {
+        "entries": sum(m["entries"] for m in out.values()),
+        "bytes": sum(m["bytes"] for m in out.values()),
+        "max_bytes": global_budget_bytes(),
+    }
+    return out
+
+
+def memo_prometheus() -> str:
+    """Métriques des caches au format texte Prometheus (à concaténer à export_prometheus)."""
+    m = memo_metrics()
+    total = m.pop("total")
+    out = ["# HELP radar_memo_bytes Octets comptés par cache.", "# TYPE radar_memo_bytes gauge"]
+    out += [f'radar_memo_bytes{{cache="{n}"}} {v["bytes"]}' for n, v in m.items()]
+    out += [f"radar_memo_budget_bytes {total['max_bytes']}",
+            "# HELP radar_memo_entries Entrées par cache.", "# TYPE radar_memo_entries gauge"]
+    out += [f'radar_memo_entries{{cache="{n}"}} {v["entries"]}' for n, v in m.items()]
+    out += ["# HELP radar_memo_requests_total Accès par cache et résultat.", "# TYPE radar_memo_requests_total counter"]
+    for n, v in m.items():
+        out.append(f'radar_memo_requests_total{{cache="{n}",result="hit"}} {v["hits"]}')
+        out.append(f'radar_memo_requests_total{{cache="{n}",result="miss"}} {v["misses"]}')
+    out += ["# HELP radar_memo_evictions_total Entrées évincées (budget) ou expirées (TTL).",
+            "# TYPE radar_memo_evictions_total counter"]
+    for n, v in m.items():
+        out.append(f'radar_memo_evictions_total{{cache="{n}",reason="budget"}} {v["evictions"]}')
+        out.append(f'radar_memo_evictions_total{{cache="{n}",reason="ttl"}} {v["expirations"]}')
+    return "\n".join(out) + "\n"
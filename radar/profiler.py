@@ -0,0 +1,257 @@
+# =========================================================
+# PROFILER PAR ÉCHANTILLONNAGE (captures à la demande)
+# =========================================================
+"""
+Profiler statistique sans dépendance : un thread relève la pile du thread
+profilé toutes les `interval` secondes (sys._current_frames), sans hook
+d'appel — surcoût faible, utilisable sur le déploiement live.
+
+Les threads de travail du rerun (pools "radar-labo", "radar-itunes"...) sont
+échantillonnés aussi : leurs piles sont placées sous une racine "[préfixe]"
+pour rester séparées de celles du script. Ces pools sont partagés entre
+sessions : une capture peut contenir les jobs d'autres sessions.
+
+- ProfileCapture : capture sur N reruns d'une page, échantillons agrégés,
+- à la fin : fichiers .collapsed (format flamegraph.pl / speedscope),
+  .pstats (lisible par pstats / snakeviz) et .json (métadonnées / tags)
+  dans DATA_DIR/profiles/.
+
+Le .pstats est reconstruit à partir des échantillons : temps propre =
+échantillons en feuille, temps cumulé = échantillons où la fonction est
+dans la pile, "appels" = nombre d'échantillons (pas de vrais comptes d'appels).
+"""
+
+import json
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from radar.config import data_path
+
+
+DEFAULT_INTERVAL_S = 0.005
+MAX_STACK_DEPTH = 200
+# Pools de threads dont le travail fait partie du rerun (voir app.py)
+WORKER_THREAD_PREFIXES = ("radar-labo", "radar-itunes")
+# Pseudo-fichier des racines "[préfixe]" des threads de travail
+THREAD_ROOT = "<thread>"
+_POOL_WORKER_FILE = os.path.join("concurrent", "futures", "thread.py")
+
+
+class SamplingProfiler:
+    """
+    Échantillonne la pile d'un thread (par défaut : le thread appelant)
+    et celles des threads dont le nom commence par un des `thread_prefixes`.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = DEFAULT_INTERVAL_S,
+                 thread_prefixes: tuple = ()):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._roots = {}
+
+    def _root(self, ident: int):
+        """Racine de pile d'un thread : () pour le thread profilé, None si non suivi."""
+        if ident == self.thread_id:
+            return ()
+        if ident not in self._roots:
+            self._roots = {self.thread_id: ()}
+            for t in threading.enumerate():
+                prefix = next((p for p in self.thread_prefixes if t.name.startswith(p)), None)
+                self._roots[t.ident] = ((THREAD_ROOT, 0, f"[{prefix}]"),) if prefix else None
+        return self._roots.get(ident)
+
+    def _sample_once(self):
+        frames = sys._current_frames()
+        if not self.thread_prefixes:
+            frames = {self.thread_id: frames.get(self.thread_id)}
+        for ident, frame in frames.items():
+            root = self._root(ident)
+            if root is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if root and stack and stack[0][2] == "_worker" and stack[0][0].endswith(_POOL_WORKER_FILE):
+                continue  # thread de pool inactif (en attente d'une tâche)
+            if stack:
+                # Racine -> feuille
+                self.samples[root + tuple(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample_once()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="radar-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.samples
+
+
+# ---------------------------------------------------------
+# Formats de sortie
+# ---------------------------------------------------------
+
+def _frame_label(func) -> str:
+    filename, lineno, name = func
+    if filename == THREAD_ROOT:
+        return name
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{name}:{lineno}"
+
+
+def collapsed_stacks(samples: Counter) -> str:
+    """Une ligne "a;b;c <nb>" par pile (entrée de flamegraph.pl / speedscope)."""
+    agg = Counter()
+    for stack, n in samples.items():
+        agg[";".join(_frame_label(f).replace(";", ":") for f in stack)] += n
+    return "".join(f"{k} {n}\n" for k, n in agg.most_common())
+
+
+def pstats_dict(samples: Counter, interval: float) -> dict:
+    """
+    Échantillons -> dict au format interne de pstats :
+    {func: (cc, nc, tt, ct, {caller: (cc, nc, tt, ct)})}
+    """
+    stats = {}
+
+    def entry(func):
+        if func not in stats:
+            stats[func] = [0, 0, 0.0, 0.0, {}]
+        return stats[func]
+
+    for stack, n in samples.items():
+        dt = n * interval
+        seen = set()
+        for i, func in enumerate(stack):
+            e = entry(func)
+            if func not in seen:
+                # Récursion : temps cumulé compté une seule fois par pile
+                seen.add(func)
+                e[0] += n
+                e[3] += dt
+            e[1] += n
+            if i > 0:
+                caller = stack[i - 1]
+                cc, nc, tt, ct = e[4].get(caller, (0, 0, 0.0, 0.0))
+                e[4][caller] = (cc + n, nc + n, tt, ct + dt)
+        leaf = entry(stack[-1])
+        leaf[2] += dt
+
+    return {f: (e[0], e[1], e[2], e[3], e[4]) for f, e in stats.items()}
+
+
+def write_pstats(samples: Counter, interval: float, path: str):
+    with open(path, "wb") as f:
+        marshal.dump(pstats_dict(samples, interval), f)
+
+
+# ---------------------------------------------------------
+# Captures sur plusieurs reruns
+# ---------------------------------------------------------
+
+def profiles_dir() -> str:
+    return os.path.dirname(data_path("profiles", "_"))
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-").lower()[:40] or "page"
+
+
+class ProfileCapture:
+    """
+    Capture des N prochains reruns d'une page.
+    begin() / end() encadrent un rerun ; les échantillons sont cumulés
+    et les fichiers écrits quand `remaining` tombe à 0.
+    """
+
+    def __init__(self, page: str, reruns: int = 3, interval: float = DEFAULT_INTERVAL_S,
+                 thread_prefixes: tuple = WORKER_THREAD_PREFIXES, **tags):
+        self.page = page
+        self.reruns = reruns
+        self.remaining = reruns
+        self.interval = interval
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.tags = dict(tags)
+        self.samples = Counter()
+        self.wall_s = 0.0
+        self.created_at = time.time()
+        self._profiler = None
+        self._t0 = None
+
+    @property
+    def done(self) -> bool:
+        return self.remaining <= 0
+
+    def begin(self):
+        if self._profiler is not None:
+            # Rerun précédent interrompu avant end() : son échantillonnage est clos ici
+            self.end()
+        if self.done:
+            return
+        self._t0 = time.perf_counter()
+        self._profiler = SamplingProfiler(interval=self.interval, thread_prefixes=self.thread_prefixes).start()
+
+    def end(self):
+        """Termine le rerun en cours. Retourne le chemin de base des fichiers si la capture est finie."""
+        if self._profiler is None:
+            return None
+        self.samples.update(self._profiler.stop())
+        self.wall_s += time.perf_counter() - self._t0
+        self._profiler = None
+        self.remaining -= 1
+        return self.save() if self.done else None
+
+    def save(self) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.created_at))
+        base = os.path.join(profiles_dir(), f"{stamp}_{_slug(self.page)}")
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            f.write(collapsed_stacks(self.samples))
+        write_pstats(self.samples, self.interval, base + ".pstats")
+        meta = {
+            "page": self.page,
+            "reruns": self.reruns - max(self.remaining, 0),
+            "interval_s": self.interval,
+            "threads": ["script", *self.thread_prefixes],
+            "samples": int(sum(self.samples.values())),
+            "wall_s": round(self.wall_s, 3),
+            "created_at": self.created_at,
+            "tags": self.tags,
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return base
+
+
+def list_profiles() -> list:
+    """Métadonnées des captures enregistrées (plus récentes d'abord), avec `base` = chemin sans extension."""
+    out = []
+    for name in sorted(os.listdir(profiles_dir()), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        base = os.path.join(profiles_dir(), name[:-5])
+        try:
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        out.append({**meta, "base": base})
+    return out
@@ -0,0 +1,383 @@
+# =========================================================
+# LIMITES DE DÉBIT PAR FOURNISSEUR
+# =========================================================
+"""
+Ordonnanceur central des appels sortants, partagé par tout le process
+(app, refresher de fond, jobs batch).
+
+Chaque appel passe par call("<provider>", fn, ...) :
+- token bucket par fournisseur ; les appels interactifs passent avant
+  les appels de fond (with background_priority(): ... côté refresher / batch),
+- 429 / Retry-After : le fournisseur est mis en pause puis son débit remonte
+  progressivement (ralentissement adaptatif),
+- disjoncteur par fournisseur : après FAILURE_THRESHOLD échecs consécutifs
+  (timeouts, 429, 5xx), les appels échouent immédiatement (ProviderUnavailable)
+  pendant COOLDOWN_S, puis un appel d'essai est autorisé,
+- @fallback : les fonctions de radar.sources servent la dernière valeur connue
+  (cache périmé) quand l'appel échoue, au lieu d'une liste vide silencieuse ;
+  with track_fallbacks() as ops: ... liste les opérations servies ainsi
+  (le refresher n'enregistre pas un snapshot dégradé),
+- set_offline(raison) : mode hors-ligne (radar.bundle), tout appel échoue
+  immédiatement, sans toucher au disjoncteur ni aux jetons.
+
+provider_metrics() expose, par fournisseur : file d'attente, rejets, état
+du disjoncteur, débit courant, réponses périmées servies.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from radar.tracing import current_span
+
+
+# provider -> (requêtes / seconde, rafale max)
+PROVIDER_RATES = {
+    "spotify": (10.0, 20),
+    "lastfm": (5.0, 5),       # 5 req/s (conditions d'utilisation Last.fm)
+    "itunes": (20 / 60, 5),   # ~20 req/min sur l'API Search
+    "lyrics": (5.0, 5),
+    "deepl": (5.0, 5),
+}
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+FAILURE_THRESHOLD = 5
+COOLDOWN_S = 30.0
+DEFAULT_RETRY_AFTER_S = 5.0
+# Débit divisé par 2 à chaque 429, puis +10 % du débit nominal par succès
+MIN_RATE_FACTOR = 0.1
+RECOVERY_STEP = 0.1
+
+STALE_CACHE_MAX = 4096
+
+_priority = contextvars.ContextVar("radar_priority", default=INTERACTIVE)
+_fallbacks = contextvars.ContextVar("radar_fallbacks", default=None)
+_offline = None
+
+
+class ProviderUnavailable(Exception):
+    """Disjoncteur ouvert, jeton non obtenu dans le délai imparti, ou mode hors-ligne."""
+
+
+def set_offline(reason: str = None):
+    """Mode hors-ligne si `reason` (message des ProviderUnavailable), connecté si None."""
+    global _offline
+    _offline = reason
+
+
+def is_offline() -> bool:
+    return _offline is not None
+
+
+@contextmanager
+def background_priority():
+    """Les appels faits dans ce bloc cèdent la place aux appels interactifs."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def track_fallbacks():
+    """
+    Liste des opérations @fallback servies (périmé ou défaut) dans ce bloc,
+    y compris dans les threads lancés via radar.tracing.propagate.
+    """
+    ops = []
+    token = _fallbacks.set(ops)
+    try:
+        yield ops
+    finally:
+        _fallbacks.reset(token)
+
+
+class TokenBucket:
+    """Token bucket thread-safe : `rate` jetons / seconde, `capacity` jetons max."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = [0, 0]  # par priorité
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._paused_until:
+            start = max(self._updated, self._paused_until)
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0, priority: int = INTERACTIVE) -> float:
+        """Prend `tokens` si possible. Retourne 0 si OK, sinon l'attente nécessaire (s)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if priority > INTERACTIVE and self._waiting[INTERACTIVE]:
+                # Des appels interactifs attendent : le fond repasse plus tard
+                return 1.0 / self.rate
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: float = None, priority: int = INTERACTIVE) -> bool:
+        """Bloque jusqu'à obtenir les jetons (False si `timeout` est dépassé)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self.try_acquire(tokens, priority)
+                if wait == 0.0:
+                    return True
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    with self._lock:
+                        self.rejected += 1
+                    return False
+                # Attente par tranches : un appel interactif arrivé entre-temps reste prioritaire
+                time.sleep(min(wait, 0.5))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+
+    def pause(self, seconds: float):
+        """Retry-After : plus de jetons pendant `seconds`, débit divisé par 2."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate / 2)
+
+    def recover(self):
+        with self._lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def queue_depth(self) -> dict:
+        with self._lock:
+            return {"interactive": self._waiting[INTERACTIVE], "background": self._waiting[BACKGROUND]}
+
+
+class CircuitBreaker:
+    """closed -> open (échecs consécutifs) -> half_open (après cooldown) -> closed / open."""
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, cooldown_s: float = COOLDOWN_S):
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_s:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Appel d'essai autorisé mais non effectué (pas de jeton)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_buckets = {}
+_breakers = {}
+_stale_served = {}
+_registry_lock = threading.Lock()
+
+
+def get_bucket(provider: str) -> TokenBucket:
+    with _registry_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            rate, capacity = PROVIDER_RATES.get(provider, (5.0, 5))
+            bucket = _buckets[provider] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker()
+        return breaker
+
+
+def throttle(provider: str, timeout: float = None) -> bool:
+    """Attend un jeton pour `provider` (priorité du contexte courant)."""
+    return get_bucket(provider).acquire(timeout=timeout, priority=_priority.get())
+
+
+# ---------------------------------------------------------
+# Appel ordonnancé
+# ---------------------------------------------------------
+
+def _http_status(obj):
+    """Statut HTTP d'une réponse requests ou d'une exception requests / spotipy."""
+    status = getattr(obj, "status_code", None) or getattr(obj, "http_status", None)
+    if status is None and getattr(obj, "response", None) is not None:
+        status = getattr(obj.response, "status_code", None)
+    return status
+
+
+def _retry_after(obj) -> float:
+    headers = getattr(obj, "headers", None)
+    if headers is None and getattr(obj, "response", None) is not None:
+        headers = obj.response.headers
+    try:
+        return float((headers or {}).get("Retry-After"))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_S
+
+
+def _is_provider_failure(exc: Exception) -> bool:
+    """Timeouts, erreurs réseau, 429 et 5xx : le fournisseur va mal (un 404 non)."""
+    status = _http_status(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def call(provider: str, fn, *args, wait_timeout: float = 30.0, **kwargs):
+    """
+    Exécute fn(*args, **kwargs) pour `provider` : disjoncteur, jeton (avec priorité),
+    puis bilan de l'appel. Une réponse requests en 429 / 5xx compte comme un échec
+    mais est renvoyée telle quelle à l'appelant.
+    Lève ProviderUnavailable si le disjoncteur est ouvert ou sans jeton en `wait_timeout` s.
+    """
+    if _offline is not None:
+        current_span().set(offline=True)
+        raise ProviderUnavailable(f"{provider} : {_offline}")
+
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        current_span().set(circuit="open")
+        raise ProviderUnavailable(f"{provider} : disjoncteur ouvert")
+
+    bucket = get_bucket(provider)
+    if not bucket.acquire(timeout=wait_timeout, priority=_priority.get()):
+        breaker.release_trial()
+        raise ProviderUnavailable(f"{provider} : pas de jeton en {wait_timeout:.0f} s")
+
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as exc:
+        if _http_status(exc) == 429:
+            bucket.pause(_retry_after(exc))
+        if _is_provider_failure(exc):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+
+    status = _http_status(result)
+    if status == 429:
+        bucket.pause(_retry_after(result))
+    if status is not None and (status == 429 or status >= 500):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+        bucket.recover()
+    return result
+
+
+# ---------------------------------------------------------
+# Cache périmé (dernière valeur connue)
+# ---------------------------------------------------------
+
+_stale = OrderedDict()
+_stale_lock = threading.Lock()
+
+
+def fallback(provider: str, op: str, default=None):
+    """
+    Décorateur : mémorise le dernier résultat par (op, arguments) ; si l'appel
+    lève, renvoie ce résultat périmé, sinon `default` (callable -> appelé).
+    Le span courant est marqué stale / degraded.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (op, args, tuple(sorted(kwargs.items())))
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                tracked = _fallbacks.get()
+                if tracked is not None:
+                    tracked.append(op)
+                with _stale_lock:
+                    hit = _stale.get(key, _stale)
+                if hit is not _stale:
+                    with _registry_lock:
+                        _stale_served[provider] = _stale_served.get(provider, 0) + 1
+                    current_span().set(stale=True, degraded=type(exc).__name__)
+                    return hit
+                current_span().set(degraded=type(exc).__name__)
+                return default() if callable(default) else default
+            with _stale_lock:
+                _stale[key] = result
+                _stale.move_to_end(key)
+                while len(_stale) > STALE_CACHE_MAX:
+                    _stale.popitem(last=False)
+            return result
+        return wrapper
+    return decorator
+
+
+def provider_metrics() -> dict:
+    """État par fournisseur : file d'attente, rejets, disjoncteur, débit, périmés servis."""
+    out = {}
+    for provider in sorted(set(PROVIDER_RATES) | set(_buckets)):
+        bucket, breaker = get_bucket(provider), get_breaker(provider)
+        out[provider] = {
+            "queue": bucket.queue_depth(),
+            "rejected_rate_limit": bucket.rejected,
+            "rejected_circuit": breaker.rejected,
+            "circuit": breaker.state,
+            "rate": round(bucket.rate, 3),
+            "base_rate": bucket.base_rate,
+            "stale_served": _stale_served.get(provider, 0),
+        }
+    return out
+
+
+def degraded_providers() -> list:
+    """Fournisseurs dont le disjoncteur n'est pas fermé."""
+    return [p for p, m in provider_metrics().items() if m["circuit"] != "closed"]
@@ -0,0 +1,351 @@
+# =========================================================
+# REFRESHER DE FOND (WATCHLIST)
+# =========================================================
+"""
+Précalcule les snapshots des artistes d'une watchlist (roster) en tâche de fond :
+métadonnées, sorties, top titres, tags / similaires Last.fm et descripteurs
+audio des top titres. Les pages Audit et Labo lisent ensuite ces snapshots
+au lieu d'interroger Spotify / Last.fm / iTunes / librosa à chaque affichage.
+
+- watchlist configurable (watchlist.toml, ou chemin via RADAR_WATCHLIST),
+- file de priorité : priorité la plus basse d'abord (0 = urgent),
+- concurrence bornée (N threads I/O + pool de process pour librosa),
+- sorties / top titres fusionnés sur les marchés RADAR_MARKETS (radar.markets),
+- limites de débit respectées via radar.ratelimit (appliquées dans radar.sources),
+  en priorité "fond" : les sessions interactives passent avant,
+- un appel servi par @fallback (panne, disjoncteur) annule le rafraîchissement :
+  le snapshot précédent reste en place,
+- après un échec, l'artiste est retenté avec un délai exponentiel
+  (RETRY_BASE_S, 2x, ... plafonné à l'intervalle de rafraîchissement).
+
+Exemple de watchlist.toml :
+
+    [refresher]
+    interval_minutes = 360
+    max_workers = 4
+
+    [[artists]]
+    id = "3IW7ScrzXmPvZhB27hmfgy"
+    name = "Laylow"
+    priority = 1
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from radar.audio import analyze_signal, decode_preview, download_preview, summarize_analysis, waveform_envelope
+from radar.config import PROJECT_ROOT, get_secret
+from radar.itunes_map import resolve_itunes_previews
+from radar.markets import default_markets, get_albums_multi, get_top_tracks_multi
+from radar.ratelimit import background_priority, track_fallbacks
+from radar.snapshots import save_artist_snapshot, snapshot_age
+from radar.sources import (
+    get_artist,
+    get_lastfm_artist_tags,
+    get_lastfm_similar_artists,
+    similar_rows_with_spotify,
+)
+from radar.tag_index import record_artist_tags
+from radar.tiktok import detect_intro_and_drop
+from radar.timeseries import record_artist_snapshot
+
+
+DEFAULT_INTERVAL_S = 6 * 3600
+DEFAULT_PRIORITY = 5
+RETRY_BASE_S = 60
+
+# Mêmes volumes que ce qu'affiche la page Audit
+SNAPSHOT_TAGS_LIMIT = 15
+SNAPSHOT_SIMILAR_LIMIT = 8
+
+
+@dataclass
+class WatchlistEntry:
+    artist_id: str
+    name: str = ""
+    priority: int = DEFAULT_PRIORITY
+
+
+def watchlist_path() -> str:
+    return get_secret("RADAR_WATCHLIST") or os.path.join(PROJECT_ROOT, "watchlist.toml")
+
+
+def load_watchlist(path: str = None):
+    """
+    Lit la watchlist.
+    Retourne (entries, settings) ; ([], {}) si le fichier n'existe pas.
+    """
+    path = path or watchlist_path()
+    try:
+        with open(path, "rb") as f:
+            conf = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return [], {}
+
+    entries = [
+        WatchlistEntry(
+            artist_id=a["id"],
+            name=a.get("name", ""),
+            priority=int(a.get("priority", DEFAULT_PRIORITY)),
+        )
+        for a in conf.get("artists", [])
+        if a.get("id")
+    ]
+    return entries, conf.get("refresher", {})
+
+
+# ---------------------------------------------------------
+# Calcul d'un snapshot
+# ---------------------------------------------------------
+
+def _slim_album(item: dict) -> dict:
+    return {k: item.get(k) for k in ("id", "name", "release_date", "album_type", "total_tracks", "markets")}
+
+
+def _slim_track(t: dict) -> dict:
+    album = t.get("album", {}) or {}
+    return {
+        "id": t.get("id"),
+        "name": t.get("name"),
+        "duration_ms": t.get("duration_ms"),
+        "popularity": t.get("popularity"),
+        "preview_url": t.get("preview_url"),
+        "markets": t.get("markets"),
+        "market_ranks": t.get("market_ranks"),
+        "artists": [{"id": a.get("id"), "name": a.get("name")} for a in t.get("artists", [])],
+        "album": {
+            "name": album.get("name", ""),
+            "release_date": album.get("release_date"),
+            "images": (album.get("images") or [])[:1],
+        },
+    }
+
+
+def analyze_preview_content(content: bytes):
+    """
+    Descripteurs audio stockés dans un snapshot (exécuté dans un process worker) :
+    scalaires du Labo + intro / drop + waveform d'affichage.
+    """
+    try:
+        y, sr = decode_preview(content)
+        analysis = analyze_signal(y, sr)
+    except Exception:
+        return None
+    intro_s, drop_s = detect_intro_and_drop(
+        analysis["rms"], analysis["onset_env"], analysis["sr"], analysis["hop_length"]
+    )
+    return {
+        **summarize_analysis(analysis),
+        "intro_s": None if np.isnan(intro_s) else intro_s,
+        # JSON : pas d'infini, None = pas de drop détecté
+        "first_drop_s": None if not np.isfinite(drop_s) else drop_s,
+        "waveform": waveform_envelope(y),
+    }
+
+
+def refresh_artist(artist_id: str, cpu_pool=None) -> dict:
+    """
+    Recalcule et enregistre le snapshot complet d'un artiste.
+    Écrit aussi un point dans la série temporelle popularité / followers.
+    Lève RuntimeError (rien n'est enregistré) si un appel a été servi par @fallback.
+    """
+    with track_fallbacks() as degraded:
+        artist = get_artist(artist_id)
+        if artist is None:
+            raise RuntimeError(f"Artiste Spotify introuvable : {artist_id}")
+        name = artist["name"]
+
+        markets = default_markets()
+        albums = get_albums_multi(artist_id, markets)
+        top_tracks = get_top_tracks_multi(artist_id, markets)
+        tags = get_lastfm_artist_tags(name, limit=SNAPSHOT_TAGS_LIMIT)
+        similar = get_lastfm_similar_artists(name, limit=SNAPSHOT_SIMILAR_LIMIT)
+        similar_enriched = similar_rows_with_spotify(similar)
+    if degraded:
+        raise RuntimeError(f"Données dégradées ({', '.join(sorted(set(degraded)))}) : snapshot précédent conservé")
+
+    track_features = {}
+    pending = {}
+    previews = resolve_itunes_previews(top_tracks, artist_name=name)
+    for t in top_tracks:
+        itunes_data = previews.get(t["id"])
+        track_features[t["id"]] = {"itunes": itunes_data, "audio": None}
+        if itunes_data and itunes_data.get("preview_url"):
+            try:
+                content = download_preview(itunes_data["preview_url"])
+            except Exception:
+                continue
+            if cpu_pool is not None:
+                pending[t["id"]] = cpu_pool.submit(analyze_preview_content, content)
+            else:
+                track_features[t["id"]]["audio"] = analyze_preview_content(content)
+
+    for track_id, fut in pending.items():
+        try:
+            track_features[track_id]["audio"] = fut.result()
+        except Exception:
+            pass
+
+    record_artist_snapshot(artist)
+    record_artist_tags(name, tags)
+
+    snapshot = {
+        "artist": {
+            "id": artist["id"],
+            "name": name,
+            "genres": artist.get("genres", []),
+            "followers": (artist.get("followers") or {}).get("total"),
+            "popularity": artist.get("popularity"),
+            "image": artist["images"][0]["url"] if artist.get("images") else None,
+            "url": (artist.get("external_urls") or {}).get("spotify"),
+        },
+        "markets": list(markets),
+        "albums": [_slim_album(a) for a in albums],
+        "top_tracks": [_slim_track(t) for t in top_tracks],
+        "tags": tags,
+        "similar": similar,
+        "similar_enriched": similar_enriched,
+        "track_features": track_features,
+        "updated_at": time.time(),
+    }
+    save_artist_snapshot(snapshot)
+    return snapshot
+
+
+# ---------------------------------------------------------
+# Ordonnanceur
+# ---------------------------------------------------------
+
+class WatchlistRefresher:
+    """
+    Thread d'ordonnancement + pool borné de threads de rafraîchissement.
+    Un artiste est remis en file quand son snapshot dépasse `interval_s`.
+    """
+
+    def __init__(self, entries, interval_s: float = DEFAULT_INTERVAL_S,
+                 max_workers: int = 4, cpu_workers: int = 2, tick_s: float = 30):
+        self.entries = {e.artist_id: e for e in entries}
+        self.interval_s = interval_s
+        self.max_workers = max_workers
+        self.cpu_workers = cpu_workers
+        self.tick_s = tick_s
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._queued = set()
+        self._in_progress = set()
+        self._last_ok = {}
+        self._last_error = {}
+        self._failures = {}
+        self._retry_at = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._cpu_pool = None
+
+    @classmethod
+    def from_watchlist(cls, path: str = None):
+        entries, settings = load_watchlist(path)
+        return cls(
+            entries,
+            interval_s=float(settings.get("interval_minutes", DEFAULT_INTERVAL_S / 60)) * 60,
+            max_workers=int(settings.get("max_workers", 4)),
+            cpu_workers=int(settings.get("cpu_workers", 2)),
+        )
+
+    # ----------------------------- cycle de vie
+    def start(self):
+        if self._threads or not self.entries:
+            return self
+        self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        self._threads.append(threading.Thread(
+            target=self._schedule_loop, name="radar-refresher-scheduler", daemon=True
+        ))
+        for i in range(self.max_workers):
+            self._threads.append(threading.Thread(
+                target=self._worker_loop, name=f"radar-refresher-{i}", daemon=True
+            ))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+
+    # ----------------------------- file
+    def request_refresh(self, artist_id: str, priority: int = None):
+        """Met un artiste en file (priorité de la watchlist par défaut, 0 = urgent)."""
+        entry = self.entries.get(artist_id)
+        if priority is None:
+            priority = entry.priority if entry else DEFAULT_PRIORITY
+        with self._lock:
+            if artist_id in self._queued or artist_id in self._in_progress:
+                return
+            self._queued.add(artist_id)
+        self._queue.put((priority, next(self._seq), artist_id))
+
+    def _is_due(self, artist_id: str) -> bool:
+        if self._retry_at.get(artist_id, 0) > time.time():
+            return False  # en attente après un échec
+        age = snapshot_age(artist_id)
+        return age is None or age > self.interval_s
+
+    def _schedule_loop(self):
+        while not self._stop.is_set():
+            for entry in sorted(self.entries.values(), key=lambda e: e.priority):
+                if self._is_due(entry.artist_id):
+                    self.request_refresh(entry.artist_id, entry.priority)
+            self._stop.wait(self.tick_s)
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                _, _, artist_id = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._queued.discard(artist_id)
+                self._in_progress.add(artist_id)
+            try:
+                with background_priority():
+                    refresh_artist(artist_id, cpu_pool=self._cpu_pool)
+                self._last_ok[artist_id] = time.time()
+                self._last_error.pop(artist_id, None)
+                self._failures.pop(artist_id, None)
+                self._retry_at.pop(artist_id, None)
+            except Exception as exc:
+                self._last_error[artist_id] = f"{type(exc).__name__}: {exc}"
+                failures = self._failures.get(artist_id, 0) + 1
+                self._failures[artist_id] = failures
+                delay = min(RETRY_BASE_S * 2 ** (failures - 1), self.interval_s)
+                self._retry_at[artist_id] = time.time() + delay
+            finally:
+                with self._lock:
+                    self._in_progress.discard(artist_id)
+                self._queue.task_done()
+
+    # ----------------------------- supervision
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "watchlist": len(self.entries),
+                "queued": len(self._queued),
+                "in_progress": sorted(self._in_progress),
+                "refreshed": len(self._last_ok),
+                "errors": dict(self._last_error),
+                "retry_at": dict(self._retry_at),
+            }
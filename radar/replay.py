@@ -0,0 +1,202 @@
+# =========================================================
+# RECORD / REPLAY HTTP (fixtures hors-ligne)
+# =========================================================
+"""
+Enregistre les réponses des APIs amont (Spotify via spotipy, Last.fm,
+iTunes, lyrics.ovh, DeepL, previews audio) dans des fichiers de fixtures,
+puis les resert sans réseau.
+
+Tout passe par requests.Session.request (requests.get / post et spotipy
+l'utilisent), c'est donc le seul point patché.
+
+    RADAR_HTTP_MODE=record streamlit run app.py    # capture
+    RADAR_HTTP_MODE=replay streamlit run app.py    # hors-ligne
+
+- RADAR_FIXTURES_DIR : dossier des fixtures (défaut DATA_DIR/fixtures),
+- RADAR_REPLAY_LATENCY_MS : latence injectée par requête en replay
+  ("recorded" = durée mesurée à l'enregistrement).
+
+Les clés d'API (api_key, auth_key, en-têtes Authorization) ne font pas
+partie de la clé de fixture et ne sont pas écrites sur disque ; le jeton
+OAuth Spotify enregistré est remplacé par un jeton factice.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from radar.config import data_path, get_secret
+
+
+SECRET_PARAMS = {"api_key", "auth_key", "client_secret", "access_token"}
+SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+
+class ReplayMissError(requests.ConnectionError):
+    """Requête absente des fixtures (vue par l'app comme une erreur réseau)."""
+
+
+def _strip_secrets(pairs) -> list:
+    return sorted((k, v) for k, v in pairs if k not in SECRET_PARAMS)
+
+
+def _normalize(method: str, url: str, params=None, data=None) -> tuple:
+    """(méthode, URL sans secrets avec paramètres triés, corps sans secrets)."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    clean_url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(_strip_secrets(query)), ""))
+
+    body = ""
+    if isinstance(data, dict):
+        body = urlencode(_strip_secrets(data.items()))
+    elif isinstance(data, (list, tuple)):
+        body = urlencode(_strip_secrets(data))
+    elif isinstance(data, bytes):
+        body = data.decode("utf-8", "replace")
+    elif data:
+        body = str(data)
+    return method.upper(), clean_url, body
+
+
+def fixture_key(method: str, url: str, params=None, data=None) -> str:
+    return hashlib.sha1("\n".join(_normalize(method, url, params, data)).encode("utf-8")).hexdigest()
+
+
+class HttpReplay:
+    """Patch de requests.Session.request en mode "record" ou "replay"."""
+
+    def __init__(self, mode: str, fixtures_dir: str = None, latency_ms=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Mode inconnu : {mode}")
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir or os.path.dirname(data_path("fixtures", "_"))
+        self.latency_ms = latency_ms
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._original = None
+        self._lock = threading.Lock()
+
+    # ----------------------------- stockage
+    def _path(self, host: str, key: str) -> str:
+        return os.path.join(self.fixtures_dir, host or "_", f"{key}.json")
+
+    def _save(self, norm: tuple, key: str, resp: requests.Response, elapsed_s: float):
+        method, url, body = norm
+        content = resp.content
+        if url.startswith(SPOTIFY_TOKEN_URL) and resp.ok:
+            token = {**resp.json(), "access_token": "replay-token"}
+            content = json.dumps(token).encode("utf-8")
+        record = {
+            "method": method,
+            "url": url,
+            "body": body,
+            "status": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items()
+                        if k.lower() in ("content-type", "retry-after")},
+            "content_b64": base64.b64encode(content).decode("ascii"),
+            "elapsed_s": round(elapsed_s, 4),
+            "recorded_at": time.time(),
+        }
+        path = self._path(urlsplit(url).netloc, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self.recorded += 1
+
+    def _load(self, norm: tuple, key: str):
+        path = self._path(urlsplit(norm[1]).netloc, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _to_response(record: dict, request_url: str) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = record["status"]
+        resp._content = base64.b64decode(record["content_b64"])
+        resp.headers.update(record.get("headers", {}))
+        resp.url = request_url
+        resp.encoding = "utf-8"
+        resp.reason = "REPLAY"
+        return resp
+
+    def _sleep(self, record: dict):
+        if self.latency_ms == "recorded":
+            time.sleep(record.get("elapsed_s", 0))
+        elif self.latency_ms:
+            time.sleep(float(self.latency_ms) / 1000)
+
+    # ----------------------------- patch
+    def _request(self, session, method, url, params=None, data=None, **kwargs):
+        norm = _normalize(method, url, params, data)
+        key = fixture_key(method, url, params, data)
+
+        if self.mode == "replay":
+            record = self._load(norm, key)
+            if record is None:
+                with self._lock:
+                    self.misses += 1
+                raise ReplayMissError(f"Pas de fixture pour {norm[0]} {norm[1]}")
+            with self._lock:
+                self.hits += 1
+            self._sleep(record)
+            return self._to_response(record, url)
+
+        t0 = time.perf_counter()
+        resp = self._original(session, method, url, params=params, data=data, **kwargs)
+        self._save(norm, key, resp, time.perf_counter() - t0)
+        return resp
+
+    def install(self):
+        if self._original is not None:
+            return self
+        self._original = requests.Session.request
+        replay = self
+
+        def request(session, method, url, params=None, data=None, **kwargs):
+            return replay._request(session, method, url, params=params, data=data, **kwargs)
+
+        requests.Session.request = request
+        return self
+
+    def uninstall(self):
+        if self._original is not None:
+            requests.Session.request = self._original
+            self._original = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+_installed = None
+
+
+def install_from_env():
+    """Active record / replay si RADAR_HTTP_MODE est défini (idempotent). Retourne l'instance ou None."""
+    global _installed
+    mode = get_secret("RADAR_HTTP_MODE")
+    if not mode or _installed is not None:
+        return _installed
+    latency = get_secret("RADAR_REPLAY_LATENCY_MS")
+    _installed = HttpReplay(mode, fixtures_dir=get_secret("RADAR_FIXTURES_DIR"), latency_ms=latency).install()
+    return _installed
@@ -0,0 +1,228 @@
+# =========================================================
+# SENTIMENT HORS-LIGNE (lexiques FR / EN / ES)
+# =========================================================
+"""
+Polarité / subjectivité des paroles sans traduction ni réseau :
+
+- identification de la langue par les mots outils (radar.lexical),
+- lexiques compacts par langue (radar/lexicons/<lang>.tsv : mot, polarité,
+  subjectivité), chargés une fois par process,
+- formes fléchies rattachées au lemme du lexique (pluriels, féminins,
+  conjugaisons courantes) une seule fois par mot distinct,
+- négation (« je t'aime pas », « not happy », « no quiero ») : polarité × -0.5,
+  intensifieurs (« très », « so », « muy ») : × 1.3,
+- score d'une ligne = moyenne des mots évalués (même convention que TextBlob).
+
+score_lines(lines, lang) est vectorisé sur un lot de lignes ;
+sentiment_scores(texts) score tout un lot de chansons en un appel.
+"""
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from radar.lexical import COMMON_WORDS_BY_LANG, TOKEN_RE
+
+
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons")
+SUPPORTED_LANGS = ("FR", "EN", "ES")
+
+NEGATION_FACTOR = -0.5
+INTENSIFIER_FACTOR = 1.3
+NEGATION_WINDOW = 3
+# Identification de langue : nb min de mots outils reconnus, part min du meilleur score
+LANG_MIN_HITS = 3
+LANG_MIN_SHARE = 0.4
+
+# Négateurs placés avant le mot / après le mot (« j'aime pas »)
+NEGATORS_BEFORE = {
+    "FR": frozenset("ne n pas jamais sans rien".split()),
+    "EN": frozenset("not no never nothing without cannot t".split()),
+    "ES": frozenset("no nunca jamás ni nada sin".split()),
+}
+NEGATORS_AFTER = {
+    "FR": frozenset("pas jamais plus rien".split()),
+    "EN": frozenset(),
+    "ES": frozenset(),
+}
+INTENSIFIERS = {
+    "FR": frozenset("très trop tellement vraiment super si grave".split()),
+    "EN": frozenset("very so really too extremely totally".split()),
+    "ES": frozenset("muy tan demasiado super realmente".split()),
+}
+
+# Suffixes retirés / terminaisons ajoutées pour retrouver un lemme du lexique
+_SUFFIXES = {
+    "FR": ("aient", "ais", "ait", "ant", "ent", "ées", "és", "ée", "ez", "es", "é", "e", "s", "x"),
+    "EN": ("ing", "ed", "es", "ly", "s", "er"),
+    "ES": ("amos", "aste", "ando", "iendo", "ado", "ido", "as", "es", "os", "an", "en", "a", "o", "e", "s"),
+}
+_ENDINGS = {
+    "FR": ("", "er", "ir", "e", "re"),
+    "EN": ("", "e"),
+    "ES": ("", "ar", "er", "ir", "o", "a"),
+}
+
+
+# ---------------------------------------------------------
+# Lexiques
+# ---------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def load_lexicon(lang: str) -> dict:
+    """{mot: (polarité, subjectivité)} pour `lang` ("FR", "EN", "ES")."""
+    lexicon = {}
+    with open(os.path.join(LEXICON_DIR, f"{lang.lower()}.tsv"), "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            word, polarity, subjectivity = line.rstrip("\n").split("\t")
+            lexicon[word] = (float(polarity), float(subjectivity))
+    return lexicon
+
+
+def _lookup(word: str, lang: str):
+    lexicon = load_lexicon(lang)
+    hit = lexicon.get(word)
+    if hit is not None:
+        return hit
+    for suffix in _SUFFIXES[lang]:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            stem = word[: -len(suffix)]
+            for ending in _ENDINGS[lang]:
+                hit = lexicon.get(stem + ending)
+                if hit is not None:
+                    return hit
+    for ending in _ENDINGS[lang][1:]:
+        hit = lexicon.get(word + ending)
+        if hit is not None:
+            return hit
+    return None
+
+
+# ---------------------------------------------------------
+# Langue
+# ---------------------------------------------------------
+
+_LANG_WEIGHTS = {}
+for _lang, _words in COMMON_WORDS_BY_LANG.items():
+    for _w in _words:
+        _LANG_WEIGHTS.setdefault(_w, []).append(_lang)
+
+
+def detect_language(text: str) -> str:
+    """ "FR" / "EN" / "ES" selon les mots outils, "unknown" si indécidable."""
+    scores = dict.fromkeys(COMMON_WORDS_BY_LANG, 0.0)
+    hits = 0
+    for token in TOKEN_RE.findall((text or "").lower()):
+        langs = _LANG_WEIGHTS.get(token)
+        if langs:
+            hits += 1
+            for lang in langs:
+                scores[lang] += 1 / len(langs)
+    if hits < LANG_MIN_HITS:
+        return "unknown"
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= LANG_MIN_SHARE * hits else "unknown"
+
+
+# ---------------------------------------------------------
+# Score
+# ---------------------------------------------------------
+
+def score_lines(lines: list, lang: str) -> np.ndarray:
+    """
+    (polarité, subjectivité) par ligne, tableau (n, 2). Lignes sans mot évalué : (0, 0).
+    `lang` hors SUPPORTED_LANGS : lexiques des trois langues, négateurs d'une lettre
+    exclus (EN « t » de « can't » ≠ FR « t' » de « je t'aime »).
+    """
+    n_lines = len(lines)
+    out = np.zeros((n_lines, 2))
+    if not n_lines:
+        return out
+    langs = [lang] if lang in SUPPORTED_LANGS else list(SUPPORTED_LANGS)
+
+    tokens = [TOKEN_RE.findall(l.lower()) for l in lines]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=n_lines)
+    if not lengths.sum():
+        return out
+    line_of = np.repeat(np.arange(n_lines), lengths)
+    codes, uniques = pd.factorize(pd.Series([w for t in tokens for w in t], dtype=object))
+
+    # Lexique, négateurs et intensifieurs : une évaluation par mot distinct
+    n_types = len(uniques)
+    polarity = np.zeros(n_types)
+    subjectivity = np.zeros(n_types)
+    found = np.zeros(n_types, dtype=bool)
+    before = np.zeros(n_types, dtype=bool)
+    after = np.zeros(n_types, dtype=bool)
+    intens = np.zeros(n_types, dtype=bool)
+    for i, word in enumerate(uniques):
+        # Langue inconnue : les élisions (« n' », « t' ») sont ambiguës d'une langue à l'autre
+        can_negate = len(langs) == 1 or len(word) > 1
+        for l in langs:
+            before[i] |= can_negate and word in NEGATORS_BEFORE[l]
+            after[i] |= can_negate and word in NEGATORS_AFTER[l]
+            intens[i] |= word in INTENSIFIERS[l]
+            if not found[i]:
+                hit = _lookup(word, l)
+                if hit is not None:
+                    polarity[i], subjectivity[i] = hit
+                    found[i] = True
+
+    pol, subj, ok = polarity[codes], subjectivity[codes], found[codes]
+    is_before, is_after, is_intens = before[codes], after[codes], intens[codes]
+    n = len(codes)
+
+    negated = np.zeros(n, dtype=bool)
+    for k in range(1, NEGATION_WINDOW + 1):
+        same = line_of[k:] == line_of[:-k]
+        negated[k:] |= is_before[:-k] & same
+        if k <= 2:
+            negated[:-k] |= is_after[k:] & same
+    boosted = np.zeros(n, dtype=bool)
+    boosted[1:] = is_intens[:-1] & (line_of[1:] == line_of[:-1])
+
+    pol = np.clip(pol * np.where(negated, NEGATION_FACTOR, 1.0) * np.where(boosted, INTENSIFIER_FACTOR, 1.0), -1, 1)
+    subj = np.clip(subj * np.where(boosted, INTENSIFIER_FACTOR, 1.0), 0, 1)
+
+    counts = np.bincount(line_of, weights=ok, minlength=n_lines)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, 0] = np.where(counts > 0, np.bincount(line_of, weights=pol * ok, minlength=n_lines) / counts, 0.0)
+        out[:, 1] = np.where(counts > 0, np.bincount(line_of, weights=subj * ok, minlength=n_lines) / counts, 0.0)
+    return out
+
+
+def sentiment_scores(texts: list) -> pd.DataFrame:
+    """
+    Lot de chansons -> DataFrame (lang, polarity, subjectivity), même ordre que `texts`.
+    Chanson = moyenne des lignes porteuses de sentiment (0 si aucune).
+    """
+    texts = list(texts)
+    langs = [detect_language(t) for t in texts]
+    df = pd.DataFrame({"lang": langs, "polarity": 0.0, "subjectivity": 0.0})
+
+    rows = [
+        (song, line.strip())
+        for song, text in enumerate(texts)
+        for line in (text or "").splitlines()
+        if line.strip()
+    ]
+    if not rows:
+        return df
+    lines = pd.DataFrame(rows, columns=["song", "line"])
+    lines["lang"] = np.asarray(langs, dtype=object)[lines["song"].to_numpy()]
+
+    # Un appel vectorisé par langue, sur les lignes distinctes
+    scores = np.zeros((len(lines), 2))
+    for lang, group in lines.groupby("lang", sort=False):
+        codes, unique = pd.factorize(group["line"])
+        scores[group.index.to_numpy()] = score_lines(list(unique), lang)[codes]
+    lines["polarity"], lines["subjectivity"] = scores[:, 0], scores[:, 1]
+
+    carries = lines[(lines["polarity"] != 0) | (lines["subjectivity"] != 0)]
+    means = carries.groupby("song")[["polarity", "subjectivity"]].mean()
+    df.loc[means.index, ["polarity", "subjectivity"]] = means.to_numpy()
+    return df
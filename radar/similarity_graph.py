@@ -0,0 +1,434 @@
+# =========================================================
+# ÉCOSYSTÈME D'UN ARTISTE (graphe de similarité Last.fm multi-sauts)
+# =========================================================
+"""
+Voisinage à 2-3 sauts d'un artiste, pour les featurings et le ciblage lookalike :
+
+- crawl() parcourt le graphe artist.getSimilar en largeur, niveau par niveau :
+  appels Last.fm en parallèle (pool borné), budget de nœuds (les voisins les
+  plus proches d'abord quand le budget ne suffit pas),
+- l'adjacence est gardée dans DATA_DIR/similarity.sqlite3 (artistes + arêtes
+  source -> cible, match Last.fm) : un artiste déjà exploré depuis moins de
+  SIMILAR_MAX_AGE_S n'est pas rappelé, d'un crawl à l'autre et d'un artiste
+  à l'autre (les voisinages se recouvrent beaucoup),
+- graph_metrics() / shortest_paths() / render_subgraph() ne lisent que le
+  graphe en mémoire (matrice dense, n <= budget) : PageRank, degré,
+  communautés (propagation de labels), plus courts chemins vers des artistes
+  cibles (roster, featurings visés).
+
+Cache chaud : un graphe de 500 artistes à 3 sauts se reconstruit en quelques
+lectures SQLite (une requête par niveau et par paquet de SQL_BATCH artistes).
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from radar.config import data_path
+from radar.corpus import SQL_BATCH, fold
+from radar.sources import get_lastfm_similar_artists
+from radar.tracing import current_span, propagate, span, traced
+
+
+SIMILAR_MAX_AGE_S = 14 * 24 * 3600
+DEFAULT_HOPS = 2
+DEFAULT_MAX_NODES = 500
+DEFAULT_FANOUT = 10
+DEFAULT_WORKERS = 8
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_ITERATIONS = 50
+LABEL_ITERATIONS = 20
+RENDER_MAX_NODES = 80
+LAYOUT_ITERATIONS = 80
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artists (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    crawled_at REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edges (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    match REAL NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (source, target)
+) WITHOUT ROWID;
+"""
+
+
+# ---------------------------------------------------------
+# Store d'adjacence
+# ---------------------------------------------------------
+
+class SimilarityStore:
+    def __init__(self, path: str = None):
+        self.path = path or data_path("similarity.sqlite3")
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, results: list) -> dict:
+        """
+        Enregistre en une transaction [(clé, nom, voisins Last.fm)] et retourne
+        {clé: [(clé voisin, nom voisin, match)]}. Les voisinages vides (artiste
+        inconnu, Last.fm indisponible) ne sont pas mémorisés.
+        """
+        out, now = {}, time.time()
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                for key, name, similar in results:
+                    neighbours = []
+                    for item in similar or []:
+                        target_name = item.get("name")
+                        target = fold(target_name)
+                        if not target or target == key:
+                            continue
+                        try:
+                            match = float(item.get("match") or 0.0)
+                        except (TypeError, ValueError):
+                            match = 0.0
+                        neighbours.append((target, target_name, match))
+                    out[key] = neighbours
+                    if not neighbours:
+                        continue
+                    conn.execute(
+                        "INSERT INTO artists (key, name, crawled_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET name = excluded.name, crawled_at = excluded.crawled_at",
+                        (key, name, now),
+                    )
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO artists (key, name) VALUES (?, ?)",
+                        ((t, n) for t, n, _ in neighbours),
+                    )
+                    conn.execute("DELETE FROM edges WHERE source = ?", (key,))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?)",
+                        ((key, t, m, rank) for rank, (t, _, m) in enumerate(neighbours)),
+                    )
+        return out
+
+    def neighbours(self, keys: list, max_age_s: float = SIMILAR_MAX_AGE_S) -> dict:
+        """
+        {clé: [(clé voisin, nom voisin, match)]} pour les artistes de `keys`
+        explorés depuis moins de `max_age_s` (les autres sont absents du résultat).
+        """
+        out = {}
+        conn = self._conn()
+        since = time.time() - max_age_s
+        keys = list(keys)
+        for i in range(0, len(keys), SQL_BATCH):
+            chunk = keys[i:i + SQL_BATCH]
+            marks = ",".join("?" * len(chunk))
+            fresh = [k for (k,) in conn.execute(
+                f"SELECT key FROM artists WHERE key IN ({marks}) AND crawled_at >= ?", [*chunk, since]
+            )]
+            if not fresh:
+                continue
+            for k in fresh:
+                out[k] = []
+            marks = ",".join("?" * len(fresh))
+            rows = conn.execute(
+                "SELECT e.source, e.target, a.name, e.match FROM edges e JOIN artists a ON a.key = e.target "
+                f"WHERE e.source IN ({marks}) ORDER BY e.source, e.rank",
+                fresh,
+            )
+            for source, target, name, match in rows:
+                out[source].append((target, name, match))
+        return out
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        artists, crawled = conn.execute("SELECT COUNT(*), COUNT(crawled_at) FROM artists").fetchone()
+        edges = conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        return {"artists": artists, "crawled": crawled, "edges": edges}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_similarity_store() -> SimilarityStore:
+    """Instance partagée par le process."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SimilarityStore()
+        return _store
+
+
+# ---------------------------------------------------------
+# Crawl (réseau seulement pour les artistes absents / périmés)
+# ---------------------------------------------------------
+
+@dataclass
+class EcosystemGraph:
+    """Graphe non orienté : `weights[i, j]` = max des match Last.fm i -> j et j -> i."""
+    seed: str
+    keys: list
+    names: list
+    depth: np.ndarray
+    weights: np.ndarray
+    cited_by: np.ndarray
+    stats: dict = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def index(self, name: str):
+        try:
+            return self.keys.index(fold(name))
+        except ValueError:
+            return None
+
+
+def _fetch_similar(name: str, fanout: int) -> list:
+    return get_lastfm_similar_artists(name, limit=fanout)
+
+
+@traced("graph.crawl")
+def crawl(seed_name: str, hops: int = DEFAULT_HOPS, max_nodes: int = DEFAULT_MAX_NODES,
+          fanout: int = DEFAULT_FANOUT, workers: int = DEFAULT_WORKERS,
+          max_age_s: float = SIMILAR_MAX_AGE_S, store: SimilarityStore = None,
+          progress=None) -> EcosystemGraph:
+    """
+    Voisinage de `seed_name` jusqu'à `hops` sauts, au plus `max_nodes` artistes.
+    `progress(niveau, hops)` est appelé après chaque niveau.
+    """
+    store = store or get_similarity_store()
+    seed = fold(seed_name)
+    names, depth, adjacency = {seed: seed_name}, {seed: 0}, {}
+    frontier, fetched = [seed], 0
+
+    for level in range(hops):
+        if not frontier:
+            break
+        known = store.neighbours(frontier, max_age_s)
+        missing = [k for k in frontier if k not in known]
+        if missing:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    propagate(_fetch_similar), [names[k] for k in missing], [fanout] * len(missing)
+                ))
+            known.update(store.save([(k, names[k], r) for k, r in zip(missing, results)]))
+            fetched += len(missing)
+
+        # Nouveaux artistes du niveau suivant : meilleur match d'abord (budget)
+        candidates = {}
+        for key in frontier:
+            adjacency[key] = known.get(key, [])[:fanout]
+            for target, name, match in adjacency[key]:
+                if target not in depth and match > candidates.get(target, (-1.0, None))[0]:
+                    candidates[target] = (match, name)
+        ranked = sorted(candidates.items(), key=lambda c: -c[1][0])[: max(max_nodes - len(depth), 0)]
+        frontier = []
+        for target, (_, name) in ranked:
+            names[target], depth[target] = name, level + 1
+            frontier.append(target)
+        if progress:
+            progress(level + 1, hops)
+
+    # Dernier niveau : pas d'appel réseau, mais les arêtes déjà connues sont reprises
+    for key, neighbours in store.neighbours(frontier, max_age_s).items():
+        adjacency[key] = neighbours[:fanout]
+
+    keys = list(depth)
+    position = {k: i for i, k in enumerate(keys)}
+    n = len(keys)
+    directed = np.zeros((n, n))
+    for source, neighbours in adjacency.items():
+        for target, _, match in neighbours:
+            j = position.get(target)
+            if j is not None:
+                directed[position[source], j] = max(match, 1e-3)
+
+    stats = {"nodes": n, "edges": int(np.count_nonzero(directed)), "fetched": fetched,
+             "cached": len(adjacency) - fetched}
+    current_span().set(**stats)
+    return EcosystemGraph(
+        seed=seed,
+        keys=keys,
+        names=[names[k] for k in keys],
+        depth=np.array([depth[k] for k in keys]),
+        weights=np.maximum(directed, directed.T),
+        cited_by=np.count_nonzero(directed, axis=0),
+        stats=stats,
+    )
+
+
+# ---------------------------------------------------------
+# Analyse (graphe en mémoire uniquement)
+# ---------------------------------------------------------
+
+def pagerank(weights: np.ndarray, damping: float = PAGERANK_DAMPING,
+             iterations: int = PAGERANK_ITERATIONS) -> np.ndarray:
+    n = len(weights)
+    if not n:
+        return np.zeros(0)
+    out_weight = weights.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        transition = np.where(out_weight[:, None] > 0, weights / out_weight[:, None], 1.0 / n)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (rank @ transition)
+        if np.abs(updated - rank).sum() < 1e-9:
+            return updated
+        rank = updated
+    return rank
+
+
+def label_communities(weights: np.ndarray, iterations: int = LABEL_ITERATIONS) -> np.ndarray:
+    """
+    Propagation de labels pondérée : chaque artiste prend le label dominant de
+    ses voisins. Labels renumérotés 0..k-1 par taille décroissante.
+    """
+    n = len(weights)
+    labels = np.arange(n)
+    if not n:
+        return labels
+    order = np.random.default_rng(0).permutation(n)
+    for _ in range(iterations):
+        changed = False
+        # Mise à jour asynchrone par blocs : évite les oscillations de la version synchrone
+        for block in np.array_split(order, max(1, n // 64)):
+            block_weights = weights[block]
+            votes = np.zeros((len(block), n))
+            rows, cols = np.nonzero(block_weights)
+            np.add.at(votes, (rows, labels[cols]), block_weights[rows, cols])
+            has_votes = votes.any(axis=1)
+            best = np.where(has_votes, votes.argmax(axis=1), labels[block])
+            keep = votes[np.arange(len(block)), labels[block]] >= votes[np.arange(len(block)), best]
+            best = np.where(keep, labels[block], best)
+            changed |= bool((best != labels[block]).any())
+            labels[block] = best
+        if not changed:
+            break
+    _, codes, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank_of = np.empty(len(sizes), dtype=int)
+    rank_of[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return rank_of[codes]
+
+
+def graph_metrics(graph: EcosystemGraph) -> pd.DataFrame:
+    """
+    Une ligne par artiste : artist, depth, degree, cited_by (nb d'artistes du
+    graphe qui le citent comme similaire), pagerank, community.
+    """
+    with span("graph.metrics", nodes=len(graph)):
+        return pd.DataFrame({
+            "artist": graph.names,
+            "depth": graph.depth,
+            "degree": np.count_nonzero(graph.weights, axis=1),
+            "cited_by": graph.cited_by,
+            "pagerank": pagerank(graph.weights),
+            "community": label_communities(graph.weights),
+        })
+
+
+def shortest_paths(graph: EcosystemGraph, targets: list) -> pd.DataFrame:
+    """
+    Plus court chemin (en sauts) de l'artiste analysé vers chaque cible ; à nombre
+    de sauts égal, le prédécesseur le plus similaire. Colonnes : target, hops,
+    path, strength (match moyen le long du chemin). hops = None si hors du graphe.
+    """
+    columns = ["target", "hops", "path", "strength"]
+    n = len(graph)
+    if not n:
+        return pd.DataFrame(columns=columns)
+    linked = graph.weights > 0
+    parent = np.full(n, -1)
+    hops = np.full(n, -1)
+    source = graph.keys.index(graph.seed)
+    hops[source] = 0
+    frontier = np.array([source])
+    level = 0
+    while len(frontier):
+        level += 1
+        reached = linked[frontier].any(axis=0) & (hops < 0)
+        new = np.flatnonzero(reached)
+        if not len(new):
+            break
+        parent[new] = frontier[graph.weights[np.ix_(frontier, new)].argmax(axis=0)]
+        hops[new] = level
+        frontier = new
+
+    rows = []
+    for target in targets:
+        i = graph.index(target)
+        if i is None or hops[i] < 0:
+            rows.append((target, None, None, None))
+            continue
+        path = [i]
+        while parent[path[-1]] >= 0:
+            path.append(parent[path[-1]])
+        path.reverse()
+        strength = float(np.mean([graph.weights[a, b] for a, b in zip(path, path[1:])])) if len(path) > 1 else 1.0
+        rows.append((graph.names[i], int(hops[i]), " → ".join(graph.names[k] for k in path), round(strength, 3)))
+    df = pd.DataFrame(rows, columns=columns)
+    df["hops"] = df["hops"].astype("Int64")
+    return df
+
+
+# ---------------------------------------------------------
+# Rendu (sous-graphe plafonné + layout)
+# ---------------------------------------------------------
+
+def spring_layout(weights: np.ndarray, iterations: int = LAYOUT_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Layout force-directed (Fruchterman-Reingold) vectorisé, positions (n, 2)."""
+    n = len(weights)
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-1, 1, (n, 2))
+    if n < 2:
+        return pos
+    k = 1 / np.sqrt(n)
+    temperature = 0.2
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.maximum(np.linalg.norm(delta, axis=-1), 1e-3)
+        force = (k * k / dist ** 2 - weights * dist / k)[:, :, None] * delta
+        disp = force.sum(axis=1)
+        length = np.maximum(np.linalg.norm(disp, axis=1), 1e-9)
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature *= 0.95
+    return pos
+
+
+def render_subgraph(graph: EcosystemGraph, metrics: pd.DataFrame, keep: list = (),
+                    max_nodes: int = RENDER_MAX_NODES) -> tuple:
+    """
+    Sous-graphe affichable : artiste analysé + artistes de `keep` (chemins vers les
+    cibles) + les plus centraux jusqu'à `max_nodes`. Retourne (nœuds, arêtes) :
+    DataFrame des nœuds (metrics + x, y) et liste [(i, j, poids)] en index de ligne.
+    """
+    with span("graph.render", nodes=len(graph), max_nodes=max_nodes):
+        forced = [graph.keys.index(graph.seed)] + [i for i in (graph.index(k) for k in keep) if i is not None]
+        selected = list(dict.fromkeys(forced))
+        for i in np.argsort(-metrics["pagerank"].to_numpy(), kind="stable"):
+            if len(selected) >= max_nodes:
+                break
+            if i not in selected:
+                selected.append(int(i))
+        idx = np.array(selected[:max(max_nodes, len(forced))])
+        sub = graph.weights[np.ix_(idx, idx)]
+        pos = spring_layout(sub)
+        nodes = metrics.iloc[idx].reset_index(drop=True).assign(x=pos[:, 0], y=pos[:, 1])
+        rows, cols = np.nonzero(np.triu(sub))
+        edges = [(int(a), int(b), float(sub[a, b])) for a, b in zip(rows, cols)]
+    return nodes, edges
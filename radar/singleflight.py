@@ -0,0 +1,88 @@
+# =========================================================
+# SINGLEFLIGHT (coalescence des appels identiques concurrents)
+# =========================================================
+"""
+Quand plusieurs sessions demandent la même chose au même moment (ex : dix
+analystes qui chargent le même artiste), seul le premier appel s'exécute ;
+les appels concurrents de même clé attendent son résultat.
+
+- clé = (nom de l'opération, arguments),
+- pas de cache : la clé est libérée dès la fin de l'appel,
+- une exception est propagée à tous les appelants en attente, puis oubliée,
+- le résultat est partagé entre les appelants : ne pas le modifier en place.
+"""
+
+import functools
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+from radar.tracing import current_span
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = Counter()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+                self._stats["executed"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            current_span().set(coalesced=True)
+            return fut.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            fut.set_exception(exc)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+
+_group = SingleFlight()
+
+
+def singleflight_stats() -> dict:
+    return _group.stats()
+
+
+def coalesce(name: str = None):
+    """
+    Décorateur : appels concurrents de mêmes arguments coalescés (groupe process).
+    Arguments non hashables : appel direct, sans coalescence.
+    """
+    def decorator(fn):
+        op = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (op, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)
+            return _group.do(key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,90 @@
+# =========================================================
+# SNAPSHOTS ARTISTES PRÉCALCULÉS
+# =========================================================
+"""
+Un fichier JSON par artiste (DATA_DIR/snapshots/<artist_id>.json) avec tout
+ce que les pages Audit et Labo affichent : métadonnées, sorties, top titres,
+tags / similaires Last.fm (enrichis Spotify) et descripteurs audio des top titres.
+
+Écrits par le refresher de fond, lus par l'app (cache mémoire invalidé au mtime).
+En mode hors-ligne, servis par le bundle actif (radar.bundle), sans limite d'âge.
+"""
+
+import json
+import os
+import threading
+import time
+
+from radar.bundle import active_bundle
+from radar.config import data_path
+from radar.tracing import current_span, traced
+
+
+SNAPSHOT_VERSION = 1
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def snapshot_path(artist_id: str) -> str:
+    return data_path("snapshots", f"{artist_id}.json")
+
+
+def save_artist_snapshot(snapshot: dict):
+    """Écriture atomique (fichier temporaire + rename)."""
+    snapshot = {**snapshot, "version": SNAPSHOT_VERSION, "updated_at": snapshot.get("updated_at") or time.time()}
+    path = snapshot_path(snapshot["artist"]["id"])
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+@traced("snapshot.load")
+def load_artist_snapshot(artist_id: str, max_age_s: float = None):
+    """
+    Snapshot d'un artiste ou None (absent, illisible ou plus vieux que `max_age_s`).
+    """
+    bundle = active_bundle()
+    if bundle is not None:
+        snapshot = bundle.snapshot(artist_id)
+        current_span().set(cache="hit" if snapshot else "miss", source="bundle")
+        return snapshot
+
+    path = snapshot_path(artist_id)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        current_span().set(cache="miss")
+        return None
+
+    with _cache_lock:
+        hit = _cache.get(artist_id)
+    if hit and hit[0] == mtime:
+        snapshot = hit[1]
+    else:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            current_span().set(cache="miss")
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            current_span().set(cache="miss")
+            return None
+        with _cache_lock:
+            _cache[artist_id] = (mtime, snapshot)
+
+    if max_age_s is not None and time.time() - snapshot.get("updated_at", 0) > max_age_s:
+        current_span().set(cache="miss", stale=True)
+        return None
+    current_span().set(cache="hit")
+    return snapshot
+
+
+def snapshot_age(artist_id: str):
+    """Âge (s) du snapshot d'un artiste, None s'il n'existe pas."""
+    try:
+        return time.time() - os.path.getmtime(snapshot_path(artist_id))
+    except OSError:
+        return None
@@ -0,0 +1,528 @@
+# =========================================================
+# SOURCES EXTERNES (DeepL / lyrics.ovh / iTunes / Last.fm)
+# =========================================================
+"""
+Clients des APIs externes (Spotify, DeepL, lyrics.ovh, iTunes, Last.fm),
+sans dépendance à Streamlit : utilisables depuis l'app, des threads de fond
+ou des jobs batch. Les clés sont lues via radar.config.get_secret() et chaque
+appel sortant passe par l'ordonnanceur de son fournisseur (radar.ratelimit :
+débit, priorité, disjoncteur) et est tracé (radar.tracing) avec la taille
+de la réponse quand elle est connue. En cas de panne d'un fournisseur, la
+dernière valeur connue est servie (cache périmé) avant la valeur vide.
+Les appels identiques concurrents (plusieurs sessions sur le même artiste)
+sont coalescés (radar.singleflight) : un seul appel amont par clé.
+"""
+
+import re
+import threading
+from urllib.parse import quote
+
+import requests
+
+from radar.config import get_secret, make_spotify_client
+from radar.ratelimit import call, fallback
+from radar.singleflight import coalesce
+from radar.tracing import current_span, span, traced
+
+
+_spotify = None
+_spotify_lock = threading.Lock()
+
+
+def get_spotify():
+    """Client Spotify partagé par le process (créé au premier appel)."""
+    global _spotify
+    with _spotify_lock:
+        if _spotify is None:
+            _spotify = make_spotify_client()
+        return _spotify
+
+
+# =========================================================
+# SPOTIFY
+# =========================================================
+
+
+def _norm_text(s: str) -> str:
+    """Normalise un texte pour comparer les noms (minuscules, sans accents, sans caractères spéciaux)."""
+    if not s:
+        return ""
+    s = s.lower()
+    # Option simple : enlever tout sauf lettres/chiffres
+    s = re.sub(r"[^a-z0-9]", "", s)
+    return s
+
+
+def _parse_spotify_artist_id_from_query(query: str):
+    """
+    Si l'utilisateur colle un lien Spotify d'artiste,
+    on extrait l'ID directement.
+    """
+    if not query:
+        return None
+    # Exemple : https://open.spotify.com/artist/4W63Zz1gVQpFDuBt06yQhg?si=...
+    m = re.search(r"open\.spotify\.com/artist/([a-zA-Z0-9]+)", query)
+    if m:
+        return m.group(1)
+    return None
+
+
+@traced("spotify.search")
+@coalesce("spotify.search")
+@fallback("spotify", "spotify.search")
+def search_best_artist(query: str):
+    """
+    Retourne le meilleur artiste Spotify pour une requête donnée,
+    en évitant le piège du 'premier résultat au hasard'.
+
+    Stratégie :
+    1. Si lien Spotify -> on récupère directement l'artiste par ID.
+    2. Sinon :
+       - on cherche jusqu'à 10 artistes,
+       - on privilégie :
+         a) nom EXACT (normalisé),
+         b) nom qui commence par la requête,
+         c) nom qui contient la requête,
+         d) sinon : artiste le plus populaire.
+    """
+    if not query:
+        return None
+
+    # 1) Cas lien Spotify copie-collé
+    artist_id = _parse_spotify_artist_id_from_query(query)
+    if artist_id:
+        return _spotify_artist_or_none(artist_id)
+
+    # 2) Cas recherche par nom
+    res = call("spotify", get_spotify().search, q=query, type="artist", limit=10)
+    items = res.get("artists", {}).get("items", [])
+
+    if not items:
+        return None
+
+    q_norm = _norm_text(query)
+
+    # a) Nom exact
+    exact_matches = [
+        a for a in items
+        if _norm_text(a.get("name", "")) == q_norm
+    ]
+    if exact_matches:
+        # s'il y en a plusieurs, on prend le plus populaire
+        return sorted(exact_matches, key=lambda a: a.get("popularity", 0), reverse=True)[0]
+
+    # b) Nom qui commence par la requête normalisée
+    startswith_matches = [
+        a for a in items
+        if _norm_text(a.get("name", "")).startswith(q_norm)
+    ]
+    if startswith_matches:
+        return sorted(startswith_matches, key=lambda a: a.get("popularity", 0), reverse=True)[0]
+
+    # c) Nom qui contient la requête normalisée
+    contains_matches = [
+        a for a in items
+        if q_norm in _norm_text(a.get("name", ""))
+    ]
+    if contains_matches:
+        return sorted(contains_matches, key=lambda a: a.get("popularity", 0), reverse=True)[0]
+
+    # d) Fallback : prendre le plus populaire parmi les résultats
+    return sorted(items, key=lambda a: a.get("popularity", 0), reverse=True)[0]
+
+
+@traced("spotify.top_tracks")
+@coalesce("spotify.top_tracks")
+@fallback("spotify", "spotify.top_tracks", default=list)
+def get_artist_top_tracks(artist_id: str, market: str = "FR"):
+    """
+    Top titres Spotify d'un artiste sur un marché (FR par défaut ; plusieurs
+    marchés : radar.markets.get_top_tracks_multi).
+    On garde les titres où l'artiste principal est bien celui sélectionné.
+    """
+    top_resp = call("spotify", get_spotify().artist_top_tracks, artist_id, country=market)
+    tracks_raw = top_resp.get("tracks", [])
+    current_span().set(items=len(tracks_raw))
+
+    return [
+        t for t in tracks_raw
+        if any(a.get("id") == artist_id for a in t.get("artists", []))
+    ] or tracks_raw
+
+
+def _spotify_artist_or_none(artist_id: str):
+    """Objet artiste, None si l'ID est inconnu (les pannes Spotify lèvent)."""
+    try:
+        return call("spotify", get_spotify().artist, artist_id)
+    except Exception as exc:
+        if getattr(exc, "http_status", None) in (400, 404):
+            return None
+        raise
+
+
+@traced("spotify.artist")
+@coalesce("spotify.artist")
+@fallback("spotify", "spotify.artist")
+def get_artist(artist_id: str):
+    """Objet artiste Spotify complet (ou None)."""
+    return _spotify_artist_or_none(artist_id)
+
+
+# Pages de 50 sorties lues au plus (discographie complète des artistes très prolifiques)
+ALBUMS_MAX_PAGES = 10
+
+
+@traced("spotify.albums")
+@coalesce("spotify.albums")
+@fallback("spotify", "spotify.albums", default=list)
+def get_artist_albums(artist_id: str, market: str = "FR"):
+    """
+    Sorties (albums + singles) d'un artiste disponibles sur un marché (FR par
+    défaut ; plusieurs marchés : radar.markets.get_albums_multi) : liste d'items Spotify.
+    Toutes les pages de 50 sorties, jusqu'à ALBUMS_MAX_PAGES.
+    """
+    sp = get_spotify()
+    page = call(
+        "spotify",
+        sp.artist_albums,
+        artist_id,
+        album_type="single,album",
+        limit=50,
+        country=market
+    )
+    items, n_pages = [], 0
+    while page:
+        items.extend(page.get("items", []))
+        n_pages += 1
+        page = call("spotify", sp.next, page) if page.get("next") and n_pages < ALBUMS_MAX_PAGES else None
+    current_span().set(items=len(items), pages=n_pages)
+    return items
+
+
+@traced("spotify.album_tracks")
+@coalesce("spotify.album_tracks")
+@fallback("spotify", "spotify.album_tracks", default=list)
+def get_album_tracks(album_id: str, market: str = "FR"):
+    """
+    Pistes d'une sortie (items Spotify simplifiés : id, name, track_number, artists...)
+    telles que disponibles sur `market` (un marché où la sortie est publiée).
+    """
+    resp = call("spotify", get_spotify().album_tracks, album_id, limit=50, market=market)
+    current_span().set(items=len(resp.get("items", [])))
+    return resp.get("items", [])
+
+
+def similar_rows_with_spotify(similar_list):
+    """
+    Enrichit la liste Last.fm d'artistes similaires avec Spotify.
+    Retourne une liste de dicts :
+    Artiste, Similarité_Lastfm, Popularité_Spotify, Followers_Spotify
+    """
+    rows = []
+    for a in similar_list:
+        name = a.get("name", "")
+        match = float(a.get("match", 0) or 0.0)
+        if not name:
+            continue
+
+        sp_artist = search_best_artist(name)
+        if sp_artist is None:
+            rows.append({
+                "Artiste": name,
+                "Similarité_Lastfm": match,
+                "Popularité_Spotify": None,
+                "Followers_Spotify": None,
+            })
+        else:
+            rows.append({
+                "Artiste": name,
+                "Similarité_Lastfm": match,
+                "Popularité_Spotify": sp_artist.get("popularity"),
+                "Followers_Spotify": sp_artist.get("followers", {}).get("total"),
+            })
+    return rows
+
+
+
+# =========================================================
+# DEEPL / LYRICS / ITUNES / LAST.FM
+# =========================================================
+
+DEEPL_URL = "https://api-free.deepl.com/v2/translate"
+
+
+@traced("deepl.translate")
+def deepl_translate_batch(texts: list, target_lang: str = "EN") -> list:
+    """
+    Une requête DeepL pour plusieurs textes (champ `text` répété).
+    Retourne [(traduction, langue_source)] dans l'ordre des textes.
+    Lève en cas d'erreur ou d'absence de clé : le cache / découpage
+    est géré par radar.translation.
+    """
+    api_key = get_secret("DEEPL_API_KEY")
+    if api_key is None:
+        raise RuntimeError("DEEPL_API_KEY absente")
+    data = [("auth_key", api_key), ("target_lang", target_lang)] + [("text", t) for t in texts]
+    resp = call("deepl", requests.post, DEEPL_URL, data=data, timeout=20)
+    current_span().set(status=resp.status_code, bytes=len(resp.content),
+                       texts=len(texts), chars=sum(len(t) for t in texts))
+    resp.raise_for_status()
+    translations = resp.json().get("translations", [])
+    if len(translations) != len(texts):
+        raise ValueError(f"DeepL : {len(translations)} traductions pour {len(texts)} textes")
+    return [
+        (t.get("text", src), (t.get("detected_source_language") or "unknown").lower())
+        for src, t in zip(texts, translations)
+    ]
+
+
+def _clean_track_title_for_lyrics(title: str) -> str:
+    """
+    Nettoie un titre pour les requêtes paroles :
+    - enlève les parenthèses (Radio Edit, Remix…)
+    - coupe après un '-'
+    """
+    if not title:
+        return ""
+    t = re.sub(r"\(.*?\)", "", title)   # supprime (...) 
+    t = t.split(" - ")[0]               # coupe après " - "
+    return t.strip()
+
+
+def _clean_lyrics_text(txt: str) -> str:
+    """
+    Nettoie un texte de paroles brut (Genius) :
+    - enlève les blocs type 'Embed' à la fin
+    """
+    if not txt:
+        return ""
+    # beaucoup de paroles Genius finissent par '123Embed'
+    txt = re.split(r"\n?\d*\s*Embed$", txt)[0]
+    return txt.strip()
+
+
+@traced("lyrics.get")
+@coalesce("lyrics.get")
+@fallback("lyrics", "lyrics.get")
+def get_any_lyrics(artist_name: str, track_title: str):
+    """
+    Essaie de récupérer des paroles pour (artiste, titre) via lyrics.ovh uniquement.
+    Retourne un string (paroles) ou None.
+    Chaque tentative est un span "lyrics.fetch" (statut HTTP, taille, résultat).
+    """
+    clean_title = _clean_track_title_for_lyrics(track_title)
+
+    def fetch(a, t, label=""):
+        url = f"https://api.lyrics.ovh/v1/{quote(a)}/{quote(t)}"
+        with span("lyrics.fetch", variant=label) as s:
+            resp = call("lyrics", requests.get, url, timeout=10)
+            s.set(status=resp.status_code, bytes=len(resp.content), found=False)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                resp.raise_for_status()
+            if resp.status_code == 200:
+                data = resp.json()
+                txt = data.get("lyrics")
+                if txt and "No lyrics found" not in txt:
+                    s.set(found=True)
+                    return txt.strip()
+        return None
+
+    # 1) artiste complet
+    txt = fetch(artist_name, clean_title, label="[artist, title]")
+    if txt:
+        return txt
+
+    # 2) dernier mot du nom d’artiste (ex : "Stromae", "Laylow")
+    short_artist = artist_name.split()[-1]
+    txt = fetch(short_artist, clean_title, label="[short artist, title]")
+    if txt:
+        return txt
+
+    return None
+
+ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
+ITUNES_LOOKUP_URL = "https://itunes.apple.com/lookup"
+ITUNES_TIMEOUT_S = 10
+# Attente max d'un jeton iTunes pour une recherche isolée (défaut de radar.ratelimit.call)
+ITUNES_WAIT_S = 30.0
+ITUNES_SEARCH_LIMIT = 5
+# Identifiants par requête /lookup (l'API en accepte ~200)
+ITUNES_LOOKUP_MAX_IDS = 150
+# En dessous, le meilleur candidat de la recherche est jugé faux : pas de preview
+ITUNES_MIN_CONFIDENCE = 0.6
+
+
+def _itunes_norm(s: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", (s or "").lower())
+
+
+def itunes_match_confidence(artist_name: str, track_title: str, item: dict, duration_ms: int = None) -> float:
+    """
+    Confiance (0-1) qu'un résultat iTunes soit le titre cherché : artiste (0.4),
+    titre (0.5 ; 0.35 sans les mentions « (feat.) », « [Remix] », « - Remastered 2011 »…),
+    durée (0.1).
+    """
+    n_artist, n_title = _itunes_norm(artist_name), _itunes_norm(track_title)
+    it_artist, it_title = _itunes_norm(item.get("artistName")), _itunes_norm(item.get("trackName"))
+    base_title = _itunes_norm(_clean_track_title_for_lyrics(re.sub(r"\[.*?\]", "", track_title or "")))
+
+    score = 0.0
+    if n_artist and (n_artist in it_artist or it_artist in n_artist):
+        score += 0.4
+    if n_title and n_title == it_title:
+        score += 0.5
+    elif base_title and base_title in it_title:
+        score += 0.35
+    if duration_ms and item.get("trackTimeMillis"):
+        score += 0.1 if abs(item["trackTimeMillis"] - duration_ms) <= 3000 else 0.0
+    elif n_title and n_artist and score >= 0.9:
+        score += 0.1  # durée inconnue : artiste + titre exacts suffisent
+    return round(score, 2)
+
+
+def _itunes_record(item: dict, confidence: float = None) -> dict:
+    return {
+        "title": item.get("trackName"),
+        "artist": item.get("artistName"),
+        "preview_url": item.get("previewUrl"),
+        "cover": item.get("artworkUrl100"),
+        "itunes_id": item.get("trackId"),
+        "confidence": confidence,
+    }
+
+
+@traced("itunes.search")
+@coalesce("itunes.search")
+def search_itunes_track(artist_name: str, track_title: str, duration_ms: int = None,
+                        wait_timeout: float = ITUNES_WAIT_S):
+    """
+    Recherche plein texte d'un titre sur iTunes (lève en cas d'échec de l'appel).
+    Retourne dict {title, artist, preview_url, cover, itunes_id, confidence} ou None
+    (aucun résultat, ou meilleur candidat sous ITUNES_MIN_CONFIDENCE).
+    `wait_timeout` : attente max d'un jeton (recherches en lot : plus long que le défaut).
+    """
+    term = f"{artist_name} {track_title}"
+    params = {
+        "term": term,
+        "media": "music",
+        "entity": "song",
+        "limit": ITUNES_SEARCH_LIMIT,
+    }
+    resp = call("itunes", requests.get, ITUNES_SEARCH_URL, params=params, timeout=ITUNES_TIMEOUT_S,
+                wait_timeout=wait_timeout)
+    current_span().set(status=resp.status_code, bytes=len(resp.content))
+    resp.raise_for_status()
+    results = resp.json().get("results") or []
+    if not results:
+        return None
+
+    # Premier résultat en cas d'égalité : l'ordre de pertinence d'iTunes départage
+    scored = [(itunes_match_confidence(artist_name, track_title, item, duration_ms), item) for item in results]
+    confidence, best = max(scored, key=lambda s: s[0])
+    current_span().set(confidence=confidence)
+    if confidence < ITUNES_MIN_CONFIDENCE:
+        return None
+    return _itunes_record(best, confidence)
+
+
+@fallback("itunes", "itunes.search")
+def get_itunes_preview_for_track(artist_name: str, track_title: str, duration_ms: int = None):
+    """
+    Récupère un preview iTunes (30s) pour un titre donné : dict {title, artist,
+    preview_url, cover, itunes_id, confidence} ou None (dernière valeur connue si iTunes est en panne).
+    Pour des titres Spotify, préférer radar.itunes_map (table de correspondance + lookup groupé).
+    """
+    return search_itunes_track(artist_name, track_title, duration_ms)
+
+
+@traced("itunes.lookup")
+@coalesce("itunes.lookup")
+def itunes_lookup(itunes_ids: tuple) -> dict:
+    """
+    Lookup groupé par identifiants iTunes (≤ ITUNES_LOOKUP_MAX_IDS) : une requête.
+    Retourne {itunes_id: {title, artist, preview_url, cover, itunes_id, confidence=None}}
+    (identifiants retirés du catalogue absents). Lève en cas d'échec de l'appel.
+    """
+    if not itunes_ids:
+        return {}
+    params = {"id": ",".join(str(i) for i in itunes_ids), "entity": "song"}
+    resp = call("itunes", requests.get, ITUNES_LOOKUP_URL, params=params, timeout=ITUNES_TIMEOUT_S)
+    current_span().set(status=resp.status_code, bytes=len(resp.content), ids=len(itunes_ids))
+    resp.raise_for_status()
+    return {
+        item["trackId"]: _itunes_record(item)
+        for item in resp.json().get("results") or []
+        if item.get("wrapperType") == "track" and item.get("trackId")
+    }
+
+LASTFM_ROOT = "https://ws.audioscrobbler.com/2.0/"
+
+
+@traced("lastfm.tags")
+@coalesce("lastfm.tags")
+@fallback("lastfm", "lastfm.tags", default=list)
+def get_lastfm_artist_tags(artist_name: str, limit: int = 20):
+    """
+    Récupère les top tags Last.fm pour un artiste donné.
+    Retourne une liste de dicts [{'name': ..., 'count': ...}, ...]
+    ou une liste vide si rien.
+    """
+    params = {
+        "method": "artist.getTopTags",
+        "artist": artist_name,
+        "api_key": get_secret("LASTFM_API_KEY"),
+        "format": "json",
+        "autocorrect": 1,
+    }
+    resp = call("lastfm", requests.get, LASTFM_ROOT, params=params, timeout=10)
+    current_span().set(status=resp.status_code, bytes=len(resp.content))
+    resp.raise_for_status()
+    data = resp.json()
+    tags = data.get("toptags", {}).get("tag", [])
+
+    if not tags:
+        return []
+
+    # Last.fm renvoie parfois un dict quand il n'y a qu'un tag
+    if isinstance(tags, dict):
+        tags = [tags]
+
+    # Trier par count décroissant et limiter
+    tags_sorted = sorted(
+        tags,
+        key=lambda t: int(t.get("count", 0)),
+        reverse=True
+    )
+    return tags_sorted[:limit]
+
+
+@traced("lastfm.similar")
+@coalesce("lastfm.similar")
+@fallback("lastfm", "lastfm.similar", default=list)
+def get_lastfm_similar_artists(artist_name: str, limit: int = 10):
+    """
+    Récupère des artistes similaires depuis Last.fm.
+    Retourne une liste de dicts [{'name': ..., 'match': ..., 'url': ...}, ...]
+    ou une liste vide si rien.
+    """
+    params = {
+        "method": "artist.getSimilar",
+        "artist": artist_name,
+        "api_key": get_secret("LASTFM_API_KEY"),
+        "format": "json",
+        "autocorrect": 1,
+        "limit": limit,
+    }
+    resp = call("lastfm", requests.get, LASTFM_ROOT, params=params, timeout=10)
+    current_span().set(status=resp.status_code, bytes=len(resp.content))
+    resp.raise_for_status()
+    data = resp.json()
+    similar = data.get("similarartists", {}).get("artist", [])
+
+    if not similar:
+        return []
+
+    if isinstance(similar, dict):
+        similar = [similar]
+
+    return similar[:limit]
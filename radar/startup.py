@@ -0,0 +1,197 @@
+# =========================================================
+# DÉMARRAGE À FROID (imports paresseux + préchauffage)
+# =========================================================
+"""
+Temps jusqu'à la première page interactive après un déploiement :
+
+- lazy_import(nom) : module chargé au premier accès à un attribut
+  (plotly côté app ; librosa est importé dans radar.audio au premier usage),
+  une page qui n'en a pas besoin n'en paie pas l'import,
+- warm_up() : préchauffage optionnel, dans un thread de fond au démarrage
+  du serveur (RADAR_WARMUP=0 pour le désactiver) :
+    1. index locaux (corpus de paroles, correspondances iTunes, tags, graphe de
+       similarité, séries),
+    2. snapshots des artistes de la watchlist (cache mémoire de radar.snapshots),
+    3. lexiques + passes vectorisées texte sur un mini-corpus,
+    4. librosa : import + compilation numba sur un signal synthétique de 2 s
+       (décodage WAV + analyse complète),
+    + étapes fournies par l'appelant (dataset du Comparateur...).
+
+En ligne de commande (hook de déploiement, avant le lancement de Streamlit) :
+    python -m radar.startup
+remplit aussi le cache disque numba de librosa pour les workers suivants.
+"""
+
+import importlib.util
+import io
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from radar.config import get_secret
+from radar.tracing import span
+
+
+WARMUP_SR = 22050
+WARMUP_DURATION_S = 2.0
+
+WARMUP_TEXTS = [
+    "je t'aime pas\non danse toute la nuit\non danse toute la nuit",
+    "i love you baby\nso happy tonight\nso happy tonight",
+    "no quiero llorar\nbailamos en la noche\nbailamos en la noche",
+]
+
+
+def lazy_import(name: str):
+    """Module `name` chargé au premier accès à l'un de ses attributs."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"Module introuvable : {name}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# ---------------------------------------------------------
+# Étapes de préchauffage
+# ---------------------------------------------------------
+
+def warm_indexes():
+    from radar.corpus import get_lyrics_corpus
+    from radar.itunes_map import get_itunes_map
+    from radar.similarity_graph import get_similarity_store
+    from radar.tag_index import get_tag_index
+    from radar.timeseries import get_timeseries_store
+
+    get_lyrics_corpus().stats()
+    get_itunes_map()
+    get_tag_index()
+    get_similarity_store()
+    get_timeseries_store()
+
+
+def warm_watchlist():
+    from radar.refresher import load_watchlist
+    from radar.snapshots import load_artist_snapshot
+
+    for entry in load_watchlist()[0]:
+        load_artist_snapshot(entry.artist_id)
+
+
+def warm_text():
+    from radar.lexical import lexical_profiles
+    from radar.sentiment import SUPPORTED_LANGS, load_lexicon, sentiment_scores
+
+    for lang in SUPPORTED_LANGS:
+        load_lexicon(lang)
+    sentiment_scores(WARMUP_TEXTS)
+    lexical_profiles(WARMUP_TEXTS)
+
+
+def synthetic_wav(sr: int = WARMUP_SR, duration: float = WARMUP_DURATION_S) -> bytes:
+    """Clics à 120 bpm sur une sinusoïde : assez de structure pour le suivi de tempo."""
+    t = np.arange(int(sr * duration)) / sr
+    y = 0.2 * np.sin(2 * np.pi * 440 * t)
+    y[(t % 0.5) < 0.01] += 0.6
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes((np.clip(y, -1, 1) * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def warm_audio():
+    from radar.audio import analyze_signal, decode_preview
+
+    y, sr = decode_preview(synthetic_wav())
+    analyze_signal(y, sr)
+
+
+WARMUP_STEPS = {
+    "indexes": warm_indexes,
+    "watchlist": warm_watchlist,
+    "text": warm_text,
+    "audio": warm_audio,
+}
+
+
+# ---------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------
+
+class WarmupStatus:
+    """Avancement du préchauffage : étape courante, durées, erreurs."""
+
+    def __init__(self, steps: list):
+        self.steps = steps
+        self.current = None
+        self.timings = {}
+        self.errors = {}
+        self.done = threading.Event()
+
+    def as_dict(self) -> dict:
+        return {"current": self.current, "timings": dict(self.timings),
+                "errors": dict(self.errors), "done": self.done.is_set()}
+
+
+def warmup_enabled() -> bool:
+    return str(get_secret("RADAR_WARMUP", "1")).strip().lower() not in ("0", "false", "no", "off")
+
+
+def warm_up(extra: dict = None, status: WarmupStatus = None) -> WarmupStatus:
+    """
+    Exécute les étapes de WARMUP_STEPS puis `extra` ({nom: callable}), dans l'ordre.
+    Une étape en échec (dépendance absente, fichier manquant) n'arrête pas les suivantes.
+    """
+    steps = {**WARMUP_STEPS, **(extra or {})}
+    status = status or WarmupStatus(list(steps))
+    with span("startup.warmup", steps=len(steps)):
+        for name, fn in steps.items():
+            status.current = name
+            t0 = time.perf_counter()
+            try:
+                with span(f"startup.{name}"):
+                    fn()
+            except Exception as exc:
+                status.errors[name] = f"{type(exc).__name__}: {exc}"
+            status.timings[name] = time.perf_counter() - t0
+    status.current = None
+    status.done.set()
+    return status
+
+
+def start_warmup(extra: dict = None) -> WarmupStatus:
+    """Préchauffage dans un thread de fond (no-op si RADAR_WARMUP=0). Retourne le statut."""
+    status = WarmupStatus(list({**WARMUP_STEPS, **(extra or {})}))
+    if not warmup_enabled():
+        status.done.set()
+        return status
+    threading.Thread(
+        target=warm_up, kwargs={"extra": extra, "status": status},
+        name="radar-warmup", daemon=True,
+    ).start()
+    return status
+
+
+def main():
+    t0 = time.perf_counter()
+    status = warm_up()
+    for name, duration in status.timings.items():
+        error = status.errors.get(name)
+        print(f"{name:<10} {duration:6.2f} s" + (f"  ÉCHEC {error}" if error else ""))
+    print(f"{'total':<10} {time.perf_counter() - t0:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
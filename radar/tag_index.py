@@ -0,0 +1,318 @@
+# =========================================================
+# INDEX DES TAGS LAST.FM (similarité de perception)
+# =========================================================
+"""
+Profil de perception de chaque artiste vu (app, refresher) : ses tags Last.fm
+en vecteur creux sur un vocabulaire de tags commun, pondéré par le `count`
+Last.fm et normalisé (L2), pour des requêtes cosinus top-k hors-ligne.
+
+Organisation sur disque (DATA_DIR/tags/) :
+- matrix.npz    : matrice scellée au format CSR (indptr / indices / data),
+                  vocabulaire, clés et noms des artistes (une ligne par artiste),
+- journal.jsonl : profils ajoutés / mis à jour depuis le dernier scellement
+                  (append-only, une ligne JSON par artiste).
+
+En mémoire, un profil mis à jour ajoute une ligne et désactive l'ancienne ;
+le journal est recompacté dans matrix.npz au-delà de JOURNAL_MAX_LINES lignes.
+
+Requête = un seul produit matrice creuse × vecteur :
+    scores = bincount(ligne de chaque valeur, data * q[indices])
+-> quelques ms pour des dizaines de milliers d'artistes.
+"""
+
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from radar.config import data_path
+from radar.corpus import fold
+from radar.tracing import span
+
+
+JOURNAL_MAX_LINES = 500
+DEFAULT_TOP_K = 10
+
+# Tags qui ne décrivent pas la musique
+JUNK_TAGS = frozenset({
+    "seen live", "favorites", "favourites", "favorite", "favourite", "my favorites",
+    "albums i own", "spotify", "under 2000 listeners", "all", "awesome", "beautiful",
+})
+
+
+def tag_key(name: str) -> str:
+    """Tag normalisé : « Hip-Hop », « hip hop », « hip_hop » -> « hip hop »."""
+    return " ".join(re.sub(r"[-_/]+", " ", fold(name)).split())
+
+
+def tag_weights(tags: list) -> dict:
+    """
+    Tags Last.fm [{name, count}] -> {tag normalisé: poids}, poids = count
+    (0-100, relatif au tag principal), vecteur normalisé L2.
+    """
+    weights = {}
+    for t in tags or []:
+        key = tag_key(t.get("name"))
+        if not key or key in JUNK_TAGS:
+            continue
+        try:
+            count = float(t.get("count") or 0)
+        except (TypeError, ValueError):
+            count = 0.0
+        if count > 0:
+            weights[key] = weights.get(key, 0.0) + count
+    norm = np.sqrt(sum(w * w for w in weights.values()))
+    return {k: w / norm for k, w in weights.items()} if norm > 0 else {}
+
+
+def _same_weights(a: dict, b: dict) -> bool:
+    """Mêmes tags, mêmes poids à la précision float32 de la matrice."""
+    if a.keys() != b.keys():
+        return False
+    keys = list(a)
+    return np.allclose(np.float32([a[k] for k in keys]), np.float32([b[k] for k in keys]), rtol=0, atol=1e-6)
+
+
+class TagIndex:
+    """Matrice artistes × tags (CSR) + journal des mises à jour."""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.path.dirname(data_path("tags", "matrix.npz"))
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._vocab = []
+        self._tag_idx = {}
+        self._keys = []
+        self._names = []
+        self._row_of = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._data = np.zeros(0, dtype=np.float32)
+        self._row_ids = np.zeros(0, dtype=np.int32)
+        self._journal_lines = 0
+        self._load()
+
+    def _matrix_path(self) -> str:
+        return os.path.join(self.root, "matrix.npz")
+
+    def _journal_path(self) -> str:
+        return os.path.join(self.root, "journal.jsonl")
+
+    # ----------------------------- chargement
+    def _load(self):
+        try:
+            with np.load(self._matrix_path(), allow_pickle=False) as z:
+                self._vocab = z["vocab"].tolist()
+                self._keys = z["keys"].tolist()
+                self._names = z["names"].tolist()
+                self._indptr = z["indptr"].astype(np.int64)
+                self._indices = z["indices"].astype(np.int32)
+                self._data = z["data"].astype(np.float32)
+        except (OSError, KeyError, ValueError):
+            pass
+        self._tag_idx = {t: i for i, t in enumerate(self._vocab)}
+        self._row_of = {k: i for i, k in enumerate(self._keys)}
+        self._alive = np.ones(len(self._keys), dtype=bool)
+        self._row_ids = np.repeat(np.arange(len(self._keys), dtype=np.int32), np.diff(self._indptr))
+
+        entries = []
+        try:
+            with open(self._journal_path(), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # ligne tronquée (arrêt brutal)
+        except OSError:
+            pass
+        self._append_rows([(e["key"], e["name"], e["weights"]) for e in entries])
+        self._journal_lines = len(entries)
+
+    # ----------------------------- écriture
+    def _append_rows(self, rows: list):
+        """Ajoute des lignes à la matrice en mémoire (l'ancienne ligne d'un artiste est désactivée)."""
+        if not rows:
+            return
+        first_row = len(self._keys)
+        indices, data, lengths, alive = [], [], [], []
+        for key, name, weights in rows:
+            cols = []
+            for tag in weights:
+                idx = self._tag_idx.get(tag)
+                if idx is None:
+                    idx = self._tag_idx[tag] = len(self._vocab)
+                    self._vocab.append(tag)
+                cols.append(idx)
+            indices.extend(cols)
+            data.extend(weights.values())
+            lengths.append(len(cols))
+
+            old = self._row_of.get(key)
+            if old is not None and old >= first_row:
+                alive[old - first_row] = False
+            elif old is not None:
+                self._alive[old] = False
+            self._row_of[key] = len(self._keys)
+            self._keys.append(key)
+            self._names.append(name)
+            alive.append(True)
+
+        self._alive = np.concatenate([self._alive, np.asarray(alive, dtype=bool)])
+        lengths = np.asarray(lengths, dtype=np.int64)
+        self._indptr = np.concatenate([self._indptr, self._indptr[-1] + np.cumsum(lengths)])
+        self._indices = np.concatenate([self._indices, np.asarray(indices, dtype=np.int32)])
+        self._data = np.concatenate([self._data, np.asarray(data, dtype=np.float32)])
+        self._row_ids = np.concatenate([
+            self._row_ids, np.repeat(np.arange(first_row, len(self._keys), dtype=np.int32), lengths)
+        ])
+
+    def add_many(self, artists: list):
+        """
+        Ajoute / met à jour des profils : itérable de (nom, tags Last.fm).
+        Un profil identique au profil indexé n'est pas réécrit.
+        """
+        rows = []
+        with self._lock:
+            for name, tags in artists:
+                key = fold(name)
+                weights = tag_weights(tags)
+                if not key or not weights or _same_weights(weights, self._weights_of(key)):
+                    continue
+                rows.append((key, name, weights))
+            if not rows:
+                return
+            with open(self._journal_path(), "a", encoding="utf-8") as f:
+                for key, name, weights in rows:
+                    f.write(json.dumps({"key": key, "name": name, "weights": weights}, ensure_ascii=False) + "\n")
+            self._append_rows(rows)
+            self._journal_lines += len(rows)
+            if self._journal_lines >= JOURNAL_MAX_LINES:
+                self._compact()
+
+    def add(self, name: str, tags: list):
+        self.add_many([(name, tags)])
+
+    def _weights_of(self, key: str) -> dict:
+        row = self._row_of.get(key)
+        if row is None:
+            return {}
+        start, end = self._indptr[row], self._indptr[row + 1]
+        return {self._vocab[i]: float(w) for i, w in zip(self._indices[start:end], self._data[start:end])}
+
+    def _compact(self):
+        """Réécrit matrix.npz sans les lignes désactivées et vide le journal (verrou tenu)."""
+        keep = np.flatnonzero(self._alive)
+        lengths = np.diff(self._indptr)[keep]
+        nnz_keep = self._alive[self._row_ids]
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        tmp = self._matrix_path() + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                vocab=np.array(self._vocab, dtype=str),
+                keys=np.array([self._keys[i] for i in keep], dtype=str),
+                names=np.array([self._names[i] for i in keep], dtype=str),
+                indptr=indptr,
+                indices=self._indices[nnz_keep],
+                data=self._data[nnz_keep],
+            )
+        os.replace(tmp, self._matrix_path())
+        open(self._journal_path(), "w").close()
+        self._journal_lines = 0
+
+        self._keys = [self._keys[i] for i in keep]
+        self._names = [self._names[i] for i in keep]
+        self._row_of = {k: i for i, k in enumerate(self._keys)}
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._indptr = indptr.astype(np.int64)
+        self._indices = self._indices[nnz_keep]
+        self._data = self._data[nnz_keep]
+        self._row_ids = np.repeat(np.arange(len(keep), dtype=np.int32), lengths)
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    # ----------------------------- lecture
+    def __len__(self):
+        return int(self._alive.sum())
+
+    def stats(self) -> dict:
+        return {"artists": len(self), "tags": len(self._vocab), "nnz": int(self._alive[self._row_ids].sum()),
+                "journal": self._journal_lines}
+
+    def profile(self, name: str) -> dict:
+        """{tag: poids} indexé pour l'artiste (vide s'il est inconnu)."""
+        return self._weights_of(fold(name))
+
+    def nearest(self, weights: dict, k: int = DEFAULT_TOP_K, among: list = None,
+                exclude: list = ()) -> pd.DataFrame:
+        """
+        Artistes au profil de tags le plus proche (cosinus) d'un vecteur {tag: poids}.
+        `among` : restreint aux artistes listés (roster) ; `exclude` : artistes écartés.
+        Colonnes : artist, similarity, shared_tags.
+        """
+        columns = ["artist", "similarity", "shared_tags"]
+        with span("tags.nearest", artists=len(self)) as s:
+            with self._lock:
+                # Les tableaux ne sont jamais modifiés en place (concaténation / remplacement)
+                indptr, indices, data, row_ids = self._indptr, self._indices, self._data, self._row_ids
+                names = self._names
+                mask = self._alive.copy()
+                if among is not None:
+                    allowed = np.zeros(len(mask), dtype=bool)
+                    allowed[[self._row_of[k] for k in map(fold, among) if k in self._row_of]] = True
+                    mask &= allowed
+                for name in exclude:
+                    row = self._row_of.get(fold(name))
+                    if row is not None:
+                        mask[row] = False
+                query = np.zeros(len(self._vocab), dtype=np.float32)
+                for tag, w in weights.items():
+                    idx = self._tag_idx.get(tag)
+                    if idx is not None:
+                        query[idx] = w
+            norm = float(np.linalg.norm(query))
+            if not norm or not mask.any():
+                return pd.DataFrame(columns=columns)
+
+            # Produit matrice creuse × vecteur : une passe sur les valeurs non nulles
+            scores = np.bincount(row_ids, weights=data * query[indices], minlength=len(mask)) / norm
+            scores[~mask] = 0.0
+            k = min(k, int(np.count_nonzero(scores > 0)))
+            top = np.argpartition(-scores, k - 1)[:k] if k else np.zeros(0, dtype=int)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            shared = [int(np.count_nonzero(query[indices[indptr[i]:indptr[i + 1]]])) for i in top]
+            s.set(candidates=int(mask.sum()))
+        return pd.DataFrame({
+            "artist": [names[i] for i in top],
+            "similarity": scores[top].round(3),
+            "shared_tags": shared,
+        }, columns=columns)
+
+    def similar_to(self, name: str, k: int = DEFAULT_TOP_K, among: list = None) -> pd.DataFrame:
+        """Artistes indexés les plus proches du profil de `name` (lui-même exclu)."""
+        return self.nearest(self.profile(name), k=k, among=among, exclude=[name])
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_tag_index() -> TagIndex:
+    """Instance partagée par le process (app, refresher, jobs)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TagIndex()
+        return _index
+
+
+def record_artist_tags(name: str, tags: list):
+    """Indexe (ou met à jour) le profil de tags Last.fm d'un artiste."""
+    if name and tags:
+        get_tag_index().add(name, tags)
@@ -0,0 +1,154 @@
+# =========================================================
+# ANALYSE DE TEXTE (paroles)
+# =========================================================
+"""
+Analyse sémantique des paroles (section 2.2 du Labo), hors Streamlit.
+
+Sentiment ligne à ligne : chaque ligne distincte est scorée une seule fois
+(les refrains / hooks répétés ne coûtent rien), puis agrégée par strophe
+(arc émotionnel) et pour la chanson.
+
+Deux moteurs (RADAR_SENTIMENT_ENGINE) :
+- "lexicon" (défaut) : lexiques locaux FR / EN / ES (radar.sentiment), hors-ligne ;
+  DeepL n'est appelé que pour une langue sans lexique (si une clé est configurée),
+- "textblob" : traduction DeepL vers l'anglais puis TextBlob (comportement historique).
+"""
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from radar.config import get_secret
+from radar.lexical import lexical_profile
+from radar.sentiment import SUPPORTED_LANGS, detect_language, score_lines, sentiment_scores
+from radar.translation import translate_to_english
+from radar.tracing import span
+
+
+SENTIMENT_ENGINE = os.environ.get("RADAR_SENTIMENT_ENGINE", "lexicon")
+LINE_SENTIMENT_CACHE_SIZE = 200_000
+
+
+@lru_cache(maxsize=LINE_SENTIMENT_CACHE_SIZE)
+def line_sentiment(line: str) -> tuple:
+    """(polarité, subjectivité) TextBlob d'une ligne (mémoïsé)."""
+    from textblob import TextBlob
+
+    sentiment = TextBlob(line).sentiment
+    return float(sentiment.polarity), float(sentiment.subjectivity)
+
+
+def split_lines(text: str) -> pd.DataFrame:
+    """Lignes non vides avec leur numéro de strophe (strophes séparées par une ligne vide)."""
+    rows, stanza, in_gap = [], 0, False
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            in_gap = bool(rows)
+            continue
+        if in_gap:
+            stanza += 1
+            in_gap = False
+        rows.append((stanza, line))
+    return pd.DataFrame(rows, columns=["stanza", "line"])
+
+
+def line_level_sentiment(text: str, engine: str = "lexicon", lang: str = None) -> dict:
+    """
+    Sentiment par ligne et par strophe (`lang` : langue du texte pour le moteur "lexicon").
+    Retourne un dict :
+    lines (DataFrame stanza, line, polarity, subjectivity),
+    stanzas (DataFrame stanza, n_lines, polarity, subjectivity),
+    polarity, subjectivity (chanson), repetition_ratio, unique_lines
+    """
+    df = split_lines(text)
+    if df.empty:
+        empty_stanzas = pd.DataFrame(columns=["stanza", "n_lines", "polarity", "subjectivity"])
+        return {"lines": df.assign(polarity=[], subjectivity=[]), "stanzas": empty_stanzas,
+                "polarity": 0.0, "subjectivity": 0.0, "repetition_ratio": 0.0, "unique_lines": 0}
+
+    unique = df["line"].unique()
+    if engine == "textblob":
+        with span("text.textblob", lines=len(df), unique_lines=len(unique)):
+            scores = np.array([line_sentiment(l) for l in unique]).reshape(-1, 2)
+    else:
+        with span("text.lexicon", lines=len(df), unique_lines=len(unique), lang=lang):
+            scores = score_lines(list(unique), lang)
+    codes = pd.Index(unique).get_indexer(df["line"])
+    df["polarity"] = scores[codes, 0]
+    df["subjectivity"] = scores[codes, 1]
+
+    # Strophes en un seul groupby (moyenne des lignes)
+    stanzas = (
+        df.groupby("stanza")
+        .agg(n_lines=("line", "size"), polarity=("polarity", "mean"), subjectivity=("subjectivity", "mean"))
+        .reset_index()
+    )
+
+    # Chanson : moyenne des lignes porteuses de sentiment (comme TextBlob sur le texte entier,
+    # qui moyenne les mots évalués) ; 0 si aucune ligne n'en porte
+    carries = (df["polarity"] != 0) | (df["subjectivity"] != 0)
+    polarity = float(df.loc[carries, "polarity"].mean()) if carries.any() else 0.0
+    subjectivity = float(df.loc[carries, "subjectivity"].mean()) if carries.any() else 0.0
+
+    return {
+        "lines": df,
+        "stanzas": stanzas,
+        "polarity": polarity,
+        "subjectivity": subjectivity,
+        "repetition_ratio": float(1 - len(unique) / len(df)),
+        "unique_lines": int(len(unique)),
+    }
+
+
+def lyrics_polarities(texts: list) -> list:
+    """
+    Polarité de chaque texte d'un lot (None si pas de paroles).
+    Moteur "lexicon" : un seul appel vectorisé, hors-ligne.
+    """
+    if SENTIMENT_ENGINE == "textblob":
+        return [analyze_lyrics(t)["text_polarity"] if t else None for t in texts]
+    with span("text.lexicon_batch", songs=len(texts)):
+        polarity = sentiment_scores(texts)["polarity"].tolist()
+    return [p if t else None for p, t in zip(polarity, texts)]
+
+
+def analyze_lyrics(lyrics_text: str, engine: str = None) -> dict:
+    """
+    Sentiment ligne à ligne + profil lexical (+ traduction selon le moteur).
+    Retourne un dict :
+    analyzed_text, detected_lang, engine, text_polarity, subjectivity,
+    repetition_ratio, lines, stanzas (cf. line_level_sentiment),
+    + les colonnes de radar.lexical (vocab_size, mtld, hdd, hooks, rhyme_density…)
+    """
+    engine = engine or SENTIMENT_ENGINE
+    if engine == "textblob":
+        # Traduction vers l'anglais (DeepL) puis TextBlob ; traduite ligne à ligne :
+        # même découpage lignes / strophes que l'original
+        analyzed_text, detected_lang = translate_to_english(lyrics_text)
+        sentiment = line_level_sentiment(analyzed_text, engine="textblob")
+    else:
+        analyzed_text, detected_lang = lyrics_text, detect_language(lyrics_text)
+        score_lang = detected_lang
+        if detected_lang not in SUPPORTED_LANGS and get_secret("DEEPL_API_KEY") is not None:
+            # Langue sans lexique : détour par l'anglais
+            analyzed_text, detected_lang = translate_to_english(lyrics_text)
+            score_lang = "EN" if analyzed_text != lyrics_text else None
+        sentiment = line_level_sentiment(analyzed_text, engine="lexicon", lang=score_lang)
+
+    # Profil lexical : calculé sur le texte original
+    lexical = lexical_profile(lyrics_text)
+
+    return {
+        "analyzed_text": analyzed_text,
+        "detected_lang": detected_lang,
+        "engine": engine,
+        "text_polarity": sentiment["polarity"],
+        "subjectivity": sentiment["subjectivity"],
+        **lexical,
+        "repetition_ratio": sentiment["repetition_ratio"],
+        "lines": sentiment["lines"],
+        "stanzas": sentiment["stanzas"],
+    }
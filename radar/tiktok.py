@@ -0,0 +1,257 @@
+# =========================================================
+# SCORE "TIKTOK POTENTIAL" (page 4.1)
+# =========================================================
+"""
+Moteur de score "TikTok Potential".
+
+Critères (un sous-score 0-1 chacun) :
+- intro courte        : temps avant que l'énergie atteigne son régime "plein",
+- drop rapide         : temps avant le premier saut d'énergie confirmé par les onsets,
+- durée totale        : zone 2:00-2:45 idéale pour le replay,
+- répétitivité        : part des lignes de paroles répétées (hook / refrain),
+- tempo               : bande 100-130 BPM privilégiée.
+
+Extraction : une passe par titre (réutilise radar.audio.analyze_signal).
+Score : entièrement vectorisé, on peut scorer des milliers de titres d'un coup.
+
+Limite connue : on travaille sur le preview 30s, qui ne démarre pas toujours
+au début du morceau ; intro / drop sont donc mesurés "dans l'extrait".
+"""
+
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from radar.audio import analyze_signal, decode_preview, download_preview
+
+
+TIKTOK_WEIGHTS = {
+    "intro": 0.20,
+    "drop": 0.25,
+    "duration": 0.15,
+    "repetition": 0.20,
+    "tempo": 0.20,
+}
+
+FEATURE_COLUMNS = ["intro_s", "first_drop_s", "duration_s", "lyric_repetition", "tempo"]
+
+
+# ---------------------------------------------------------
+# Extraction des signaux (une passe par titre)
+# ---------------------------------------------------------
+
+def _smooth(x: np.ndarray, win: int) -> np.ndarray:
+    """Moyenne glissante centrée (même longueur que l'entrée)."""
+    if win <= 1 or x.size == 0:
+        return x.astype(float)
+    kernel = np.ones(win) / win
+    return np.convolve(x, kernel, mode="same")
+
+
+def detect_intro_and_drop(rms: np.ndarray, onset_env: np.ndarray, sr: int, hop_length: int):
+    """
+    Détecte (intro_s, first_drop_s) à partir des enveloppes RMS / onsets.
+
+    - intro : 1re seconde où l'énergie lissée atteint 60 % de son 90e percentile,
+    - drop  : 1er saut d'énergie sur ~1s (>= 25 % du niveau de référence)
+              pondéré par la densité d'onsets, retenu s'il atteint la moitié
+              du saut le plus fort. np.inf si aucun drop n'est détecté.
+    """
+    if rms.size == 0 or sr <= 0:
+        return np.nan, np.nan
+
+    frame_s = hop_length / sr
+    win = max(1, int(round(1.0 / frame_s)))  # ~1 seconde
+    env = _smooth(rms, win)
+    ref = float(np.percentile(env, 90))
+    if ref <= 0:
+        return np.nan, np.nan
+
+    above = np.flatnonzero(env >= 0.6 * ref)
+    intro_s = float(above[0] * frame_s) if above.size else np.nan
+
+    if env.size <= win:
+        return intro_s, np.inf
+
+    rise = env[win:] - env[:-win]  # saut d'énergie qui se termine à l'index i + win
+    onset_sm = _smooth(onset_env[:env.size], max(1, win // 4))
+    onset_norm = onset_sm / (onset_sm.max() + 1e-9)
+
+    n = min(rise.size, onset_norm.size - win)
+    if n <= 0:
+        return intro_s, np.inf
+
+    significant = rise[:n] >= 0.25 * ref
+    strength = np.where(significant, rise[:n] / ref * onset_norm[win:win + n], 0.0)
+    if strength.max() <= 0:
+        return intro_s, np.inf
+
+    first = np.flatnonzero(strength >= 0.5 * strength.max())[0]
+    drop_s = float((first + win) * frame_s)
+    return intro_s, drop_s
+
+
+def lyric_repetition(lyrics_text: str) -> float:
+    """
+    Part des lignes de paroles qui apparaissent au moins 2 fois (0-1).
+    NaN si le texte est trop court pour être significatif.
+    """
+    if not lyrics_text:
+        return np.nan
+    lines = [
+        re.sub(r"[^\w\s]", "", l).strip().lower()
+        for l in lyrics_text.splitlines()
+    ]
+    lines = [l for l in lines if l]
+    if len(lines) < 4:
+        return np.nan
+    counts = Counter(lines)
+    repeated = sum(c for c in counts.values() if c >= 2)
+    return repeated / len(lines)
+
+
+def tiktok_signals_from_analysis(analysis: dict, lyrics_text: str = None, duration_ms: int = None) -> dict:
+    """
+    Construit la ligne de features TikTok à partir d'une analyse audio
+    déjà calculée (radar.audio.analyze_signal) : aucun recalcul librosa.
+    """
+    if analysis is not None:
+        intro_s, drop_s = detect_intro_and_drop(
+            analysis["rms"], analysis["onset_env"], analysis["sr"], analysis["hop_length"]
+        )
+        tempo = analysis["tempo"]
+    else:
+        intro_s, drop_s, tempo = np.nan, np.nan, np.nan
+
+    return {
+        "intro_s": intro_s,
+        "first_drop_s": drop_s,
+        "duration_s": (duration_ms / 1000.0) if duration_ms else np.nan,
+        "lyric_repetition": lyric_repetition(lyrics_text),
+        "tempo": tempo if tempo else np.nan,
+    }
+
+
+def extract_tiktok_signals(y: np.ndarray, sr: int, lyrics_text: str = None, duration_ms: int = None) -> dict:
+    """Une passe complète sur un signal déjà décodé."""
+    return tiktok_signals_from_analysis(analyze_signal(y, sr), lyrics_text, duration_ms)
+
+
+# ---------------------------------------------------------
+# Score vectorisé
+# ---------------------------------------------------------
+
+def score_tiktok_potential(features) -> pd.DataFrame:
+    """
+    Score vectorisé sur N titres.
+
+    `features` : DataFrame (ou liste de dicts) avec les colonnes FEATURE_COLUMNS.
+    Les valeurs manquantes (NaN) sont ignorées et les poids renormalisés
+    sur les critères disponibles.
+
+    Retourne un DataFrame aligné sur l'entrée avec :
+    score_intro, score_drop, score_duration, score_repetition, score_tempo,
+    nb_criteres, tiktok_score (0-100).
+    """
+    df = pd.DataFrame(features)
+    for col in FEATURE_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+
+    intro = df["intro_s"].to_numpy(dtype=float)
+    drop = df["first_drop_s"].to_numpy(dtype=float)
+    duration = df["duration_s"].to_numpy(dtype=float)
+    repetition = df["lyric_repetition"].to_numpy(dtype=float)
+    tempo = df["tempo"].to_numpy(dtype=float)
+
+    with np.errstate(invalid="ignore"):
+        sub = {
+            # <= 3s -> 1 ; >= 15s -> 0
+            "intro": np.clip(1 - (intro - 3) / (15 - 3), 0, 1),
+            # <= 8s -> 1 ; >= 30s -> 0 (np.inf = pas de drop -> 0)
+            "drop": np.clip(1 - (drop - 8) / (30 - 8), 0, 1),
+            "duration": np.interp(duration, [0, 90, 120, 165, 240, 300], [0.6, 0.8, 1, 1, 0.4, 0]),
+            # 50 % de lignes répétées ou plus -> hook très présent
+            "repetition": np.clip(repetition / 0.5, 0, 1),
+            "tempo": np.interp(tempo, [60, 85, 100, 130, 150, 180], [0.2, 0.5, 1, 1, 0.6, 0.4]),
+        }
+    # np.interp ne propage pas les NaN de manière fiable : on les remet explicitement
+    sub["duration"][np.isnan(duration)] = np.nan
+    sub["tempo"][np.isnan(tempo)] = np.nan
+
+    keys = list(TIKTOK_WEIGHTS)
+    mat = np.column_stack([sub[k] for k in keys])          # (N, 5)
+    weights = np.array([TIKTOK_WEIGHTS[k] for k in keys])  # (5,)
+    available = ~np.isnan(mat)
+    w = np.where(available, weights, 0.0)
+    w_sum = w.sum(axis=1)
+    total = np.where(
+        w_sum > 0,
+        np.nansum(np.nan_to_num(mat) * w, axis=1) / np.where(w_sum > 0, w_sum, 1),
+        np.nan,
+    )
+
+    out = pd.DataFrame({f"score_{k}": sub[k] for k in keys}, index=df.index)
+    out["nb_criteres"] = available.sum(axis=1)
+    out["tiktok_score"] = np.round(total * 100, 1)
+    return out
+
+
+# ---------------------------------------------------------
+# Batch (playlist / discographie)
+# ---------------------------------------------------------
+
+def _signals_from_bytes(content: bytes, lyrics_text: str, duration_ms: int) -> dict:
+    """Décodage + analyse d'un preview (exécuté dans un process worker)."""
+    if not content:
+        return tiktok_signals_from_analysis(None, lyrics_text, duration_ms)
+    try:
+        y, sr = decode_preview(content)
+        return extract_tiktok_signals(y, sr, lyrics_text, duration_ms)
+    except Exception:
+        return tiktok_signals_from_analysis(None, lyrics_text, duration_ms)
+
+
+def _safe_download(url: str):
+    if not url:
+        return None
+    try:
+        return download_preview(url)
+    except Exception:
+        return None
+
+
+def batch_tiktok_scores(tracks: list, max_download_workers: int = 16, max_cpu_workers: int = None,
+                        cpu_pool: ProcessPoolExecutor = None) -> pd.DataFrame:
+    """
+    Score une liste de titres.
+
+    `tracks` : liste de dicts {track_id, name, preview_url, lyrics, duration_ms}
+    - téléchargements des previews en parallèle (threads, I/O),
+    - décodage + librosa sur un pool de process (CPU) : `cpu_pool` s'il est fourni
+      (pool partagé d'un serveur), sinon un pool créé pour l'appel,
+    - un seul appel vectorisé pour le score.
+    """
+    if not tracks:
+        return pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=max_download_workers) as pool:
+        contents = list(pool.map(_safe_download, [t.get("preview_url") for t in tracks]))
+
+    args = (contents, [t.get("lyrics") for t in tracks], [t.get("duration_ms") for t in tracks])
+    if cpu_pool is not None:
+        rows = list(cpu_pool.map(_signals_from_bytes, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_cpu_workers) as pool:
+            rows = list(pool.map(_signals_from_bytes, *args))
+
+    features = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+    scores = score_tiktok_potential(features)
+    meta = pd.DataFrame({
+        "track_id": [t.get("track_id") for t in tracks],
+        "Titre": [t.get("name") for t in tracks],
+    })
+    return pd.concat([meta, features, scores], axis=1)
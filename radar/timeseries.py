@@ -0,0 +1,417 @@
+# =========================================================
+# SÉRIES TEMPORELLES (popularité / followers par artiste)
+# =========================================================
+"""
+Store local append-only des snapshots Spotify (popularité, followers).
+
+Organisation sur disque (DATA_DIR/timeseries/) :
+- artists.tsv         : dictionnaire artiste -> index (append-only, "id<TAB>nom"),
+- YYYY-MM-DD.log      : journal binaire du jour (enregistrements fixes de 24 octets),
+- YYYY-MM-DD.npz      : segment colonnaire scellé d'un jour passé
+                        (trié par artiste puis date, entiers delta-encodés).
+
+Un journal est scellé en segment dès que sa journée est terminée.
+Les segments scellés sont immuables et gardés en cache mémoire (LRU).
+
+Plusieurs process écrivent dans le même dossier (dashboard, refresher, audit
+batch) : toute écriture (attribution d'index, journal, scellement) se fait sous
+un verrou fichier (.lock, fcntl) après relecture de la fin de artists.tsv, pour
+qu'un index ne soit jamais attribué à deux artistes.
+
+Requêtes : plage de dates + sous-échantillonnage automatique
+(jour -> semaine -> mois selon la durée demandée).
+"""
+
+import datetime as dt
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité aux threads du process
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from radar.config import data_path
+
+
+JOURNAL_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("artist", "<i4"),
+    ("popularity", "<i4"),
+    ("followers", "<i8"),
+])
+
+# Durée max (jours) servie à chaque granularité en mode "auto"
+AUTO_FREQ_THRESHOLDS = [(120, "D"), (730, "W")]
+
+
+def _narrow(a: np.ndarray) -> np.ndarray:
+    """Plus petit type entier capable de contenir toutes les valeurs de `a`."""
+    if a.size == 0:
+        return a.astype(np.int8)
+    lo, hi = int(a.min()), int(a.max())
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return a.astype(dtype)
+    return a
+
+
+def _delta_encode(a: np.ndarray) -> np.ndarray:
+    return _narrow(np.diff(a.astype(np.int64), prepend=0))
+
+
+def _delta_decode(a: np.ndarray) -> np.ndarray:
+    return np.cumsum(a.astype(np.int64))
+
+
+@lru_cache(maxsize=4096)
+def _load_segment(path: str, mtime: float) -> dict:
+    """Lecture d'un segment scellé (immuable : `mtime` sert uniquement de clé de cache)."""
+    with np.load(path) as z:
+        return {
+            "artist": z["artist"].astype(np.int32),
+            "ts": _delta_decode(z["ts"]),
+            "popularity": z["popularity"].astype(np.int32),
+            "followers": _delta_decode(z["followers"]),
+        }
+
+
+def _naive_timestamp(value=None) -> pd.Timestamp:
+    """Timestamp UTC sans fuseau (maintenant si `value` est None)."""
+    ts = pd.Timestamp(value) if value is not None else pd.Timestamp.now(tz="UTC")
+    return ts.tz_convert(None) if ts.tzinfo else ts
+
+
+def auto_frequency(start: pd.Timestamp, end: pd.Timestamp) -> str:
+    span_days = (end - start).days
+    for max_days, freq in AUTO_FREQ_THRESHOLDS:
+        if span_days <= max_days:
+            return freq
+    return "M"
+
+
+class TimeSeriesStore:
+    """Store append-only des snapshots popularité / followers."""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.path.dirname(data_path("timeseries", "artists.tsv"))
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._artists = []
+        self._names = {}
+        self._index = {}
+        self._artists_offset = 0
+        self._load_artists()
+        self.seal_past_journals()
+
+    @contextmanager
+    def _locked(self):
+        """Verrou d'écriture partagé entre threads et entre process."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ----------------------------- dictionnaire artistes
+    def _artists_file(self) -> str:
+        return os.path.join(self.root, "artists.tsv")
+
+    def _load_artists(self):
+        """Lit la fin de artists.tsv ajoutée depuis la dernière lecture (par ce process ou un autre)."""
+        try:
+            with open(self._artists_file(), "rb") as f:
+                f.seek(self._artists_offset)
+                raw = f.read()
+        except OSError:
+            return
+        # Ligne en cours d'écriture par un autre process : relue au prochain passage
+        raw = raw[:raw.rfind(b"\n") + 1]
+        self._artists_offset += len(raw)
+        for line in raw.decode("utf-8").splitlines():
+            artist_id, _, name = line.partition("\t")
+            if artist_id and artist_id not in self._index:
+                self._index[artist_id] = len(self._artists)
+                self._artists.append(artist_id)
+                self._names[artist_id] = name or artist_id
+
+    def _artist_idx(self, artist_id: str, name: str = None) -> int:
+        """Index d'un artiste, attribué si besoin (appelé sous `_locked`)."""
+        idx = self._index.get(artist_id)
+        if idx is None:
+            self._load_artists()
+            idx = self._index.get(artist_id)
+        if idx is None:
+            line = f"{artist_id}\t{(name or '').replace(chr(9), ' ').replace(chr(10), ' ')}\n".encode("utf-8")
+            with open(self._artists_file(), "ab") as f:
+                f.write(line)
+            self._load_artists()
+            idx = self._index[artist_id]
+        return idx
+
+    def artist_name(self, artist_id: str) -> str:
+        return self._names.get(artist_id, artist_id)
+
+    def known_artists(self) -> list:
+        with self._lock:
+            self._load_artists()
+            return list(self._artists)
+
+    # ----------------------------- écriture
+    def _journal_path(self, day: dt.date) -> str:
+        return os.path.join(self.root, f"{day.isoformat()}.log")
+
+    def _segment_path(self, day: dt.date) -> str:
+        return os.path.join(self.root, f"{day.isoformat()}.npz")
+
+    def append_many(self, rows):
+        """
+        Ajoute des snapshots.
+        `rows` : itérable de dicts {artist_id, popularity, followers, [name], [ts]}
+        (ts en secondes epoch UTC, par défaut maintenant).
+        """
+        now = int(time.time())
+        by_day = {}
+        with self._locked():
+            for r in rows:
+                ts = int(r.get("ts") or now)
+                rec = (
+                    ts,
+                    self._artist_idx(r["artist_id"], r.get("name")),
+                    int(r.get("popularity") or 0),
+                    int(r.get("followers") or 0),
+                )
+                day = dt.datetime.fromtimestamp(ts, dt.timezone.utc).date()
+                by_day.setdefault(day, []).append(rec)
+
+            for day, recs in by_day.items():
+                if os.path.exists(self._segment_path(day)):
+                    # Journée déjà scellée (import tardif) : on la rouvre en journal
+                    self._unseal(day)
+                with open(self._journal_path(day), "ab") as f:
+                    f.write(np.array(recs, dtype=JOURNAL_DTYPE).tobytes())
+
+        self.seal_past_journals()
+
+    def append(self, artist_id: str, popularity: int, followers: int, name: str = None, ts: int = None):
+        self.append_many([{
+            "artist_id": artist_id, "popularity": popularity,
+            "followers": followers, "name": name, "ts": ts,
+        }])
+
+    # ----------------------------- scellement
+    def _read_journal(self, day: dt.date) -> dict:
+        try:
+            with open(self._journal_path(day), "rb") as f:
+                raw = f.read()
+        except OSError:
+            raw = b""
+        # Un enregistrement tronqué (arrêt brutal) est ignoré
+        usable = len(raw) - len(raw) % JOURNAL_DTYPE.itemsize
+        recs = np.frombuffer(raw[:usable], dtype=JOURNAL_DTYPE)
+        return {
+            "artist": recs["artist"].astype(np.int32),
+            "ts": recs["ts"].astype(np.int64),
+            "popularity": recs["popularity"].astype(np.int32),
+            "followers": recs["followers"].astype(np.int64),
+        }
+
+    def _unseal(self, day: dt.date):
+        path = self._segment_path(day)
+        seg = _load_segment(path, os.path.getmtime(path))
+        recs = np.empty(seg["ts"].size, dtype=JOURNAL_DTYPE)
+        for k in ("ts", "artist", "popularity", "followers"):
+            recs[k] = seg[k]
+        with open(self._journal_path(day), "ab") as f:
+            f.write(recs.tobytes())
+        os.remove(path)
+
+    def seal(self, day: dt.date):
+        """Convertit le journal d'un jour en segment colonnaire compressé."""
+        with self._locked():
+            if not os.path.exists(self._journal_path(day)):
+                return  # déjà scellé par un autre process
+            cols = self._read_journal(day)
+            if cols["ts"].size:
+                order = np.lexsort((cols["ts"], cols["artist"]))
+                tmp = self._segment_path(day) + ".tmp"
+                with open(tmp, "wb") as f:
+                    np.savez_compressed(
+                        f,
+                        artist=_narrow(cols["artist"][order]),
+                        ts=_delta_encode(cols["ts"][order]),
+                        popularity=_narrow(cols["popularity"][order]),
+                        followers=_delta_encode(cols["followers"][order]),
+                    )
+                os.replace(tmp, self._segment_path(day))
+            try:
+                os.remove(self._journal_path(day))
+            except OSError:
+                pass
+
+    def seal_past_journals(self):
+        today = dt.datetime.now(dt.timezone.utc).date()
+        for day in self._days(kind=".log"):
+            if day < today:
+                self.seal(day)
+
+    # ----------------------------- lecture
+    def _days(self, kind: str = None) -> list:
+        days = set()
+        for fname in os.listdir(self.root):
+            stem, ext = os.path.splitext(fname)
+            if ext in (".log", ".npz") and (kind is None or ext == kind):
+                try:
+                    days.add(dt.date.fromisoformat(stem))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def _read_day(self, day: dt.date) -> dict:
+        parts = []
+        seg_path = self._segment_path(day)
+        if os.path.exists(seg_path):
+            parts.append(_load_segment(seg_path, os.path.getmtime(seg_path)))
+        if os.path.exists(self._journal_path(day)):
+            parts.append(self._read_journal(day))
+        if not parts:
+            return None
+        return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+    def query(self, artist_ids=None, start=None, end=None, freq: str = "auto") -> pd.DataFrame:
+        """
+        Snapshots sur [start, end] pour une liste d'artistes (tous si None).
+        freq : "auto" | "D" | "W" | "M" | None (brut, sans sous-échantillonnage).
+        Retourne un DataFrame [artist_id, date, popularity, followers]
+        (dernière valeur connue par période).
+        """
+        end = _naive_timestamp(end)
+        days = self._days()
+        if not days:
+            return pd.DataFrame(columns=["artist_id", "date", "popularity", "followers"])
+        start = pd.Timestamp(start) if start is not None else pd.Timestamp(days[0])
+
+        with self._lock:
+            self._load_artists()  # artistes ajoutés par d'autres process
+        wanted = None
+        if artist_ids is not None:
+            wanted = np.array([self._index[a] for a in artist_ids if a in self._index], dtype=np.int32)
+
+        parts = []
+        for day in days:
+            if day < start.date() or day > end.date():
+                continue
+            cols = self._read_day(day)
+            if cols is None:
+                continue
+            if wanted is not None:
+                mask = np.isin(cols["artist"], wanted)
+                cols = {k: v[mask] for k, v in cols.items()}
+            if cols["ts"].size:
+                parts.append(cols)
+
+        if not parts:
+            return pd.DataFrame(columns=["artist_id", "date", "popularity", "followers"])
+
+        cols = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+        artists = np.array(self._artists, dtype=object)
+        df = pd.DataFrame({
+            "artist_id": artists[cols["artist"]],
+            "date": pd.to_datetime(cols["ts"], unit="s"),
+            "popularity": cols["popularity"],
+            "followers": cols["followers"],
+        })
+        df = df[(df["date"] >= start) & (df["date"] <= end + pd.Timedelta(days=1))]
+
+        if freq == "auto":
+            freq = auto_frequency(start, end)
+        if freq:
+            df["date"] = df["date"].dt.to_period(freq).dt.start_time
+        return (
+            df.sort_values(["artist_id", "date"])
+            .groupby(["artist_id", "date"], as_index=False)
+            .last()
+        )
+
+    def growth_metrics(self, artist_ids=None, window_days: int = 30, end=None) -> pd.DataFrame:
+        """
+        Croissance sur `window_days` pour toute une liste d'artistes, en un calcul matriciel
+        (artistes x jours, dernière valeur connue propagée).
+        """
+        end = _naive_timestamp(end)
+        start = end - pd.Timedelta(days=window_days)
+        df = self.query(artist_ids, start=start, end=end, freq="D")
+        if df.empty:
+            return pd.DataFrame()
+
+        followers = df.pivot(index="artist_id", columns="date", values="followers").ffill(axis=1)
+        popularity = df.pivot(index="artist_id", columns="date", values="popularity").ffill(axis=1)
+
+        f = followers.to_numpy(dtype=float)
+        p = popularity.to_numpy(dtype=float)
+        dates = followers.columns.to_numpy()
+
+        has = ~np.isnan(f)
+        first_idx = has.argmax(axis=1)
+        rows = np.arange(f.shape[0])
+        f_start = f[rows, first_idx]
+        f_end = f[:, -1]
+        p_start = p[rows, first_idx]
+        p_end = p[:, -1]
+        n_days = (dates[-1] - dates[first_idx]).astype("timedelta64[D]").astype(float)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth_pct = np.where(f_start > 0, (f_end - f_start) / f_start * 100, np.nan)
+            per_day = np.where(n_days > 0, (f_end - f_start) / n_days, np.nan)
+
+        out = pd.DataFrame({
+            "artist_id": followers.index,
+            "Artiste": [self.artist_name(a) for a in followers.index],
+            "followers_start": f_start,
+            "followers_end": f_end,
+            "followers_growth_pct": growth_pct,
+            "followers_per_day": per_day,
+            "popularity_start": p_start,
+            "popularity_end": p_end,
+            "popularity_delta": p_end - p_start,
+            "n_days": n_days,
+        })
+        return out.sort_values("followers_growth_pct", ascending=False, na_position="last")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_timeseries_store() -> TimeSeriesStore:
+    """Instance partagée par le process (app, refresher, jobs)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TimeSeriesStore()
+        return _store
+
+
+def record_artist_snapshot(artist: dict, ts: int = None):
+    """Enregistre popularité / followers d'un objet artiste Spotify (sp.artist / sp.search)."""
+    if not artist or not artist.get("id"):
+        return
+    get_timeseries_store().append(
+        artist["id"],
+        popularity=artist.get("popularity"),
+        followers=(artist.get("followers") or {}).get("total"),
+        name=artist.get("name"),
+        ts=ts,
+    )
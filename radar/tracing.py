@@ -0,0 +1,270 @@
+# =========================================================
+# TRACING (latence par étape)
+# =========================================================
+"""
+Spans légers pour mesurer chaque étape (appels API, décodage, librosa,
+TextBlob, graphiques...) sans dépendance externe.
+
+- span("lastfm.tags", artist=...)  : context manager (ou @traced),
+- current_span().set(cache="hit", bytes=...) : attributs posés en cours de route,
+- une Trace regroupe les spans d'un rerun Streamlit (ou d'un job),
+- métriques agrégées par nom de span pour tout le process
+  (export texte Prometheus), traces récentes exportables en JSON lines.
+
+Les threads n'héritent pas du contexte : utiliser propagate(fn) pour
+rattacher les spans d'un ThreadPoolExecutor à la trace courante.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_TRACES_MAX = 200
+
+_current_trace = contextvars.ContextVar("radar_trace", default=None)
+_current_span = contextvars.ContextVar("radar_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs", "status", "thread")
+
+    def __init__(self, name: str, parent_id=None, attrs=None):
+        self.name = name
+        self.span_id = next(_ids)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = dict(attrs or {})
+        self.status = "ok"
+        self.thread = threading.current_thread().name
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        return self
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """Ensemble des spans d'une unité de travail (un rerun, un job...)."""
+
+    def __init__(self, label: str = "", **attrs):
+        self.trace_id = next(_ids)
+        self.label = label
+        self.attrs = dict(attrs)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, s: Span):
+        with self._lock:
+            self.spans.append(s)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def records(self) -> list:
+        """Spans à plat, temps relatifs au début de la trace (secondes)."""
+        with self._lock:
+            spans = list(self.spans)
+        return [
+            {
+                "trace_id": self.trace_id,
+                "trace": self.label,
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "name": s.name,
+                "start_s": round(s.start - self.start, 6),
+                "duration_s": round(s.duration, 6),
+                "status": s.status,
+                "thread": s.thread,
+                **{f"attr.{k}": v for k, v in s.attrs.items()},
+            }
+            for s in sorted(spans, key=lambda s: s.start)
+        ]
+
+
+# ---------------------------------------------------------
+# Métriques agrégées (process)
+# ---------------------------------------------------------
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+_recent_traces = deque(maxlen=RECENT_TRACES_MAX)
+
+
+def _record_metrics(s: Span):
+    with _metrics_lock:
+        m = _metrics.get(s.name)
+        if m is None:
+            m = _metrics[s.name] = {
+                "count": 0, "sum": 0.0, "errors": 0,
+                "cache_hit": 0, "cache_miss": 0, "bytes": 0,
+                "buckets": [0] * len(LATENCY_BUCKETS),
+            }
+        d = s.duration
+        m["count"] += 1
+        m["sum"] += d
+        if s.status != "ok":
+            m["errors"] += 1
+        cache = s.attrs.get("cache")
+        if cache == "hit":
+            m["cache_hit"] += 1
+        elif cache == "miss":
+            m["cache_miss"] += 1
+        if isinstance(s.attrs.get("bytes"), (int, float)):
+            m["bytes"] += int(s.attrs["bytes"])
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if d <= bound:
+                m["buckets"][i] += 1
+
+
+def metrics_snapshot() -> dict:
+    with _metrics_lock:
+        return {k: {**v, "buckets": list(v["buckets"])} for k, v in _metrics.items()}
+
+
+# ---------------------------------------------------------
+# API
+# ---------------------------------------------------------
+
+def start_trace(label: str = "", **attrs) -> Trace:
+    trace = Trace(label, **attrs)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def finish_trace(trace: Trace):
+    trace.end = time.perf_counter()
+    _recent_traces.append(trace)
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_span():
+    """Span actif (ou un span neutre : .set() ne fait rien)."""
+    return _current_span.get() or _NOOP
+
+
+@contextmanager
+def span(name: str, **attrs):
+    parent = _current_span.get()
+    s = Span(name, parent_id=parent.span_id if parent else None, attrs=attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.status = "error"
+        s.attrs.setdefault("error", type(exc).__name__)
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+        _record_metrics(s)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(s)
+
+
+def traced(name: str = None, **static_attrs):
+    """Décorateur : un span par appel de la fonction."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **static_attrs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """Lie `fn` au contexte courant (trace + span parent) pour un autre thread."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+# ---------------------------------------------------------
+# Exports
+# ---------------------------------------------------------
+
+def recent_traces() -> list:
+    return list(_recent_traces)
+
+
+def export_jsonl(traces=None) -> str:
+    """Spans des traces (récentes par défaut) au format JSON lines."""
+    traces = recent_traces() if traces is None else traces
+    lines = []
+    for t in traces:
+        for rec in t.records():
+            lines.append(json.dumps(rec, ensure_ascii=False, default=str))
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _label(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def export_prometheus() -> str:
+    """Métriques agrégées du process au format texte Prometheus."""
+    m = metrics_snapshot()
+    out = [
+        "# HELP radar_span_duration_seconds Durée des étapes tracées.",
+        "# TYPE radar_span_duration_seconds histogram",
+    ]
+    for name, v in sorted(m.items()):
+        lbl = f'name="{_label(name)}"'
+        for bound, n in zip(LATENCY_BUCKETS, v["buckets"]):
+            out.append(f'radar_span_duration_seconds_bucket{{{lbl},le="{bound}"}} {n}')
+        out.append(f'radar_span_duration_seconds_bucket{{{lbl},le="+Inf"}} {v["count"]}')
+        out.append(f"radar_span_duration_seconds_sum{{{lbl}}} {v['sum']:.6f}")
+        out.append(f"radar_span_duration_seconds_count{{{lbl}}} {v['count']}")
+
+    out += ["# HELP radar_span_errors_total Étapes terminées en erreur.",
+            "# TYPE radar_span_errors_total counter"]
+    out += [f'radar_span_errors_total{{name="{_label(n)}"}} {v["errors"]}' for n, v in sorted(m.items())]
+
+    out += ["# HELP radar_span_cache_total Résultats de cache par étape.",
+            "# TYPE radar_span_cache_total counter"]
+    for n, v in sorted(m.items()):
+        if v["cache_hit"] or v["cache_miss"]:
+            out.append(f'radar_span_cache_total{{name="{_label(n)}",result="hit"}} {v["cache_hit"]}')
+            out.append(f'radar_span_cache_total{{name="{_label(n)}",result="miss"}} {v["cache_miss"]}')
+
+    out += ["# HELP radar_span_payload_bytes_total Octets reçus par étape.",
+            "# TYPE radar_span_payload_bytes_total counter"]
+    out += [f'radar_span_payload_bytes_total{{name="{_label(n)}"}} {v["bytes"]}'
+            for n, v in sorted(m.items()) if v["bytes"]]
+    return "\n".join(out) + "\n"
@@ -0,0 +1,236 @@
+# =========================================================
+# TRADUCTION DES PAROLES (cache + lots DeepL)
+# =========================================================
+"""
+Traduction vers l'anglais pour l'analyse de texte, au-dessus de
+radar.sources.deepl_translate_batch :
+
+- cache par hash du contenu + langue cible (mémoire + DATA_DIR/translations),
+  langue source détectée stockée avec la traduction,
+- unité de traduction = la ligne : un refrain répété 4 fois n'est traduit
+  qu'une fois, et la structure ligne à ligne du texte est conservée,
+- les lignes manquantes sont regroupées en requêtes multi-textes, découpées
+  aux frontières de strophes sous les limites DeepL, envoyées en parallèle,
+- translate_many() : même mécanique sur plusieurs chansons d'un coup
+  (jobs batch : les lignes communes à plusieurs titres ne partent qu'une fois).
+
+Une requête en échec laisse ses lignes en version originale (non mises en cache).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from radar.config import data_path, get_secret
+from radar.sources import deepl_translate_batch
+from radar.tracing import propagate, span
+
+
+TARGET_LANG = "EN"
+# Limites DeepL : 50 textes / requête, corps < 128 Kio -> marge confortable
+MAX_TEXTS_PER_REQUEST = 50
+MAX_CHARS_PER_REQUEST = 20000
+TRANSLATION_WORKERS = 4
+MEMORY_CACHE_MAX = 50000
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+# ---------------------------------------------------------
+# Cache
+# ---------------------------------------------------------
+
+def _cache_key(text: str, target: str) -> str:
+    return hashlib.sha1(f"{target}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return data_path("translations", key[:2], f"{key}.json")
+
+
+def cache_get(text: str, target: str = TARGET_LANG):
+    """(traduction, langue_source) en cache, ou None."""
+    key = _cache_key(text, target)
+    with _memory_lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            _memory.move_to_end(key)
+            return hit
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    hit = (entry["text"], entry["source_lang"])
+    _remember(key, hit)
+    return hit
+
+
+def cache_put(text: str, translated: str, source_lang: str, target: str = TARGET_LANG):
+    key = _cache_key(text, target)
+    _remember(key, (translated, source_lang))
+    path = _cache_path(key)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"text": translated, "source_lang": source_lang, "target": target}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _remember(key: str, value: tuple):
+    with _memory_lock:
+        _memory[key] = value
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_MAX:
+            _memory.popitem(last=False)
+
+
+# ---------------------------------------------------------
+# Découpage
+# ---------------------------------------------------------
+
+def split_stanzas(text: str) -> list:
+    """Strophes (séparées par des lignes vides) -> listes de lignes non vides."""
+    stanzas, current = [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            current.append(line)
+        elif current:
+            stanzas.append(current)
+            current = []
+    if current:
+        stanzas.append(current)
+    return stanzas
+
+
+def chunk_lines(stanzas: list) -> list:
+    """
+    Regroupe les lignes en requêtes (listes de lignes) sous les limites,
+    en coupant de préférence entre deux strophes.
+    """
+    chunks, current, chars = [], [], 0
+    for stanza in stanzas:
+        size = sum(len(l) for l in stanza)
+        if current and (len(current) + len(stanza) > MAX_TEXTS_PER_REQUEST
+                        or chars + size > MAX_CHARS_PER_REQUEST):
+            chunks.append(current)
+            current, chars = [], 0
+        for line in stanza:
+            # Strophe plus grande qu'une requête : coupe entre deux lignes
+            if current and (len(current) >= MAX_TEXTS_PER_REQUEST
+                            or chars + len(line) > MAX_CHARS_PER_REQUEST):
+                chunks.append(current)
+                current, chars = [], 0
+            current.append(line)
+            chars += len(line)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# ---------------------------------------------------------
+# Traduction
+# ---------------------------------------------------------
+
+def _translate_missing(stanzas: list, target: str) -> int:
+    """Traduit (en lots parallèles) les lignes absentes du cache. Retourne le nb de lignes envoyées."""
+    seen = set()
+    missing = []
+    for stanza in stanzas:
+        todo = []
+        for line in stanza:
+            if line not in seen and cache_get(line, target) is None:
+                todo.append(line)
+            seen.add(line)
+        if todo:
+            missing.append(todo)
+    if not missing:
+        return 0
+
+    chunks = chunk_lines(missing)
+
+    def run(chunk):
+        try:
+            return deepl_translate_batch(chunk, target)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(TRANSLATION_WORKERS, len(chunks))) as pool:
+        for chunk, results in zip(chunks, pool.map(propagate(run), chunks)):
+            if results is None:
+                continue
+            for line, (translated, lang) in zip(chunk, results):
+                cache_put(line, translated, lang, target)
+    return sum(len(c) for c in chunks)
+
+
+def _assemble(text: str, target: str) -> tuple:
+    """
+    Texte traduit ligne à ligne (lignes vides conservées), langue source
+    majoritaire, et False si des lignes n'ont pas pu être traduites.
+    """
+    out, langs, complete = [], Counter(), True
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            out.append("")
+            continue
+        hit = cache_get(line, target)
+        if hit is None:
+            out.append(line)
+            complete = False
+            continue
+        out.append(hit[0])
+        if hit[1] != "unknown":
+            langs[hit[1]] += 1
+    lang = langs.most_common(1)[0][0] if langs else "unknown"
+    return "\n".join(out), lang, complete
+
+
+def translate_many(texts: list, target: str = TARGET_LANG) -> list:
+    """
+    Traduit plusieurs textes d'un coup. Retourne [(texte_analyse, langue_source)].
+    Sans clé DeepL : textes d'origine + 'unknown'.
+    """
+    if get_secret("DEEPL_API_KEY") is None:
+        return [(t, "unknown") for t in texts]
+
+    results = [None] * len(texts)
+    todo = []
+    for i, text in enumerate(texts):
+        if not text:
+            results[i] = (text, "unknown")
+            continue
+        hit = cache_get(text, target)
+        if hit is not None:
+            results[i] = hit
+        else:
+            todo.append(i)
+    if not todo:
+        return results
+
+    with span("translation.batch", songs=len(todo)) as s:
+        stanzas = [st for i in todo for st in split_stanzas(texts[i])]
+        s.set(lines_sent=_translate_missing(stanzas, target),
+              lines_total=sum(len(st) for st in stanzas))
+
+    for i in todo:
+        translated, lang, complete = _assemble(texts[i], target)
+        results[i] = (translated, lang)
+        if complete:
+            # Chanson entièrement résolue : raccourci pour les prochaines vues
+            cache_put(texts[i], translated, lang, target)
+    return results
+
+
+def translate_to_english(text: str):
+    """
+    Traduit le texte vers l'anglais (cache + DeepL) si possible.
+    Retourne (texte_analyse, langue_source_estimee).
+    Si pas de clé ou erreur : renvoie le texte d'origine + 'unknown'.
+    """
+    return translate_many([text])[0]
@@ -0,0 +1,24 @@
+from radar.catalogue import INCOMPLETE_RETRY_S, _merge_entry
+
+
+AUDIO = {"tempo": 120.0, "audio_mood": 0.0}
+
+
+def test_merge_entry_keeps_neutral_polarity():
+    merged = _merge_entry(None, {"audio": AUDIO, "text_polarity": 0.0, "has_lyrics": True}, 0)
+    assert merged["text_polarity"] == 0.0
+    assert merged["audio"] == AUDIO
+    assert "retry_after" not in merged
+
+
+def test_merge_entry_replaces_stale_polarity_with_zero():
+    old = {"audio": AUDIO, "text_polarity": 0.4, "has_lyrics": True}
+    merged = _merge_entry(old, {"audio": None, "text_polarity": 0.0, "has_lyrics": True}, 0)
+    assert merged["text_polarity"] == 0.0
+    assert merged["audio"] == AUDIO
+
+
+def test_merge_entry_marks_incomplete_tracks_for_retry():
+    merged = _merge_entry(None, {"audio": None, "text_polarity": None, "has_lyrics": False}, 100)
+    assert merged["has_lyrics"] is False
+    assert merged["retry_after"] == 100 + INCOMPLETE_RETRY_S